@@ -1,32 +1,77 @@
-from .raw.bindingdb import BindingDB
-from .raw.protein_structure import (
-    FoldswitchProteinsTableS1A,
-    FoldswitchProteinsTableS1B,
-    FoldswitchProteinsTableS1C,
-    CodNas91,
-    PDBHandler,
-)
-from .raw.moleculenet import (
-    Tox21,
-    ToxCast,
-    ESOL,
-    FreeSolv,
-    Lipophilicity,
-    QM7,
-    QM8,
-    QM9,
-    MUV,
-    HIV,
-    BACE,
-    BBBP,
-    SIDER,
-    ClinTox,
-)
-
-from .raw.uniprot import UniProt
-
-from .raw.weizmann_ccca import Weizmann3CA
-
-from .raw.zinc import ZINC
-
-from .processed.bindingaffinity import BindingAffinity
+import importlib
+from typing import TYPE_CHECKING
+
+# The dataset classes are imported on first access, so `import aiondata` stays fast and only
+# the dependencies of the datasets actually used (RDKit, Biopython, SciPy, ...) are loaded.
+_EXPORTS = {
+    "BindingDB": ".raw.bindingdb",
+    "FoldswitchProteinsTableS1A": ".raw.protein_structure",
+    "FoldswitchProteinsTableS1B": ".raw.protein_structure",
+    "FoldswitchProteinsTableS1C": ".raw.protein_structure",
+    "CodNas91": ".raw.protein_structure",
+    "PDBHandler": ".raw.protein_structure",
+    "Tox21": ".raw.moleculenet",
+    "ToxCast": ".raw.moleculenet",
+    "ESOL": ".raw.moleculenet",
+    "FreeSolv": ".raw.moleculenet",
+    "Lipophilicity": ".raw.moleculenet",
+    "QM7": ".raw.moleculenet",
+    "QM8": ".raw.moleculenet",
+    "QM9": ".raw.moleculenet",
+    "MUV": ".raw.moleculenet",
+    "HIV": ".raw.moleculenet",
+    "BACE": ".raw.moleculenet",
+    "BBBP": ".raw.moleculenet",
+    "SIDER": ".raw.moleculenet",
+    "ClinTox": ".raw.moleculenet",
+    "UniProt": ".raw.uniprot",
+    "Weizmann3CA": ".raw.weizmann_ccca",
+    "ZINC": ".raw.zinc",
+    "BindingAffinity": ".processed.bindingaffinity",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+if TYPE_CHECKING:
+    from .raw.bindingdb import BindingDB
+    from .raw.protein_structure import (
+        FoldswitchProteinsTableS1A,
+        FoldswitchProteinsTableS1B,
+        FoldswitchProteinsTableS1C,
+        CodNas91,
+        PDBHandler,
+    )
+    from .raw.moleculenet import (
+        Tox21,
+        ToxCast,
+        ESOL,
+        FreeSolv,
+        Lipophilicity,
+        QM7,
+        QM8,
+        QM9,
+        MUV,
+        HIV,
+        BACE,
+        BBBP,
+        SIDER,
+        ClinTox,
+    )
+    from .raw.uniprot import UniProt
+    from .raw.weizmann_ccca import Weizmann3CA
+    from .raw.zinc import ZINC
+    from .processed.bindingaffinity import BindingAffinity
@@ -0,0 +1,14 @@
+"""
+Offline benchmarks of the dataset loaders.
+
+Each case generates synthetic inputs shaped like an upstream download, then times every stage
+of the loader in a fresh process and records its throughput and peak RSS. The "import" case
+times `import aiondata` and the first access to dataset classes. Run it with
+
+    python -m aiondata.benchmarks --scale 10 --save results.json
+    python -m aiondata.benchmarks --scale 10 --baseline results.json
+
+to compare a branch with a baseline; regressions beyond `--tolerance` set the exit status.
+"""
+
+from .runner import CASES, compare, measure, run_case
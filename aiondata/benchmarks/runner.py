@@ -0,0 +1,296 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+import polars as pl
+
+from .. import metrics
+from ..raw.bindingdb import BindingDB
+from ..raw.uniprot import UniProt
+from ..raw.weizmann_ccca import Weizmann3CA
+from ..raw.zinc import ZINC, ZINC20_TRANCHES
+from .synthetic import (
+    write_bindingdb_sdf,
+    write_uniprot_dat,
+    write_weizmann_zip,
+    write_zinc_tranches,
+)
+
+# Relative slowdowns (or peak RSS growth) above this fraction of the baseline are regressions
+DEFAULT_TOLERANCE = 0.2
+# Stages shorter than this in the baseline are too noisy to compare
+MIN_SECONDS = 0.05
+
+
+class Stages:
+    """Accumulates the wall-clock time of named stages."""
+
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+
+    @contextmanager
+    def __call__(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = (
+                self.seconds.get(name, 0.0) + time.perf_counter() - start
+            )
+
+
+def _bindingdb(workdir: Path, scale: float, stages: Stages) -> dict:
+    source = write_bindingdb_sdf(
+        workdir / "BindingDB.sdf.zip", int(2000 * scale), compress=True
+    )
+    with stages("open"):
+        dataset = BindingDB(BindingDB.from_compressed_file(source))
+    with stages("parse"):
+        records = list(dataset.to_generator(progress_bar=False))
+    with stages("dataframe"):
+        df = pl.DataFrame(records, schema=dataset.SCHEMA, strict=False)
+    with stages("write_parquet"):
+        dataset.LAYOUT.write(dataset.LAYOUT.apply(df), dataset.get_cache_path())
+    return {"records": len(df), "input_bytes": source.stat().st_size}
+
+
+def _uniprot(workdir: Path, scale: float, stages: Stages) -> dict:
+    source = write_uniprot_dat(workdir / "uniprot_sprot.dat.gz", int(5000 * scale))
+    dataset = UniProt(source.as_uri())
+    with stages("parse"):
+        records = list(dataset.to_generator())
+    with stages("dataframe"):
+        df = pl.DataFrame(records, infer_schema_length=25000, strict=False)
+    with stages("write_parquet"):
+        df.write_parquet(dataset.get_cache_path())
+    return {"records": len(df), "input_bytes": source.stat().st_size}
+
+
+def _weizmann(workdir: Path, scale: float, stages: Stages) -> dict:
+    cells = int(2000 * scale)
+    source = write_weizmann_zip(workdir / "study.zip", cells=cells, genes=2000)
+    dataset = Weizmann3CA()
+    pl.DataFrame(
+        {"Study name": ["Synthetic study"], "Data": [source.as_uri()]}
+    ).write_parquet(dataset.get_cache_path())
+    with stages("download"):
+        dataset._download_or_cache("Synthetic study", source.as_uri())
+    with stages("load"):
+        dataset["Synthetic study"]
+    return {"records": cells, "input_bytes": source.stat().st_size}
+
+
+def _zinc(workdir: Path, scale: float, stages: Stages) -> dict:
+    tranches = ZINC20_TRANCHES[:8]
+    source = write_zinc_tranches(workdir / "zinc", tranches, int(25000 * scale))
+    dataset = ZINC(source, tranches)
+    with stages("read"):
+        df = dataset.get_df()
+    with stages("write_parquet"):
+        dataset.LAYOUT.write(dataset.LAYOUT.apply(df), dataset.get_cache_path())
+    input_bytes = sum(path.stat().st_size for path in (workdir / "zinc").rglob("*.txt"))
+    return {"records": len(df), "input_bytes": input_bytes}
+
+
+IMPORT_SCRIPT = """
+import time
+start = time.perf_counter()
+import aiondata
+package = time.perf_counter()
+aiondata.Tox21
+moleculenet = time.perf_counter()
+aiondata.BindingDB
+print(package - start, moleculenet - package, time.perf_counter() - moleculenet)
+"""
+
+
+def _import(workdir: Path, scale: float, stages: Stages) -> dict:
+    # A fresh interpreter, since the benchmark process has already imported every loader
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    for stage, seconds in zip(
+        ["package", "moleculenet", "bindingdb"], output.stdout.split()
+    ):
+        stages.seconds[stage] = float(seconds)
+    return {"records": 1, "input_bytes": 0}
+
+
+CASES: Dict[str, Callable[[Path, float, Stages], dict]] = {
+    "import": _import,
+    "bindingdb": _bindingdb,
+    "uniprot": _uniprot,
+    "weizmann": _weizmann,
+    "zinc": _zinc,
+}
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def run_case(name: str, scale: float = 1.0) -> dict:
+    """
+    Runs one benchmark case in the current process, on synthetic inputs in a temporary cache.
+
+    Generating the inputs is not timed. The peak RSS is that of the whole process, so use
+    `measure` to get a comparable figure.
+
+    Args:
+        name (str): The case, one of CASES.
+        scale (float): Multiplies the size of the synthetic inputs.
+
+    Returns:
+        dict: The time of each stage, the total time, the number of records and input bytes,
+            the throughput, the peak RSS in MB and the loader's own metrics (see
+            `aiondata.metrics`).
+
+    Raises:
+        ValueError: If the case is unknown.
+    """
+    if name not in CASES:
+        raise ValueError(f"Unknown benchmark {name!r}, expected one of {list(CASES)}.")
+    stages = Stages()
+    previous = os.environ.get("AIONDATA_CACHE")
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ["AIONDATA_CACHE"] = str(Path(workdir) / "cache")
+        try:
+            with metrics.collect() as report:
+                result = CASES[name](Path(workdir), scale, stages)
+        finally:
+            if previous is None:
+                os.environ.pop("AIONDATA_CACHE")
+            else:
+                os.environ["AIONDATA_CACHE"] = previous
+
+    seconds = sum(stages.seconds.values())
+    return {
+        "stages": stages.seconds,
+        "seconds": seconds,
+        "records": result["records"],
+        "records_per_second": result["records"] / seconds if seconds else 0.0,
+        "input_mb": result["input_bytes"] / 2**20,
+        "mb_per_second": result["input_bytes"] / 2**20 / seconds if seconds else 0.0,
+        "peak_rss_mb": _peak_rss_mb(),
+        "metrics": report.as_dict(),
+    }
+
+
+def measure(name: str, scale: float = 1.0, repeat: int = 1) -> dict:
+    """
+    Runs a benchmark case in fresh processes so the peak RSS is its own.
+
+    Args:
+        name (str): The case, one of CASES.
+        scale (float): Multiplies the size of the synthetic inputs.
+        repeat (int): The number of runs; the fastest is kept.
+
+    Returns:
+        dict: The result of the fastest run, see `run_case`.
+    """
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for _ in range(repeat):
+        with ProcessPoolExecutor(1, mp_context=context) as executor:
+            results.append(executor.submit(run_case, name, scale).result())
+    return min(results, key=lambda result: result["seconds"])
+
+
+def compare(
+    results: Dict[str, dict],
+    baseline: Dict[str, dict],
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> List[str]:
+    """
+    Compares benchmark results with a baseline.
+
+    Args:
+        results (Dict[str, dict]): The results by case.
+        baseline (Dict[str, dict]): The baseline results by case, e.g. from a previous release.
+        tolerance (float): The relative growth of time or peak RSS that is tolerated.
+
+    Returns:
+        List[str]: A description of every regression. Cases or stages missing from either
+            side, and times below MIN_SECONDS in the baseline, are skipped.
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        metrics = [("seconds", result["seconds"], reference["seconds"])]
+        metrics += [
+            (f"stage {stage}", seconds, reference["stages"][stage])
+            for stage, seconds in result["stages"].items()
+            if stage in reference.get("stages", {})
+        ]
+        metrics = [metric for metric in metrics if metric[2] >= MIN_SECONDS]
+        metrics.append(("peak_rss_mb", result["peak_rss_mb"], reference["peak_rss_mb"]))
+        for metric, value, expected in metrics:
+            if value > expected * (1 + tolerance):
+                regressions.append(
+                    f"{name} {metric}: {value:.3f} vs {expected:.3f} "
+                    f"(+{value / expected - 1:.0%})"
+                )
+    return regressions
+
+
+def format_results(results: Dict[str, dict]) -> str:
+    """Formats benchmark results as a table."""
+    lines = [
+        f"{'case':<10} {'seconds':>8} {'records/s':>11} {'MB/s':>8} {'peak MB':>8}  stages"
+    ]
+    for name, result in results.items():
+        stages = ", ".join(f"{k}={v:.3f}" for k, v in result["stages"].items())
+        lines.append(
+            f"{name:<10} {result['seconds']:>8.3f} {result['records_per_second']:>11.0f} "
+            f"{result['mb_per_second']:>8.2f} {result['peak_rss_mb']:>8.0f}  {stages}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the dataset loaders on synthetic inputs, without network."
+    )
+    parser.add_argument("cases", nargs="*", help=f"Cases to run, of {list(CASES)}.")
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--save", help="Write the results to this JSON file.")
+    parser.add_argument(
+        "--baseline", help="Compare with the results in this JSON file."
+    )
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+    # Read by tqdm when the spawned workers import it
+    os.environ.setdefault("TQDM_DISABLE", "1")
+
+    results = {
+        name: measure(name, args.scale, args.repeat) for name in args.cases or CASES
+    }
+    print(format_results(results))
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, indent=2))
+    if args.baseline:
+        regressions = compare(
+            results, json.loads(Path(args.baseline).read_text()), args.tolerance
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
@@ -0,0 +1,240 @@
+"""
+Generators of synthetic raw inputs, shaped like the upstream files each loader parses.
+
+The files are deterministic for a given seed and size, so benchmark runs are comparable.
+"""
+
+import gzip
+import io
+import zipfile
+from pathlib import Path
+from typing import List, Sequence
+
+import numpy as np
+import polars as pl
+from rdkit import Chem
+from rdkit.Chem import AllChem
+from scipy import sparse
+from scipy.io import mmwrite
+
+from ..raw.bindingdb import BindingDB
+
+TEMPLATE_SMILES = [
+    "CC(=O)Oc1ccccc1C(=O)O",
+    "CN1CCC[C@H]1c1cccnc1",
+    "CC(C)Cc1ccc(cc1)[C@@H](C)C(=O)O",
+    "COc1ccc2[nH]cc(CCN)c2c1",
+    "O=C(O)C[C@H](N)C(=O)N[C@@H](Cc1ccccc1)C(=O)OC",
+    "Cc1ccc(cc1Nc1nccc(n1)c1cccnc1)NC(=O)c1ccc(CN2CCN(C)CC2)cc1",
+    "CN1C(=O)N(C)c2nc[nH]c2C1=O",
+    "NS(=O)(=O)c1cc2c(cc1Cl)NCNS2(=O)=O",
+    "C[C@]12CC[C@H]3[C@@H](CCc4cc(O)ccc34)[C@@H]1CC[C@@H]2O",
+    "OC(=O)c1ccccc1Nc1cccc(c1)C(F)(F)F",
+    "[Na+].[O-]C(=O)c1ccccc1O",
+    "Clc1ccc(cc1)C(c1ccccc1)N1CCN(CC1)CCOCC(=O)O",
+]
+AMINO_ACIDS = np.array(list("ACDEFGHIKLMNPQRSTVWY"))
+# Affinity fields are sometimes censored or missing upstream
+AFFINITY_FIELDS = {"Ki (nM)", "IC50 (nM)", "Kd (nM)", "EC50 (nM)"}
+
+
+def _sequence(rng: np.random.Generator, low: int = 100, high: int = 800) -> str:
+    return "".join(rng.choice(AMINO_ACIDS, rng.integers(low, high)))
+
+
+def _key(rng: np.random.Generator, length: int) -> str:
+    return "".join(rng.choice(list("ABCDEFGHIJKLMNOPQRSTUVWXYZ"), length))
+
+
+def _mol_blocks() -> List[str]:
+    blocks = []
+    for smiles in TEMPLATE_SMILES:
+        mol = Chem.AddHs(Chem.MolFromSmiles(smiles))
+        if AllChem.EmbedMolecule(mol, randomSeed=0) != 0:
+            AllChem.Compute2DCoords(mol)
+        blocks.append(Chem.MolToMolBlock(mol))
+    return blocks
+
+
+def _bindingdb_value(
+    name: str, dtype: pl.DataType, rng: np.random.Generator, row: int
+) -> str:
+    if name in AFFINITY_FIELDS:
+        draw = rng.random()
+        if draw < 0.5:
+            return ""
+        value = f"{10 ** rng.uniform(-1, 5):.2f}"
+        return (">" + value) if draw > 0.95 else value
+    if name == "BindingDB Reactant_set_id":
+        return str(row + 1)
+    if name == "BindingDB Target Chain Sequence":
+        return _sequence(rng)
+    if name == "SMILES":
+        return TEMPLATE_SMILES[row % len(TEMPLATE_SMILES)]
+    if name == "Ligand InChI Key":
+        return f"{_key(rng, 14)}-{_key(rng, 10)}-N"
+    if dtype == pl.Float64:
+        return f"{rng.uniform(0, 100):.1f}"
+    return f"{name.split()[0]} {rng.integers(0, 1000)}"
+
+
+def write_bindingdb_sdf(
+    path: Path, records: int, seed: int = 0, compress: bool = False
+) -> Path:
+    """
+    Writes a BindingDB-style SDF with every tag of `BindingDB.SCHEMA` on every record.
+
+    Args:
+        path (Path): The file to write.
+        records (int): The number of records.
+        seed (int): The random seed.
+        compress (bool): Whether to write a zip archive holding the SDF, like the upstream
+            download.
+
+    Returns:
+        Path: The written file.
+    """
+    rng = np.random.default_rng(seed)
+    blocks = _mol_blocks()
+    out = io.StringIO()
+    for row in range(records):
+        block = blocks[row % len(blocks)]
+        out.write(f"Synthetic{row}{block[block.index(chr(10)):]}")
+        for name, dtype in BindingDB.SCHEMA:
+            if name in BindingDB.RELATIONS.values():
+                continue
+            out.write(f"> <{name}>\n{_bindingdb_value(name, dtype, rng, row)}\n\n")
+        out.write("$$$$\n")
+
+    path = Path(path)
+    if compress:
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("BindingDB_synthetic.sdf", out.getvalue())
+    else:
+        path.write_text(out.getvalue())
+    return path
+
+
+def write_uniprot_dat(path: Path, entries: int, seed: int = 0) -> Path:
+    """
+    Writes a gzipped UniProtKB flat file in the Swiss-Prot `.dat.gz` format.
+
+    Args:
+        path (Path): The file to write.
+        entries (int): The number of entries.
+        seed (int): The random seed.
+
+    Returns:
+        Path: The written file.
+    """
+    rng = np.random.default_rng(seed)
+    out = io.StringIO()
+    for entry in range(entries):
+        accession = f"Q{entry:05d}"
+        sequence = _sequence(rng, 50, 1500)
+        out.write(
+            f"ID   SYN{entry}_HUMAN             Reviewed;  {len(sequence)} AA.\n"
+            f"AC   {accession}; P{entry:05d};\n"
+            "DT   01-JAN-2000, integrated into UniProtKB/Swiss-Prot.\n"
+            f"DE   RecName: Full=Synthetic protein {entry};\n"
+            f"GN   Name=SYN{entry};\n"
+            "OS   Homo sapiens (Human).\n"
+            "OC   Eukaryota; Metazoa; Chordata; Craniata; Vertebrata; Euteleostomi;\n"
+            "OC   Mammalia; Eutheria; Euarchontoglires; Primates; Haplorrhini.\n"
+            "OX   NCBI_TaxID=9606;\n"
+            "RN   [1]\n"
+            f"RX   PubMed={rng.integers(1_000_000, 40_000_000)};\n"
+            "RA   Doe J., Roe R.;\n"
+            'RT   "Synthetic sequences for benchmarks.";\n'
+            "RL   J. Synth. Biol. 1:1-10(2000).\n"
+            f"CC   -!- FUNCTION: Synthetic function {entry}.\n"
+            f"DR   PDB; {_key(rng, 4)}; X-ray; 2.00 A; A=1-{len(sequence)}.\n"
+            "PE   1: Evidence at protein level;\n"
+            "KW   Reference proteome; Synthetic.\n"
+            f"FT   CHAIN           1..{len(sequence)}\n"
+            f"SQ   SEQUENCE   {len(sequence)} AA;  {len(sequence) * 110} MW;  "
+            f"{_key(rng, 16)} CRC64;\n"
+        )
+        for start in range(0, len(sequence), 60):
+            line = sequence[start : start + 60]
+            out.write(
+                "     "
+                + " ".join(line[i : i + 10] for i in range(0, len(line), 10))
+                + "\n"
+            )
+        out.write("//\n")
+
+    path = Path(path)
+    with gzip.open(path, "wt") as fd:
+        fd.write(out.getvalue())
+    return path
+
+
+def write_weizmann_zip(
+    path: Path, cells: int, genes: int, density: float = 0.05, seed: int = 0
+) -> Path:
+    """
+    Writes a Weizmann 3CA-style study archive with cells, genes, metadata and a sparse
+    genes x cells expression matrix in Matrix Market format.
+
+    Args:
+        path (Path): The file to write.
+        cells (int): The number of cells.
+        genes (int): The number of genes.
+        density (float): The fraction of non-zero expression values.
+        seed (int): The random seed.
+
+    Returns:
+        Path: The written file.
+    """
+    rng = np.random.default_rng(seed)
+    names = [f"cell_{i}" for i in range(cells)]
+    types = rng.choice(["Malignant", "T_cell", "Macrophage", "Fibroblast"], cells)
+    matrix = sparse.random(
+        genes, cells, density=density, random_state=seed, format="coo"
+    )
+    matrix.data = np.round(matrix.data * 10, 3)
+    mtx = io.BytesIO()
+    mmwrite(mtx, matrix)
+
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(
+            "Cells.csv",
+            pl.DataFrame({"cell_name": names, "cell_type": types.tolist()}).write_csv(),
+        )
+        archive.writestr("Genes.txt", "\n".join(f'"GENE{i}"' for i in range(genes)))
+        archive.writestr(
+            "Meta-data.csv",
+            pl.DataFrame(
+                {"cell_name": names, "sample": [f"s{i % 8}" for i in range(cells)]}
+            ).write_csv(),
+        )
+        archive.writestr("Exp_data_UMIcounts.mtx", mtx.getvalue())
+    return Path(path)
+
+
+def write_zinc_tranches(
+    directory: Path, tranches: Sequence[str], rows: int, seed: int = 0
+) -> str:
+    """
+    Writes ZINC20-style 2D tranche files as `{directory}/{prefix}/{tranche}.txt`.
+
+    Args:
+        directory (Path): The directory to write to.
+        tranches (Sequence[str]): The tranche names, e.g. `ZINC20_TRANCHES[:4]`.
+        rows (int): The number of molecules per tranche.
+        seed (int): The random seed.
+
+    Returns:
+        str: The source template to pass to `ZINC(source=...)`.
+    """
+    rng = np.random.default_rng(seed)
+    for number, tranche in enumerate(tranches):
+        path = Path(directory) / tranche[:2] / f"{tranche}.txt"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        smiles = rng.choice(TEMPLATE_SMILES, rows)
+        ids = [f"ZINC{number * rows + i:012d}" for i in range(rows)]
+        pl.DataFrame({"smiles": smiles.tolist(), "zinc_id": ids}).write_csv(
+            path, separator="\t"
+        )
+    return str(Path(directory) / "{prefix}" / "{tranche}.txt")
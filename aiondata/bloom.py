@@ -0,0 +1,241 @@
+import math
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+import numpy as np
+import polars as pl
+
+from .datasets import CachedDataset, slugify
+
+FNV_OFFSET = np.uint64(0xCBF29CE484222325)
+FNV_PRIME = np.uint64(0x100000001B3)
+QUERY_CHUNK = 1 << 20
+
+
+def splitmix64(z: np.ndarray) -> np.ndarray:
+    """Applies the SplitMix64 finalizer to an array of 64-bit hashes."""
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def hash_keys(keys: Union[Iterable[str], pl.Series, np.ndarray]) -> np.ndarray:
+    """
+    Hashes a batch of strings to 64-bit integers.
+
+    The hash is FNV-1a over the UTF-8 bytes followed by a SplitMix64 finalizer. It is computed
+    over the concatenated bytes of the batch, one byte position at a time for all keys that are
+    long enough, so the work is vectorized and proportional to the total number of bytes (a few
+    long SMILES do not pad the others). The result does not depend on the batch composition or
+    the Python/Polars version.
+
+    Args:
+        keys: The strings to hash.
+
+    Returns:
+        np.ndarray: A uint64 array with one hash per key.
+    """
+    if not isinstance(keys, pl.Series):
+        keys = pl.Series("key", keys, dtype=pl.Utf8)
+    keys = keys.cast(pl.Utf8).fill_null("")
+    if keys.len() == 0:
+        return np.empty(0, dtype=np.uint64)
+    lengths = keys.str.len_bytes().to_numpy().astype(np.int64)
+    data = np.frombuffer(keys.str.join("").item().encode(), dtype=np.uint8)
+
+    # Longest keys first, so the keys still active at a byte position are a prefix
+    order = np.argsort(-lengths, kind="stable")
+    starts = (np.cumsum(lengths) - lengths)[order]
+    active = np.searchsorted(-lengths[order], -np.arange(lengths.max()), side="left")
+    hashes = np.full(len(lengths), FNV_OFFSET, dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for position, count in enumerate(active):
+            column = data[starts[:count] + position].astype(np.uint64)
+            hashes[:count] = (hashes[:count] ^ column) * FNV_PRIME
+        result = np.empty_like(hashes)
+        result[order] = splitmix64(hashes)
+        return result
+
+
+class BloomFilter:
+    """
+    A memory-mapped Bloom filter for fast approximate membership tests over string keys.
+
+    The filter answers "is this key in the set" with no false negatives and a configurable
+    false-positive rate. It is typically built once over a column of a cached dataset (such as
+    InChIKeys or canonical SMILES) and then queried with large batches of candidates.
+
+    The on-disk format is a 32-byte header (magic, number of bits, number of hash functions and
+    number of inserted keys, as little-endian uint64) followed by the bit array.
+    """
+
+    MAGIC = b"AIONBLM1"
+    HEADER_SIZE = 32
+
+    def __init__(self, path: Union[str, Path]):
+        """
+        Opens an existing Bloom filter file as a read-only memory map.
+
+        Args:
+            path (Union[str, Path]): The path to the filter file.
+
+        Raises:
+            ValueError: If the file is not a Bloom filter file.
+        """
+        self.path = Path(path)
+        with open(self.path, "rb") as fd:
+            header = fd.read(self.HEADER_SIZE)
+        if header[:8] != self.MAGIC:
+            raise ValueError(f"{self.path} is not a Bloom filter file.")
+        self.num_bits, self.num_hashes, self.num_items = (
+            int(x) for x in np.frombuffer(header[8:], dtype="<u8")
+        )
+        self.bits = np.memmap(
+            self.path, dtype=np.uint8, mode="r", offset=self.HEADER_SIZE
+        )
+
+    @staticmethod
+    def optimal_size(capacity: int, error_rate: float) -> tuple:
+        """
+        Computes the number of bits and hash functions for a given capacity and error rate.
+
+        Args:
+            capacity (int): The number of keys the filter will hold.
+            error_rate (float): The target false-positive rate.
+
+        Returns:
+            tuple: The number of bits (a multiple of 8) and the number of hash functions.
+        """
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1.")
+        capacity = max(capacity, 1)
+        num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        num_bits = max(8, (num_bits + 7) // 8 * 8)
+        num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        return num_bits, num_hashes
+
+    @staticmethod
+    def _bit_indices(hashes: np.ndarray, num_bits: int, num_hashes: int) -> np.ndarray:
+        """Derives the bit positions of each key using double hashing."""
+        step = splitmix64(hashes ^ np.uint64(0x9E3779B97F4A7C15)) | np.uint64(1)
+        probes = np.arange(num_hashes, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            positions = hashes[:, None] + probes[None, :] * step[:, None]
+        return positions % np.uint64(num_bits)
+
+    @classmethod
+    def build(
+        cls,
+        keys: Union[Iterable[str], pl.Series],
+        path: Union[str, Path],
+        error_rate: float = 0.001,
+        capacity: Optional[int] = None,
+    ) -> "BloomFilter":
+        """
+        Builds a Bloom filter from a collection of keys and writes it to disk.
+
+        Args:
+            keys: The keys to insert. Duplicates and nulls are ignored.
+            path (Union[str, Path]): Where to write the filter file.
+            error_rate (float): The target false-positive rate.
+            capacity (Optional[int]): The number of keys to size the filter for. Defaults to the
+                number of distinct keys.
+
+        Returns:
+            BloomFilter: The memory-mapped filter.
+        """
+        keys = pl.Series("key", keys, dtype=pl.Utf8).drop_nulls().unique()
+        num_bits, num_hashes = cls.optimal_size(
+            capacity if capacity is not None else len(keys), error_rate
+        )
+        bits = np.zeros(num_bits // 8, dtype=np.uint8)
+        for offset in range(0, len(keys), QUERY_CHUNK):
+            chunk = keys.slice(offset, QUERY_CHUNK)
+            positions = cls._bit_indices(hash_keys(chunk), num_bits, num_hashes)
+            positions = positions.ravel()
+            np.bitwise_or.at(
+                bits,
+                positions >> np.uint64(3),
+                (1 << (positions & np.uint64(7))).astype(np.uint8),
+            )
+
+        path = Path(path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        header = np.array([num_bits, num_hashes, len(keys)], dtype="<u8")
+        with open(tmp_path, "wb") as fd:
+            fd.write(cls.MAGIC)
+            fd.write(header.tobytes())
+            fd.write(bits.tobytes())
+        tmp_path.replace(path)
+        return cls(path)
+
+    @classmethod
+    def from_dataset(
+        cls,
+        dataset: CachedDataset,
+        column: str,
+        error_rate: float = 0.001,
+    ) -> "BloomFilter":
+        """
+        Returns a Bloom filter over a column of a cached dataset, building it if needed.
+
+        The filter is stored next to the dataset cache and rebuilt when the cache is newer.
+
+        Args:
+            dataset (CachedDataset): The dataset to index.
+            column (str): The column holding the keys, e.g. "Ligand InChI Key".
+            error_rate (float): The target false-positive rate.
+
+        Returns:
+            BloomFilter: The memory-mapped filter.
+        """
+        path = dataset.get_derived_path(f"{slugify(column)}.{error_rate:g}.bloom")
+        if dataset.is_derived_fresh(path):
+            return cls(path)
+
+        cache = dataset.ensure_cache()
+        keys = (
+            pl.scan_parquet(cache)
+            .select(pl.col(column).cast(pl.Utf8).drop_nulls().unique())
+            .collect()
+            .get_column(column)
+        )
+        return cls.build(keys, path, error_rate=error_rate)
+
+    def contains(self, keys: Union[Iterable[str], pl.Series]) -> np.ndarray:
+        """
+        Tests a batch of keys for membership.
+
+        Args:
+            keys: The keys to test.
+
+        Returns:
+            np.ndarray: A boolean array, True where the key is probably in the set and False
+                where it is definitely not.
+        """
+        keys = pl.Series("key", keys, dtype=pl.Utf8)
+        result = np.zeros(len(keys), dtype=bool)
+        for offset in range(0, len(keys), QUERY_CHUNK):
+            chunk = keys.slice(offset, QUERY_CHUNK)
+            positions = self._bit_indices(
+                hash_keys(chunk.fill_null("")), self.num_bits, self.num_hashes
+            )
+            found = self.bits[positions >> np.uint64(3)] & (
+                1 << (positions & np.uint64(7))
+            ).astype(np.uint8)
+            result[offset : offset + len(chunk)] = found.all(axis=1)
+        result[keys.is_null().to_numpy()] = False
+        return result
+
+    def __contains__(self, key: str) -> bool:
+        return bool(self.contains([key])[0])
+
+    def __len__(self) -> int:
+        return self.num_items
+
+    @property
+    def error_rate(self) -> float:
+        """The expected false-positive rate given the number of inserted keys."""
+        return (
+            1 - math.exp(-self.num_hashes * self.num_items / self.num_bits)
+        ) ** self.num_hashes
@@ -0,0 +1,284 @@
+"""
+The `aiondata` command-line tool.
+
+    aiondata prefetch BindingDB UniProt Tox21 --io 8 --cpu 2
+    aiondata prefetch all
+    aiondata status
+    aiondata gc --quota 50GB
+    aiondata serve --port 8765
+"""
+
+import argparse
+import importlib
+import json
+import multiprocessing
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import aiondata
+
+from .datasets import CachedDataset, get_cache_root
+from .parallel import default_processes
+from .quota import disk_usage, gc
+
+BUILD_FILE = "build.json"
+DEFAULT_IO = 4
+
+
+def resolve_dataset(name: str) -> type:
+    """
+    Resolves a dataset class from its public name (case-insensitive) or "module:Class".
+
+    Args:
+        name (str): The name, e.g. "BindingDB", "tox21" or "mypackage.data:MyDataset".
+
+    Returns:
+        type: The dataset class.
+
+    Raises:
+        ValueError: If no such dataset exists.
+    """
+    if ":" in name:
+        module, _, attr = name.partition(":")
+        return getattr(importlib.import_module(module), attr)
+    for candidate in aiondata.__all__:
+        if candidate.lower() == name.lower():
+            return getattr(aiondata, candidate)
+    raise ValueError(f"Unknown dataset {name!r}, expected one of {list_datasets()}.")
+
+
+def list_datasets() -> List[str]:
+    """Returns the public datasets that can be cached, i.e. those implementing `get_df`."""
+    return [
+        name
+        for name in aiondata.__all__
+        if callable(getattr(getattr(aiondata, name), "get_df", None))
+    ]
+
+
+def _expand(names: List[str]) -> List[str]:
+    expanded = []
+    for name in names:
+        for item in list_datasets() if name.lower() == "all" else [name]:
+            if item not in expanded:
+                expanded.append(item)
+    return expanded
+
+
+def _build(name: str) -> dict:
+    # Runs in a worker process
+    dataset: CachedDataset = resolve_dataset(name)()
+    cache = dataset.get_cache_path()
+    built = not cache.exists()
+    start = time.perf_counter()
+    dataset.ensure_cache()
+    seconds = time.perf_counter() - start
+    if built:
+        dataset.get_derived_path(BUILD_FILE).write_text(
+            json.dumps(
+                {
+                    "seconds": seconds,
+                    "finished": datetime.now(timezone.utc).isoformat(),
+                }
+            )
+        )
+    return {"built": built, "seconds": seconds, "size": cache.stat().st_size}
+
+
+def prefetch(
+    names: List[str], io: int = DEFAULT_IO, cpu: Optional[int] = None
+) -> Dict[str, dict]:
+    """
+    Builds the caches of several datasets concurrently.
+
+    Each dataset is built in a worker process. Datasets marked `CPU_BOUND` (parsed in Python,
+    e.g. BindingDB or UniProt) share `cpu` workers, the others (mostly downloads) share `io`
+    workers. A dataset listing another requested dataset in `DEPENDS_ON` starts after it, so
+    shared caches are built once.
+
+    Args:
+        names (List[str]): The datasets, see `resolve_dataset`, or "all".
+        io (int): The number of concurrent I/O-bound builds.
+        cpu (Optional[int]): The number of concurrent CPU-bound builds. Defaults to
+            `default_processes()`.
+
+    Returns:
+        Dict[str, dict]: For each dataset, whether it was built, the time taken and the cache
+            size in bytes, or the error if it failed.
+    """
+    names = _expand(names)
+    classes = {name: resolve_dataset(name) for name in names}
+    context = multiprocessing.get_context("spawn")
+    pools = {
+        False: ProcessPoolExecutor(max(io, 1), mp_context=context),
+        True: ProcessPoolExecutor(
+            max(cpu or default_processes(), 1), mp_context=context
+        ),
+    }
+    results, running, pending = {}, {}, list(names)
+    try:
+        while pending or running:
+            for name in list(pending):
+                depends = [
+                    other
+                    for other in names
+                    if other != name
+                    and classes[other].__name__ in classes[name].DEPENDS_ON
+                    and other not in results
+                ]
+                if not depends:
+                    pool = pools[bool(classes[name].CPU_BOUND)]
+                    running[pool.submit(_build, name)] = name
+                    pending.remove(name)
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    results[name] = {"error": f"{type(e).__name__}: {e}"}
+                _print_build(name, results[name])
+    finally:
+        for pool in pools.values():
+            pool.shutdown()
+    return results
+
+
+def _print_build(name: str, result: dict) -> None:
+    if "error" in result:
+        print(f"{name}: failed, {result['error']}", flush=True)
+    elif result["built"]:
+        print(
+            f"{name}: built in {result['seconds']:.1f}s, {_size(result['size'])}",
+            flush=True,
+        )
+    else:
+        print(f"{name}: already cached, {_size(result['size'])}", flush=True)
+
+
+def status(names: Optional[List[str]] = None) -> List[dict]:
+    """
+    Reports the cache state of datasets.
+
+    Args:
+        names (Optional[List[str]]): The datasets. Defaults to all public datasets.
+
+    Returns:
+        List[dict]: For each dataset, its cache path, whether it is cached, the size in bytes
+            of the cache and its derived artifacts, the age in seconds and the build time in
+            seconds when it was built by `prefetch`.
+    """
+    report = []
+    for name in _expand(names or ["all"]):
+        dataset = resolve_dataset(name)()
+        cache = dataset.get_cache_path()
+        entry = {"name": name, "path": str(cache), "cached": cache.exists()}
+        if entry["cached"]:
+            files = [cache] + [
+                path for path in cache.parent.glob(f"{cache.stem}.*") if path != cache
+            ]
+            entry["size"] = sum(disk_usage(path) for path in files)
+            entry["age"] = time.time() - cache.stat().st_mtime
+            build = dataset.get_derived_path(BUILD_FILE)
+            if dataset.is_derived_fresh(build):
+                entry["build_seconds"] = json.loads(build.read_text())["seconds"]
+        report.append(entry)
+    return report
+
+
+def _size(size: float) -> str:
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def _age(seconds: float) -> str:
+    for unit, length in [("d", 86400), ("h", 3600), ("m", 60)]:
+        if seconds >= length:
+            return f"{seconds / length:.0f}{unit}"
+    return f"{seconds:.0f}s"
+
+
+def format_status(report: List[dict]) -> str:
+    """Formats a status report as a table."""
+    lines = [f"{'dataset':<28} {'state':<8} {'size':>9} {'age':>6} {'build':>8}"]
+    for entry in report:
+        if not entry["cached"]:
+            lines.append(f"{entry['name']:<28} missing")
+            continue
+        build = entry.get("build_seconds")
+        lines.append(
+            f"{entry['name']:<28} {'cached':<8} {_size(entry['size']):>9} "
+            f"{_age(entry['age']):>6} {f'{build:.1f}s' if build is not None else '-':>8}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="aiondata")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("prefetch", help="Build dataset caches concurrently.")
+    command.add_argument("datasets", nargs="+", help='Dataset names, or "all".')
+    command.add_argument(
+        "--io", type=int, default=DEFAULT_IO, help="Concurrent I/O-bound builds."
+    )
+    command.add_argument(
+        "--cpu", type=int, help="Concurrent CPU-bound builds (AIONDATA_PROCESSES)."
+    )
+
+    command = commands.add_parser("status", help="Show the state of dataset caches.")
+    command.add_argument("datasets", nargs="*", help="Dataset names, defaults to all.")
+    command.add_argument("--json", action="store_true", help="Print JSON.")
+
+    command = commands.add_parser(
+        "gc", help="Evict least recently used cache entries to fit a quota."
+    )
+    command.add_argument("--quota", help="e.g. 50GB, defaults to AIONDATA_CACHE_QUOTA.")
+    command.add_argument(
+        "--dry-run", action="store_true", help="Only list what would be evicted."
+    )
+
+    command = commands.add_parser("serve", help="Serve the cache to peer nodes.")
+    command.add_argument(
+        "--host", default="127.0.0.1", help="e.g. 0.0.0.0 to serve other nodes."
+    )
+    command.add_argument("--port", type=int, default=8765)
+
+    args = parser.parse_args(argv)
+    try:
+        if args.command == "prefetch":
+            results = prefetch(args.datasets, io=args.io, cpu=args.cpu)
+            return 1 if any("error" in result for result in results.values()) else 0
+        if args.command == "status":
+            report = status(args.datasets)
+            print(json.dumps(report, indent=2) if args.json else format_status(report))
+            return 0
+        if args.command == "gc":
+            evicted = gc(args.quota, dry_run=args.dry_run)
+            for entry in evicted:
+                print(f"{entry.kind:<8} {_size(entry.size):>9}  {entry.path}")
+            verb = "Would evict" if args.dry_run else "Evicted"
+            print(
+                f"{verb} {len(evicted)} entries, {_size(sum(e.size for e in evicted))}"
+            )
+            return 0
+    except ValueError as e:
+        print(f"aiondata: {e}", file=sys.stderr)
+        return 2
+
+    from .peer import PeerCacheServer
+
+    server = PeerCacheServer(get_cache_root(), args.host, args.port)
+    print(f"Serving {server.root} at {server.url}", flush=True)
+    server.serve_forever()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+from typing import Tuple
+
+import numpy as np
+import polars as pl
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+from .bloom import splitmix64
+from .datasets import CachedDataset, slugify
+
+CLUSTER_COLUMN = "cluster"
+BITS_PER_RESIDUE = 5
+
+
+def kmer_codes(sequences: pl.Series, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Encodes every k-mer of every sequence as an integer, vectorized over all sequences at once.
+
+    Residues are encoded with 5 bits (letters map to 1-26, anything else to 31), so `k` may be at
+    most 12.
+
+    Args:
+        sequences (pl.Series): The sequences.
+        k (int): The k-mer length.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The k-mer codes (uint64) in sequence order, and the index of
+            the sequence each k-mer belongs to.
+    """
+    if not 1 <= k <= 64 // BITS_PER_RESIDUE:
+        raise ValueError(f"k must be between 1 and {64 // BITS_PER_RESIDUE}.")
+    sequences = sequences.fill_null("")
+    lengths = sequences.str.len_bytes().to_numpy().astype(np.int64)
+    residues = np.frombuffer("".join(sequences.to_list()).upper().encode(), np.uint8)
+    table = np.full(256, 31, dtype=np.uint64)
+    table[ord("A") : ord("Z") + 1] = np.arange(1, 27, dtype=np.uint64)
+    residues = table[residues]
+
+    num_positions = max(len(residues) - k + 1, 0)
+    codes = np.zeros(num_positions, dtype=np.uint64)
+    for j in range(k):
+        codes = (codes << np.uint64(BITS_PER_RESIDUE)) | residues[j : j + num_positions]
+
+    ends = np.cumsum(lengths)
+    owners = np.repeat(np.arange(len(lengths)), lengths)[:num_positions]
+    valid = np.arange(num_positions) + k <= ends[owners]
+    return codes[valid], owners[valid]
+
+
+def minhash_signatures(
+    sequences: pl.Series, k: int = 5, num_perm: int = 128, seed: int = 0
+) -> np.ndarray:
+    """
+    Computes MinHash signatures of the k-mer sets of protein sequences.
+
+    This uses one-permutation hashing: every k-mer is hashed once, the hash picks one of
+    `num_perm` bins and the per-sequence minimum of each bin forms the signature, computed with
+    `np.minimum.at`. Empty bins are filled from the next non-empty bin (rotation densification),
+    so the fraction of equal positions estimates the Jaccard similarity as with classic MinHash,
+    at the cost of a single hash per k-mer.
+
+    Args:
+        sequences (pl.Series): The sequences.
+        k (int): The k-mer length.
+        num_perm (int): The signature length.
+        seed (int): The random seed of the hash function.
+
+    Returns:
+        np.ndarray: A (num_sequences x num_perm) uint32 array. Sequences shorter than `k` get the
+            maximum value everywhere.
+    """
+    empty = np.iinfo(np.uint32).max
+    codes, owners = kmer_codes(sequences, k)
+    salt = np.random.default_rng(seed).integers(0, 2**63, dtype=np.uint64)
+    hashes = splitmix64(codes ^ salt)
+    bins = (hashes % np.uint64(num_perm)).astype(np.int64)
+    values = (hashes >> np.uint64(32)).astype(np.uint32)
+    # Leave the maximum value free to mark empty bins
+    values = np.minimum(values, empty - 1)
+
+    signatures = np.full((len(sequences), num_perm), empty, dtype=np.uint32)
+    np.minimum.at(signatures.ravel(), owners * num_perm + bins, values)
+
+    # Rotation densification: take the value of the next non-empty bin, wrapping around
+    doubled = np.concatenate([signatures, signatures], axis=1)
+    positions = np.where(doubled != empty, np.arange(2 * num_perm), 2 * num_perm)
+    nearest = np.minimum.accumulate(positions[:, ::-1], axis=1)[:, ::-1][:, :num_perm]
+    has_kmers = nearest[:, 0] < 2 * num_perm
+    rows = np.arange(len(sequences))[has_kmers, None]
+    signatures[has_kmers] = doubled[rows, nearest[has_kmers]]
+    return signatures
+
+
+def lsh_bands(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    Picks the number of LSH bands and rows per band whose S-curve threshold is closest to the
+    target Jaccard similarity.
+
+    Args:
+        num_perm (int): The signature length.
+        threshold (float): The target Jaccard similarity.
+
+    Returns:
+        Tuple[int, int]: The number of bands and the number of rows per band.
+    """
+    candidates = [
+        (bands, num_perm // bands)
+        for bands in range(1, num_perm + 1)
+        if num_perm % bands == 0
+    ]
+    return min(
+        candidates,
+        key=lambda br: abs((1 / br[0]) ** (1 / br[1]) - threshold),
+    )
+
+
+def cluster_signatures(signatures: np.ndarray, threshold: float = 0.5) -> np.ndarray:
+    """
+    Clusters MinHash signatures by single linkage over LSH candidate pairs.
+
+    Signatures are split into bands; sequences sharing all rows of a band are candidates. Each
+    candidate is linked to the first member of its bucket if their estimated Jaccard similarity
+    reaches `threshold`, and clusters are the connected components of the resulting graph.
+
+    Args:
+        signatures (np.ndarray): The (num_sequences x num_perm) MinHash signatures.
+        threshold (float): The minimal estimated Jaccard similarity of linked sequences.
+
+    Returns:
+        np.ndarray: The cluster of each sequence, numbered by first appearance.
+    """
+    n, num_perm = signatures.shape
+    bands, rows = lsh_bands(num_perm, threshold)
+    sources, targets = [], []
+    for band in range(bands):
+        block = np.ascontiguousarray(signatures[:, band * rows : (band + 1) * rows])
+        _, buckets = np.unique(
+            block.view(np.dtype((np.void, block.dtype.itemsize * rows))).ravel(),
+            return_inverse=True,
+        )
+        order = np.argsort(buckets, kind="stable")
+        sorted_buckets = buckets[order]
+        heads = np.r_[True, sorted_buckets[1:] != sorted_buckets[:-1]]
+        leaders = order[np.maximum.accumulate(np.where(heads, np.arange(n), 0))]
+        linked = ~heads
+        sources.append(leaders[linked])
+        targets.append(order[linked])
+
+    sources = np.concatenate(sources) if sources else np.empty(0, np.int64)
+    targets = np.concatenate(targets) if targets else np.empty(0, np.int64)
+    similar = (signatures[sources] == signatures[targets]).mean(axis=1) >= threshold
+    # Sequences shorter than k have no k-mers and are only similar to themselves
+    similar &= signatures[sources, 0] != np.iinfo(np.uint32).max
+    graph = coo_matrix(
+        (np.ones(similar.sum(), dtype=np.int8), (sources[similar], targets[similar])),
+        shape=(n, n),
+    )
+    _, labels = connected_components(graph, directed=False)
+    # Renumber clusters by first appearance so results are stable across runs
+    _, first = np.unique(labels, return_index=True)
+    rank = np.empty(len(first), dtype=np.int64)
+    rank[np.argsort(first)] = np.arange(len(first))
+    return rank[labels]
+
+
+def cluster_sequences(
+    sequences: pl.Series,
+    k: int = 5,
+    num_perm: int = 128,
+    threshold: float = 0.5,
+    seed: int = 0,
+) -> pl.DataFrame:
+    """
+    Clusters the distinct sequences of a series by MinHash similarity of their k-mer sets.
+
+    Args:
+        sequences (pl.Series): The sequences, possibly with duplicates.
+        k (int): The k-mer length.
+        num_perm (int): The number of MinHash hash functions.
+        threshold (float): The minimal estimated k-mer Jaccard similarity of linked sequences.
+        seed (int): The random seed of the hash functions.
+
+    Returns:
+        pl.DataFrame: One row per distinct non-null sequence, with the sequence and its cluster.
+    """
+    distinct = sequences.drop_nulls().unique(maintain_order=True)
+    signatures = minhash_signatures(distinct, k=k, num_perm=num_perm, seed=seed)
+    return pl.DataFrame(
+        {
+            sequences.name: distinct,
+            CLUSTER_COLUMN: cluster_signatures(signatures, threshold),
+        }
+    )
+
+
+def get_sequence_clusters(
+    dataset: CachedDataset,
+    column: str = "Sequence",
+    k: int = 5,
+    num_perm: int = 128,
+    threshold: float = 0.5,
+    seed: int = 0,
+) -> pl.Series:
+    """
+    Returns the sequence cluster of every row of a dataset.
+
+    The per-sequence cluster table is cached next to the dataset cache for each parameter set.
+
+    Args:
+        dataset (CachedDataset): The dataset.
+        column (str): The column holding the protein sequences.
+        k (int): The k-mer length.
+        num_perm (int): The number of MinHash hash functions.
+        threshold (float): The minimal estimated k-mer Jaccard similarity of linked sequences.
+        seed (int): The random seed of the hash functions.
+
+    Returns:
+        pl.Series: The cluster of each row (null for rows without a sequence).
+    """
+    path = dataset.get_derived_path(
+        f"{slugify(column)}.clusters.k{k}-p{num_perm}-t{threshold:g}-s{seed}.parquet"
+    )
+    sequences = (
+        pl.scan_parquet(dataset.ensure_cache())
+        .select(column)
+        .collect()
+        .get_column(column)
+    )
+    if dataset.is_derived_fresh(path):
+        clusters = pl.read_parquet(path)
+    else:
+        clusters = cluster_sequences(sequences, k, num_perm, threshold, seed)
+        clusters.write_parquet(path)
+
+    return (
+        sequences.to_frame()
+        .with_row_index("index")
+        .join(clusters, on=column, how="left")
+        .sort("index")
+        .get_column(CLUSTER_COLUMN)
+    )
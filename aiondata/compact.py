@@ -0,0 +1,117 @@
+"""
+Compact in-memory representations of cached datasets.
+
+Heavily repeated strings are stored as Categorical, so each distinct value is kept once and rows
+hold small integer codes. Floats holding whole numbers (e.g. BindingDB IDs, stored as Float64
+upstream) become the smallest integer type that holds them, integers are narrowed the same way,
+and floats that survive a round trip through Float32 are stored as Float32. Every conversion is
+exact: values read back compare equal to the originals.
+"""
+
+from typing import Optional
+
+import polars as pl
+
+# String columns with at most this many distinct values per row become Categorical
+DEFAULT_MAX_RATIO = 0.5
+INTEGER_TYPES = [pl.Int8, pl.Int16, pl.Int32, pl.Int64]
+INTEGER_RANGES = {
+    pl.Int8: (-(2**7), 2**7 - 1),
+    pl.Int16: (-(2**15), 2**15 - 1),
+    pl.Int32: (-(2**31), 2**31 - 1),
+    pl.Int64: (-(2**63), 2**63 - 1),
+}
+
+
+def _smallest_integer(series: pl.Series) -> Optional[pl.DataType]:
+    low, high = series.min(), series.max()
+    for dtype in INTEGER_TYPES:
+        if INTEGER_RANGES[dtype][0] <= low and high <= INTEGER_RANGES[dtype][1]:
+            return dtype
+    return None
+
+
+def _compact_dtype(series: pl.Series, max_ratio: float) -> Optional[pl.DataType]:
+    values = series.drop_nulls()
+    if values.len() == 0:
+        return None
+    if series.dtype == pl.Utf8:
+        repeated = values.n_unique() <= max(1, max_ratio * series.len())
+        return pl.Categorical if repeated else None
+    if series.dtype.is_integer():
+        dtype = _smallest_integer(values)
+        return dtype if dtype != series.dtype else None
+    if series.dtype.is_float():
+        if values.is_nan().any() or values.is_infinite().any():
+            return None
+        if (values == values.round()).all():
+            return _smallest_integer(values)
+        if (
+            series.dtype == pl.Float64
+            and (values.cast(pl.Float32).cast(pl.Float64) == values).all()
+        ):
+            return pl.Float32
+    return None
+
+
+def compact(df: pl.DataFrame, max_ratio: float = DEFAULT_MAX_RATIO) -> pl.DataFrame:
+    """
+    Converts the columns of a frame to their most compact exact representation.
+
+    Conversions that would not reduce the estimated size of a column (e.g. Categorical for a
+    short, mostly null column) are skipped.
+
+    Args:
+        df (pl.DataFrame): The frame.
+        max_ratio (float): String columns whose number of distinct values is at most this
+            fraction of the rows become Categorical.
+
+    Returns:
+        pl.DataFrame: The compacted frame.
+    """
+    dtypes = {
+        name: dtype
+        for name, series in df.to_dict().items()
+        if (dtype := _compact_dtype(series, max_ratio)) is not None
+    }
+    compacted = df.with_columns(
+        pl.col(name).cast(dtype) for name, dtype in dtypes.items()
+    )
+    return df.with_columns(
+        compacted.get_column(name)
+        for name in dtypes
+        if compacted.get_column(name).estimated_size()
+        < df.get_column(name).estimated_size()
+    )
+
+
+def savings(before: pl.DataFrame, after: pl.DataFrame) -> pl.DataFrame:
+    """
+    Reports the estimated memory used by each column before and after compaction.
+
+    Args:
+        before (pl.DataFrame): The original frame.
+        after (pl.DataFrame): The compacted frame, with the same columns.
+
+    Returns:
+        pl.DataFrame: The "column", its "dtype" and "compact_dtype", its "bytes" and
+            "compact_bytes", and the "saved" bytes, largest savings first.
+    """
+    return (
+        pl.DataFrame(
+            [
+                (
+                    name,
+                    str(before.schema[name]),
+                    str(after.schema[name]),
+                    before[name].estimated_size(),
+                    after[name].estimated_size(),
+                )
+                for name in before.columns
+            ],
+            schema=["column", "dtype", "compact_dtype", "bytes", "compact_bytes"],
+            orient="row",
+        )
+        .with_columns(saved=pl.col("bytes") - pl.col("compact_bytes"))
+        .sort("saved", descending=True, maintain_order=True)
+    )
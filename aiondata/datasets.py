@@ -1,11 +1,87 @@
+import asyncio
 import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
 import polars as pl
 
+from . import metrics
+from .compact import savings
+from .frames import get_registry
+from .layout import Layout
+from .peer import fetch_from_peer
+from .quota import enforce_quota, hold, mark_used
+from .shared import SharedFrame
+from .streaming import iter_parquet_batches
+
+
+COMPACTION_FILE = "compaction.parquet"
+
+
+def get_cache_root() -> Path:
+    """
+    Returns the root of the local cache.
+
+    The root is determined by the environment variable AIONDATA_CACHE.
+    If the environment variable is not set, the default cache path is "~/.aiondata".
+
+    Returns:
+        Path: The root cache directory.
+    """
+    return Path(os.environ.get("AIONDATA_CACHE", "~/.aiondata")).expanduser()
+
+
+_prefetch_executor: Optional[ThreadPoolExecutor] = None
+_prefetching: Dict[Path, Future] = {}
+_prefetch_lock = threading.Lock()
+
+
+def get_prefetch_executor() -> ThreadPoolExecutor:
+    """
+    Returns the process-wide executor building caches in the background.
+
+    Its number of threads is determined by the environment variable AIONDATA_PREFETCH_THREADS
+    and defaults to 8. Downloads, decompression and Parquet I/O release the GIL, so the builds
+    of several datasets overlap.
+
+    Returns:
+        ThreadPoolExecutor: The executor.
+    """
+    global _prefetch_executor
+    with _prefetch_lock:
+        if _prefetch_executor is None:
+            _prefetch_executor = ThreadPoolExecutor(
+                max_workers=int(os.environ.get("AIONDATA_PREFETCH_THREADS", 8)),
+                thread_name_prefix="aiondata-prefetch",
+            )
+        return _prefetch_executor
+
+
+def slugify(name: str) -> str:
+    """
+    Turns a column or parameter name into a string that is safe to use in file names.
+
+    Args:
+        name (str): The name, e.g. "Ligand InChI Key".
+
+    Returns:
+        str: The lowercased name with non-alphanumeric characters replaced, e.g. "ligand_inchi_key".
+    """
+    return "".join(c if c.isalnum() else "_" for c in name.lower())
+
 
 class CachedDataset:
     """A base class for datasets that are cached locally."""
 
+    # Whether building the cache is dominated by Python-level parsing rather than downloads,
+    # used to schedule concurrent builds (see `aiondata prefetch`)
+    CPU_BOUND = False
+    # The class names of datasets whose caches are built as part of this one
+    DEPENDS_ON = ()
+    # How the Parquet cache is sorted, split in row groups and compressed
+    LAYOUT = Layout()
+
     def get_cache_path(self) -> Path:
         """
         Returns the cache path for the dataset.
@@ -18,25 +94,295 @@ class CachedDataset:
         Returns:
             Path: The cache path for the dataset.
         """
-        cache = Path(os.environ.get("AIONDATA_CACHE", "~/.aiondata")).expanduser()
+        cache = get_cache_root()
         if hasattr(self, "COLLECTION"):
             cache = cache / self.COLLECTION
         cache.mkdir(parents=True, exist_ok=True)
-        return cache / f"{self.__class__.__name__.lower()}.parquet"
+        return cache / f"{self.get_cache_name()}.parquet"
+
+    def get_cache_name(self) -> str:
+        """
+        Returns the file name (without extension) of the dataset cache.
+
+        Datasets whose cached content depends on constructor options override this so that each
+        variant gets its own cache file.
+
+        Returns:
+            str: The lowercased class name.
+        """
+        return self.__class__.__name__.lower()
+
+    def get_smiles_column(self, column: Optional[str] = None) -> str:
+        """
+        Resolves the column holding the SMILES strings of the dataset.
+
+        Args:
+            column (Optional[str]): An explicit column name, returned as is if given.
+
+        Returns:
+            str: The column name, defaulting to the dataset's SMILES_COLUMN.
+
+        Raises:
+            ValueError: If no column is given and the dataset does not declare a SMILES_COLUMN.
+        """
+        column = column or getattr(self, "SMILES_COLUMN", None)
+        if column is None:
+            raise ValueError(
+                f"{self.__class__.__name__} has no SMILES_COLUMN, pass the column explicitly."
+            )
+        return column
+
+    def get_derived_path(self, name: str) -> Path:
+        """
+        Returns the path of an artifact derived from the cached dataset.
+
+        Derived artifacts (filters, splits, extra columns, ...) live next to the Parquet cache
+        and share its stem, e.g. "bindingdb.ligand_inchi_key.bloom".
+
+        Args:
+            name (str): The name of the derived artifact, including any extension.
+
+        Returns:
+            Path: The path of the derived artifact.
+        """
+        cache = self.get_cache_path()
+        path = cache.with_name(f"{cache.stem}.{name}")
+        mark_used(path)
+        return path
+
+    def is_derived_fresh(self, path: Path) -> bool:
+        """
+        Checks whether a derived artifact exists and is not older than the dataset cache.
+
+        Args:
+            path (Path): The path of the derived artifact.
+
+        Returns:
+            bool: True if the artifact can be reused, False if it must be rebuilt.
+        """
+        cache = self.get_cache_path()
+        if not path.exists():
+            return False
+        return not cache.exists() or path.stat().st_mtime >= cache.stat().st_mtime
+
+    def get_cache_metadata(self) -> Dict[str, str]:
+        """
+        Returns the metadata stored in the footer of a new cache, e.g. the upstream release.
+
+        Returns:
+            Dict[str, str]: The metadata, empty by default.
+        """
+        return {}
+
+    def read_cache_metadata(self) -> Dict[str, str]:
+        """
+        Reads the metadata stored in the footer of the cache, building it if needed.
+
+        Returns:
+            Dict[str, str]: The metadata written with the cache, see `get_cache_metadata`.
+        """
+        metadata = pl.read_parquet_metadata(self.ensure_cache())
+        return {key: value for key, value in metadata.items() if key != "ARROW:schema"}
+
+    def get_compaction_report(self) -> pl.DataFrame:
+        """
+        Returns the memory saved by each column of a compact cache (see `Layout.compact`).
+
+        Returns:
+            pl.DataFrame: The report written with the cache, see `aiondata.compact.savings`.
+
+        Raises:
+            ValueError: If the dataset is not compacted, or its cache was not built locally.
+        """
+        path = self.get_derived_path(COMPACTION_FILE)
+        if not self.LAYOUT.compact or not self.is_derived_fresh(path):
+            raise ValueError(f"No compaction report for {self.get_cache_name()}.")
+        return pl.read_parquet(path)
+
+    def get_dependents(self) -> List["CachedDataset"]:
+        """
+        Returns the public datasets built from this one, i.e. listing it in `DEPENDS_ON`.
+
+        Returns:
+            List[CachedDataset]: An instance of each dependent dataset, with default parameters.
+        """
+        import aiondata
+
+        names = {cls.__name__ for cls in type(self).__mro__}
+        dependents = []
+        for name in aiondata.__all__:
+            cls = getattr(aiondata, name)
+            if names & set(getattr(cls, "DEPENDS_ON", ())):
+                dependents.append(cls())
+        return dependents
+
+    def ensure_cache(self) -> Path:
+        """
+        Builds the Parquet cache if it does not exist yet.
+
+        Returns:
+            Path: The cache path for the dataset.
+        """
+        cache = self.get_cache_path()
+        if not cache.exists() and not self.fetch_cache(cache):
+            self.to_df()
+        return cache
+
+    @staticmethod
+    def fetch_cache(cache: Path) -> bool:
+        """
+        Fetches a Parquet cache from the peer cache server set with AIONDATA_PEER, if any.
+
+        Args:
+            cache (Path): The cache path for the dataset.
+
+        Returns:
+            bool: True if the cache was fetched, False if it must be built from upstream.
+        """
+        return fetch_from_peer(cache, get_cache_root())
+
+    def prefetch(self) -> Future:
+        """
+        Builds the Parquet cache in the background.
+
+        Prefetching a dataset whose cache is already being built returns the pending future,
+        so the cache is built once. Wait on several datasets together with
+        `concurrent.futures.wait([a.prefetch(), b.prefetch()])`.
+
+        Returns:
+            Future: Resolves to the cache path, or raises the error of the build.
+        """
+        cache = self.get_cache_path()
+        executor = get_prefetch_executor()
+        with _prefetch_lock:
+            future = _prefetching.get(cache)
+            if future is None:
+                future = _prefetching[cache] = executor.submit(self.ensure_cache)
+                future.add_done_callback(lambda _: _prefetching.pop(cache, None))
+        return future
+
+    def scan(self) -> pl.LazyFrame:
+        """
+        Lazily scans the Parquet cache, building it if needed.
+
+        Returns:
+            pl.LazyFrame: The dataset as a Polars LazyFrame.
+        """
+        return pl.scan_parquet(self.ensure_cache())
+
+    async def ato_df(self) -> pl.DataFrame:
+        """
+        Converts the dataset to a Polars DataFrame without blocking the event loop.
+
+        The cache is built with `prefetch` and read on a worker thread, so several datasets
+        load concurrently with `asyncio.gather(a.ato_df(), b.ato_df())`.
+
+        Returns:
+            pl.DataFrame: The dataset as a Polars DataFrame.
+        """
+        await asyncio.wrap_future(self.prefetch())
+        return await asyncio.to_thread(self.to_df)
+
+    async def ascan(self) -> pl.LazyFrame:
+        """
+        Lazily scans the Parquet cache, building it in the background if needed.
+
+        Returns:
+            pl.LazyFrame: The dataset as a Polars LazyFrame.
+        """
+        return pl.scan_parquet(await asyncio.wrap_future(self.prefetch()))
+
+    def iter_batches(
+        self,
+        batch_size: int = 1024,
+        columns: Optional[List[str]] = None,
+        shuffle: bool = True,
+        seed: int = 0,
+        epoch: int = 0,
+        **kwargs,
+    ) -> Iterator[Union[pl.DataFrame, dict]]:
+        """
+        Streams shuffled batches from the Parquet cache without loading the dataset in memory.
+
+        Row groups are read in a random order on background threads and mixed in a bounded
+        shuffle buffer. Inside data loader workers or distributed ranks, each shard reads a
+        disjoint part of the cache. See `iter_parquet_batches` for the remaining options.
+
+        Args:
+            batch_size (int): The number of rows per batch.
+            columns (Optional[List[str]]): The columns to read. Defaults to all.
+            shuffle (bool): Whether to shuffle the rows.
+            seed (int): The random seed, which must be the same on every shard.
+            epoch (int): The epoch, so each epoch has a different order.
+
+        Returns:
+            Iterator: The batches, as Polars DataFrames unless another `format` is requested.
+        """
+        return iter_parquet_batches(
+            self.ensure_cache(),
+            batch_size=batch_size,
+            columns=columns,
+            shuffle=shuffle,
+            seed=seed,
+            epoch=epoch,
+            **kwargs,
+        )
+
+    def share(self, columns: Optional[List[str]] = None) -> SharedFrame:
+        """
+        Publishes the cached dataset in shared memory for zero-copy access from other processes.
+
+        Pass the returned handle to worker processes and call `attach()` there to get a
+        read-only DataFrame backed by the shared buffers.
+
+        Args:
+            columns (Optional[List[str]]): The columns to share. Defaults to all.
+
+        Returns:
+            SharedFrame: The handle, which removes the shared copy when closed by this process.
+        """
+        cache = self.ensure_cache()
+        with hold(cache):
+            return SharedFrame.publish(cache, self.get_cache_name(), columns)
 
     def to_df(self) -> pl.DataFrame:
         """
         Converts the dataset to a Polars DataFrame.
 
+        The Parquet cache is used if it exists locally or on the peer cache server, otherwise
+        the dataset is built from upstream and cached with the dataset's `LAYOUT`, in the same
+        row order as when it is read back. Loaded frames are kept in memory by the frame
+        registry (see `aiondata.frames`) until the cache changes.
+
         Returns:
             pl.DataFrame: The dataset as a Polars DataFrame.
         """
         cache = self.get_cache_path()
-        if cache.exists():
-            return pl.read_parquet(cache)
+        name = self.get_cache_name()
+        registry = get_registry()
+        key = (type(self), cache)
+        if cache.exists() or self.fetch_cache(cache):
+            mark_used(cache)
+            df = registry.get(key, cache)
+            if df is None:
+                with hold(cache), metrics.span(f"{name}.read_cache"):
+                    df = pl.read_parquet(cache)
+                registry.put(key, cache, df)
+            return df
         else:
-            df = self.get_df()
-            df.write_parquet(cache)
+            with metrics.span(f"{name}.build"):
+                df = self.get_df()
+            with metrics.span(f"{name}.write_parquet"):
+                laid_out = self.LAYOUT.apply(df)
+                self.LAYOUT.write(laid_out, cache, self.get_cache_metadata())
+            metrics.count(f"{name}.rows", len(df))
+            if self.LAYOUT.compact:
+                report = savings(df, laid_out)
+                report.write_parquet(self.get_derived_path(COMPACTION_FILE))
+                metrics.count(f"{name}.compact_saved_bytes", report["saved"].sum())
+            df = laid_out
+            with hold(cache):
+                enforce_quota()
             return df
 
 
@@ -71,6 +417,8 @@ class ParquetDataset(CachedDataset):
 class GeneratedDataset(CachedDataset):
     """A base class for datasets that are generated on-the-fly."""
 
+    CPU_BOUND = True
+
     def get_df(self) -> pl.DataFrame:
         if hasattr(self, "SCHEMA"):
             return pl.DataFrame(self.to_generator(), schema=self.SCHEMA, strict=False)
@@ -0,0 +1,131 @@
+"""
+A process-wide, memory-budgeted cache of the DataFrames loaded from dataset caches.
+
+`CachedDataset.to_df` keeps the frames it reads here, so repeated lookups (e.g. one per
+Weizmann study, or BindingDB under each BindingAffinity) don't re-read the Parquet file.
+Entries are keyed by dataset class and cache path, which encodes the dataset parameters, and
+are dropped when the file on disk changes. Least recently used frames are evicted to stay
+within the budget, set with the environment variable AIONDATA_FRAME_BUDGET (in MB, default
+1024, 0 disables the registry) or `get_registry().budget`.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Hashable, NamedTuple, Optional
+
+import polars as pl
+
+from . import metrics
+
+DEFAULT_BUDGET_MB = 1024
+
+
+class _Entry(NamedTuple):
+    version: tuple
+    df: pl.DataFrame
+    size: int
+
+
+class FrameRegistry:
+    """An LRU cache of DataFrames read from files, bounded by their estimated size in memory."""
+
+    def __init__(self, budget: int):
+        """
+        Initializes an empty registry.
+
+        Args:
+            budget (int): The maximal total estimated size of the kept frames, in bytes.
+        """
+        self.budget = budget
+        self.size = 0
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _version(path: Path) -> Optional[tuple]:
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, key: Hashable, path: Path) -> Optional[pl.DataFrame]:
+        """
+        Returns the frame kept for a key, if the file it was read from is unchanged.
+
+        Args:
+            key (Hashable): The key, e.g. the dataset class and cache path.
+            path (Path): The file the frame was read from.
+
+        Returns:
+            Optional[pl.DataFrame]: A copy of the frame sharing its memory, or None.
+        """
+        version = self._version(path)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.version != version:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+        metrics.count("frames.hits")
+        # A clone is cheap and keeps in-place changes of the caller out of the registry
+        return entry.df.clone()
+
+    def put(self, key: Hashable, path: Path, df: pl.DataFrame) -> None:
+        """
+        Keeps a frame read from a file, evicting the least recently used frames if needed.
+
+        Frames larger than the budget, or whose file does not exist, are not kept.
+
+        Args:
+            key (Hashable): The key, e.g. the dataset class and cache path.
+            path (Path): The file the frame was read from.
+            df (pl.DataFrame): The frame.
+        """
+        version = self._version(path)
+        size = df.estimated_size()
+        if version is None or size > self.budget:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(version, df.clone(), size)
+            self.size += size
+            while self.size > self.budget:
+                self._remove(next(iter(self._entries)))
+                metrics.count("frames.evictions")
+
+    def _remove(self, key: Hashable) -> None:
+        self.size -= self._entries.pop(key).size
+
+    def clear(self) -> None:
+        """Drops every frame."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+_registry: Optional[FrameRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> FrameRegistry:
+    """
+    Returns the process-wide frame registry.
+
+    Returns:
+        FrameRegistry: The registry, with the budget read from AIONDATA_FRAME_BUDGET.
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            budget = float(os.environ.get("AIONDATA_FRAME_BUDGET", DEFAULT_BUDGET_MB))
+            _registry = FrameRegistry(int(budget * 2**20))
+        return _registry
@@ -0,0 +1,227 @@
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import polars as pl
+from rdkit import Chem, RDLogger
+from tqdm.auto import tqdm
+
+from .datasets import CachedDataset, slugify
+from .packed import (
+    META_FILE,
+    PackedArrayWriter,
+    load_packed,
+    offsets_from_lengths,
+    ragged_arange,
+)
+from .parallel import parallel_imap
+
+# Bump when the featurization changes so stale graph caches are rebuilt
+GRAPH_VERSION = 1
+
+ATOM_FEATURES = (
+    "atomic_num",
+    "degree",
+    "formal_charge",
+    "total_num_hs",
+    "hybridization",
+    "is_aromatic",
+    "is_in_ring",
+    "chiral_tag",
+)
+BOND_FEATURES = ("bond_type", "is_conjugated", "is_in_ring", "stereo")
+
+
+def featurize_mol(mol: Chem.Mol) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Converts a molecule to integer-coded graph arrays.
+
+    Features are categorical codes (not one-hot encoded) in the order of ATOM_FEATURES and
+    BOND_FEATURES. Every bond yields two directed edges.
+
+    Args:
+        mol (Chem.Mol): The molecule.
+
+    Returns:
+        Tuple: The atom features (n_atoms x 8, int16), the directed edges as (source, target) rows
+            (n_edges x 2, int32, local atom indices) and the bond features (n_edges x 4, int8).
+    """
+    atoms = np.array(
+        [
+            (
+                atom.GetAtomicNum(),
+                atom.GetDegree(),
+                atom.GetFormalCharge(),
+                atom.GetTotalNumHs(),
+                int(atom.GetHybridization()),
+                atom.GetIsAromatic(),
+                atom.IsInRing(),
+                int(atom.GetChiralTag()),
+            )
+            for atom in mol.GetAtoms()
+        ],
+        dtype=np.int16,
+    ).reshape(-1, len(ATOM_FEATURES))
+
+    edges, bonds = [], []
+    for bond in mol.GetBonds():
+        begin, end = bond.GetBeginAtomIdx(), bond.GetEndAtomIdx()
+        features = (
+            int(bond.GetBondTypeAsDouble() * 2),
+            bond.GetIsConjugated(),
+            bond.IsInRing(),
+            int(bond.GetStereo()),
+        )
+        edges += [(begin, end), (end, begin)]
+        bonds += [features, features]
+    edges = np.array(edges, dtype=np.int32).reshape(-1, 2)
+    bonds = np.array(bonds, dtype=np.int8).reshape(-1, len(BOND_FEATURES))
+    return atoms, edges, bonds
+
+
+def _featurize_chunk(chunk: List[Optional[str]]) -> Dict[str, np.ndarray]:
+    RDLogger.DisableLog("rdApp.*")
+    atoms, edges, bonds, num_atoms, num_edges = [], [], [], [], []
+    for smiles in chunk:
+        mol = Chem.MolFromSmiles(smiles) if smiles else None
+        if mol is None:
+            num_atoms.append(-1)
+            num_edges.append(0)
+            continue
+        mol_atoms, mol_edges, mol_bonds = featurize_mol(mol)
+        atoms.append(mol_atoms)
+        edges.append(mol_edges)
+        bonds.append(mol_bonds)
+        num_atoms.append(len(mol_atoms))
+        num_edges.append(len(mol_edges))
+    return {
+        "atom_features": np.concatenate(atoms) if atoms else np.empty((0, 8)),
+        "edges": np.concatenate(edges) if edges else np.empty((0, 2)),
+        "bond_features": np.concatenate(bonds) if bonds else np.empty((0, 4)),
+        "num_atoms": np.array(num_atoms, dtype=np.int64),
+        "num_edges": np.array(num_edges, dtype=np.int64),
+    }
+
+
+class MolecularGraphs:
+    """
+    Packed, memory-mapped molecular graphs for a dataset.
+
+    All graphs are concatenated: `atom_features` holds the atoms of every molecule back to back
+    and `atom_offsets[i]:atom_offsets[i + 1]` selects the atoms of molecule i (likewise for edges).
+    Edges use local atom indices. Molecules whose SMILES could not be parsed have no atoms and are
+    flagged in `valid`.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.atom_features = arrays["atom_features"]
+        self.edges = arrays["edges"]
+        self.bond_features = arrays["bond_features"]
+        num_atoms = np.asarray(arrays["num_atoms"])
+        self.valid = num_atoms >= 0
+        self.atom_offsets = offsets_from_lengths(np.maximum(num_atoms, 0))
+        self.edge_offsets = offsets_from_lengths(arrays["num_edges"])
+
+    def __len__(self) -> int:
+        return len(self.valid)
+
+    def collate(
+        self, indices: Union[Sequence[int], np.ndarray]
+    ) -> Dict[str, np.ndarray]:
+        """
+        Assembles a batch of graphs into one disconnected graph, without per-molecule Python work.
+
+        Args:
+            indices: The row indices of the molecules in the batch.
+
+        Returns:
+            Dict[str, np.ndarray]: "atom_features", "edge_index" (2 x n_edges, indices into the
+                batch's atoms), "bond_features", "batch" (the molecule of each atom, 0-based within
+                the batch) and "atom_offsets" (n_molecules + 1).
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        atom_starts = self.atom_offsets[indices]
+        num_atoms = self.atom_offsets[indices + 1] - atom_starts
+        edge_starts = self.edge_offsets[indices]
+        num_edges = self.edge_offsets[indices + 1] - edge_starts
+
+        atom_rows = ragged_arange(atom_starts, num_atoms)
+        edge_rows = ragged_arange(edge_starts, num_edges)
+        batch_offsets = offsets_from_lengths(num_atoms)
+        edge_index = np.asarray(self.edges[edge_rows], dtype=np.int64).T + np.repeat(
+            batch_offsets[:-1], num_edges
+        )
+        return {
+            "atom_features": np.asarray(self.atom_features[atom_rows]),
+            "edge_index": edge_index,
+            "bond_features": np.asarray(self.bond_features[edge_rows]),
+            "batch": np.repeat(np.arange(len(indices)), num_atoms),
+            "atom_offsets": batch_offsets,
+        }
+
+
+def get_graphs(
+    dataset: CachedDataset,
+    column: Optional[str] = None,
+    chunk_size: int = 1000,
+    processes: Optional[int] = None,
+) -> MolecularGraphs:
+    """
+    Returns packed molecular graphs for every row of a dataset, featurizing them if needed.
+
+    SMILES are featurized in chunks on a process pool and streamed to memory-mappable files next
+    to the dataset cache, so later runs only map the files.
+
+    Args:
+        dataset (CachedDataset): The dataset.
+        column (Optional[str]): The SMILES column. Defaults to the dataset's SMILES_COLUMN.
+        chunk_size (int): The number of molecules sent to a worker at a time.
+        processes (Optional[int]): The number of worker processes.
+
+    Returns:
+        MolecularGraphs: The graphs, aligned with the dataset rows.
+
+    Raises:
+        ValueError: If no SMILES column is given and the dataset does not declare one.
+    """
+    column = dataset.get_smiles_column(column)
+    path = dataset.get_derived_path(f"{slugify(column)}.graphs.v{GRAPH_VERSION}")
+    if dataset.is_derived_fresh(path / META_FILE):
+        return MolecularGraphs(load_packed(path)[0])
+
+    smiles = (
+        pl.scan_parquet(dataset.ensure_cache())
+        .select(column)
+        .collect()
+        .get_column(column)
+    )
+    chunks = (
+        smiles.slice(offset, chunk_size).to_list()
+        for offset in range(0, smiles.len(), chunk_size)
+    )
+    writer = PackedArrayWriter(
+        path,
+        {
+            "atom_features": ("<i2", (len(ATOM_FEATURES),)),
+            "edges": ("<i4", (2,)),
+            "bond_features": ("i1", (len(BOND_FEATURES),)),
+            "num_atoms": ("<i8", ()),
+            "num_edges": ("<i8", ()),
+        },
+    )
+    try:
+        for arrays in tqdm(
+            parallel_imap(_featurize_chunk, chunks, processes),
+            total=-(-smiles.len() // chunk_size),
+            desc="Featurizing graphs",
+            unit=" chunks",
+        ):
+            writer.append(**arrays)
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close(
+        column=column,
+        atom_features=list(ATOM_FEATURES),
+        bond_features=list(BOND_FEATURES),
+    )
+    return MolecularGraphs(load_packed(path)[0])
@@ -0,0 +1,114 @@
+"""
+Physical layouts of the Parquet caches.
+
+A dataset declares a `Layout` in its `LAYOUT` attribute. Sorting rows by the columns that are
+usually filtered on clusters equal and nearby values in the same row groups, so the min/max
+statistics written for every row group let `pl.scan_parquet(...).filter(...)` skip most of the
+file. The row group size trades the granularity of that pruning against per-group overhead.
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import polars as pl
+
+from .compact import compact
+
+
+class Layout(NamedTuple):
+    """How a dataset is written to its Parquet cache."""
+
+    # The columns the rows are sorted by, nulls last; ties keep their order
+    sort_by: Tuple[str, ...] = ()
+    # The maximal number of rows per row group, or None for the Polars default
+    row_group_size: Optional[int] = None
+    compression: str = "zstd"
+    compression_level: Optional[int] = None
+    # Whether repeated strings become Categorical and numbers their smallest exact type, see
+    # `aiondata.compact`
+    compact: bool = False
+
+    def _check(self, df: pl.DataFrame, columns: Tuple[str, ...]) -> None:
+        missing = [column for column in columns if column not in df.columns]
+        if missing:
+            raise ValueError(f"Layout columns {missing} are not in the dataset.")
+
+    def order(self, df: pl.DataFrame) -> Optional[pl.Series]:
+        """
+        Returns the permutation applied to the rows by `apply`.
+
+        Only the `sort_by` columns of `df` are needed, so row-aligned data stored elsewhere (e.g.
+        BindingDB coordinates) can be put in the same order.
+
+        Args:
+            df (pl.DataFrame): The rows, in the order they were built.
+
+        Returns:
+            Optional[pl.Series]: The original index of each row in layout order, or None if the
+                rows are not sorted.
+        """
+        if not self.sort_by:
+            return None
+        self._check(df, self.sort_by)
+        return (
+            df.select(self.sort_by)
+            .with_row_index()
+            .sort(self.sort_by, nulls_last=True, maintain_order=True)
+            .get_column("index")
+        )
+
+    def apply(self, df: pl.DataFrame) -> pl.DataFrame:
+        """
+        Sorts the rows and compacts the columns if requested.
+
+        Column types are kept otherwise: repeated strings are dictionary-encoded by the Parquet
+        writer and read back as strings.
+
+        Args:
+            df (pl.DataFrame): The dataset.
+
+        Returns:
+            pl.DataFrame: The dataset as it is stored in the cache.
+
+        Raises:
+            ValueError: If a layout column is missing.
+        """
+        if self.sort_by:
+            self._check(df, self.sort_by)
+            df = df.sort(self.sort_by, nulls_last=True, maintain_order=True)
+        if self.compact:
+            df = compact(df)
+        return df
+
+    def write(
+        self,
+        df: pl.DataFrame,
+        path: Path,
+        metadata: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """
+        Writes a dataset laid out by `apply` to Parquet, with row group statistics.
+
+        The file is written next to `path` as "<name>.<pid>.tmp" and moved in place once
+        complete, so readers and the peer cache server never see a partial file.
+
+        Args:
+            df (pl.DataFrame): The dataset.
+            path (Path): The file to write.
+            metadata (Optional[Dict[str, str]]): Key-value metadata stored in the file footer.
+        """
+        path = Path(path)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            df.write_parquet(
+                tmp_path,
+                compression=self.compression,
+                compression_level=self.compression_level,
+                row_group_size=self.row_group_size,
+                statistics=True,
+                metadata=metadata or None,
+            )
+            tmp_path.replace(path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
@@ -0,0 +1,129 @@
+import time
+import uuid
+from typing import Callable
+
+import polars as pl
+
+from .datasets import get_cache_root
+
+KEY = "key"
+
+
+class ResultStore:
+    """
+    A persistent, append-only store of results keyed by an input string.
+
+    Results are stored as Parquet part files in a directory under the cache root, so expensive
+    per-molecule computations are only ever run once per distinct input, across datasets and
+    processes. New parts are written atomically, which makes concurrent writers safe; a key that
+    is written twice keeps its first value.
+    """
+
+    def __init__(self, name: str):
+        """
+        Opens (and creates if needed) a result store.
+
+        Args:
+            name (str): The name of the store, which should identify the computation and its
+                version, e.g. "standardize-v1".
+        """
+        self.path = get_cache_root() / "memo" / name
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def parts(self) -> list:
+        """Returns the Parquet part files of the store."""
+        return sorted(self.path.glob("*.parquet"))
+
+    @staticmethod
+    def _scan(parts: list) -> pl.LazyFrame:
+        # Parts may disagree on result dtypes, e.g. a column that was all-null in one batch
+        return pl.concat(
+            [pl.scan_parquet(part) for part in parts], how="diagonal_relaxed"
+        )
+
+    def lookup(self, keys: pl.Series) -> pl.DataFrame:
+        """
+        Looks up stored results.
+
+        Args:
+            keys (pl.Series): The keys to look up.
+
+        Returns:
+            pl.DataFrame: The stored rows whose key is in `keys`, with a "key" column followed by
+                the result columns. Keys without a stored result are absent.
+        """
+        parts = self.parts()
+        if not parts:
+            return pl.DataFrame({KEY: pl.Series([], dtype=pl.Utf8)})
+        wanted = keys.rename(KEY).cast(pl.Utf8).drop_nulls().unique().to_frame()
+        return (
+            self._scan(parts)
+            .join(wanted.lazy(), on=KEY, how="semi")
+            .unique(subset=KEY, keep="first", maintain_order=True)
+            .collect()
+        )
+
+    def add(self, results: pl.DataFrame) -> None:
+        """
+        Stores new results.
+
+        Args:
+            results (pl.DataFrame): A frame with a "key" column and one or more result columns.
+        """
+        if results.height == 0:
+            return
+        # Parts sort in write order, so the first stored value of a key wins
+        part = self.path / f"part-{time.time_ns():020d}-{uuid.uuid4().hex}.parquet"
+        tmp_part = part.with_suffix(".tmp")
+        results.write_parquet(tmp_part)
+        tmp_part.replace(part)
+
+    def compact(self) -> None:
+        """Merges all part files into one, dropping duplicate keys."""
+        parts = self.parts()
+        if len(parts) < 2:
+            return
+        merged = (
+            self._scan(parts)
+            .unique(subset=KEY, keep="first", maintain_order=True)
+            .collect()
+        )
+        self.add(merged)
+        for part in parts:
+            part.unlink()
+
+    def get_or_compute(
+        self, keys: pl.Series, compute: Callable[[pl.Series], pl.DataFrame]
+    ) -> pl.DataFrame:
+        """
+        Returns results for every key, computing and storing only the ones not stored yet.
+
+        Args:
+            keys (pl.Series): The keys, possibly with duplicates and nulls.
+            compute (Callable): Called with the distinct missing keys; must return a frame with a
+                "key" column and the result columns.
+
+        Returns:
+            pl.DataFrame: The result columns, aligned with `keys`. Null keys get null results.
+        """
+        keys = keys.cast(pl.Utf8).rename(KEY)
+        known = self.lookup(keys)
+        missing = (
+            keys.drop_nulls()
+            .unique(maintain_order=True)
+            .to_frame()
+            .join(known, on=KEY, how="anti")
+            .get_column(KEY)
+        )
+        if missing.len():
+            computed = compute(missing)
+            self.add(computed)
+            known = pl.concat([known, computed], how="diagonal_relaxed")
+
+        return (
+            keys.to_frame()
+            .with_row_index("index")
+            .join(known, on=KEY, how="left")
+            .sort("index")
+            .drop("index", KEY)
+        )
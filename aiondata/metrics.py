@@ -0,0 +1,175 @@
+"""
+Stage timings and counters of the dataset loaders.
+
+Loaders wrap their stages (download, decompression, parsing, DataFrame construction, Parquet
+writes, ...) in `span` and report records, bytes and parse failures with `count`. Nothing is
+recorded until a sink is installed, so the instrumentation costs a global lookup per call
+when it is disabled; per-record work is accumulated locally and reported once per stage.
+
+    with collect() as report:
+        BindingDB().to_df()
+    print(report.format())
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Union
+
+_sink = None
+_NULL_SPAN = nullcontext()
+
+
+class Sink:
+    """The interface of metrics sinks. Subclass it to forward metrics to another system."""
+
+    def span(self, name: str, seconds: float, attrs: dict) -> None:
+        """Receives the duration of a completed stage."""
+        raise NotImplementedError
+
+    def count(self, name: str, value: float, attrs: dict) -> None:
+        """Receives an increment of a counter."""
+        raise NotImplementedError
+
+
+class Report(Sink):
+    """A sink aggregating the total time and number of calls of each stage and each counter."""
+
+    def __init__(self):
+        self.spans: Dict[str, dict] = {}
+        self.counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str, seconds: float, attrs: dict) -> None:
+        with self._lock:
+            entry = self.spans.setdefault(name, {"calls": 0, "seconds": 0.0})
+            entry["calls"] += 1
+            entry["seconds"] += seconds
+
+    def count(self, name: str, value: float, attrs: dict) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def as_dict(self) -> dict:
+        """Returns the report as a JSON-serializable dict of spans and counters."""
+        with self._lock:
+            return {
+                "spans": {name: dict(entry) for name, entry in self.spans.items()},
+                "counters": dict(self.counters),
+            }
+
+    def format(self) -> str:
+        """Formats the report as a table, slowest stages first."""
+        report = self.as_dict()
+        lines = [f"{'stage':<32} {'calls':>7} {'seconds':>10}"]
+        for name, entry in sorted(
+            report["spans"].items(), key=lambda item: -item[1]["seconds"]
+        ):
+            lines.append(f"{name:<32} {entry['calls']:>7} {entry['seconds']:>10.3f}")
+        lines.append(f"{'counter':<32} {'value':>18}")
+        for name, value in sorted(report["counters"].items()):
+            lines.append(f"{name:<32} {value:>18,}")
+        return "\n".join(lines)
+
+
+class JsonLinesSink(Sink):
+    """A sink appending one JSON object per span or counter increment to a file."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def _write(self, event: dict) -> None:
+        with self._lock, open(self.path, "a") as fd:
+            fd.write(json.dumps(event) + "\n")
+
+    def span(self, name: str, seconds: float, attrs: dict) -> None:
+        self._write({"type": "span", "name": name, "seconds": seconds, **attrs})
+
+    def count(self, name: str, value: float, attrs: dict) -> None:
+        self._write({"type": "count", "name": name, "value": value, **attrs})
+
+
+def set_sink(sink: Optional[Sink]) -> Optional[Sink]:
+    """
+    Installs the process-wide metrics sink.
+
+    Args:
+        sink (Optional[Sink]): The sink, or None to disable metrics.
+
+    Returns:
+        Optional[Sink]: The previous sink.
+    """
+    global _sink
+    previous, _sink = _sink, sink
+    return previous
+
+
+def enabled() -> bool:
+    """Returns whether a sink is installed, for loaders to skip per-record timing otherwise."""
+    return _sink is not None
+
+
+@contextmanager
+def collect() -> Iterator[Report]:
+    """
+    Collects the metrics of a block of code in a `Report`.
+
+    Yields:
+        Report: The report, filled in as the block runs.
+    """
+    report = Report()
+    previous = set_sink(report)
+    try:
+        yield report
+    finally:
+        set_sink(previous)
+
+
+@contextmanager
+def _timed(sink: Sink, name: str, attrs: dict) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        sink.span(name, time.perf_counter() - start, attrs)
+
+
+def span(name: str, **attrs):
+    """
+    Times a stage, e.g. `with span("bindingdb.download"): ...`.
+
+    Args:
+        name (str): The stage, as "<loader>.<stage>".
+        **attrs: Extra attributes passed to the sink, e.g. the dataset.
+
+    Returns:
+        A context manager, which does nothing when metrics are disabled.
+    """
+    sink = _sink
+    if sink is None:
+        return _NULL_SPAN
+    return _timed(sink, name, attrs)
+
+
+def record_span(name: str, seconds: float, **attrs) -> None:
+    """Reports the duration of a stage measured by the caller, e.g. accumulated in a loop."""
+    sink = _sink
+    if sink is not None:
+        sink.span(name, seconds, attrs)
+
+
+def count(name: str, value: float = 1, **attrs) -> None:
+    """
+    Increments a counter, e.g. `count("bindingdb.records", n)`.
+
+    Args:
+        name (str): The counter, as "<loader>.<quantity>".
+        value (float): The increment.
+        **attrs: Extra attributes passed to the sink.
+    """
+    sink = _sink
+    if sink is not None:
+        sink.count(name, value, attrs)
@@ -0,0 +1,248 @@
+import functools
+import hashlib
+import json
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import polars as pl
+from rdkit import Chem, RDLogger
+from tqdm.auto import tqdm
+
+from .datasets import CachedDataset, slugify
+from .memo import KEY, ResultStore
+from .packed import offsets_from_lengths
+from .parquet import row_group_sizes
+from .parallel import parallel_imap
+
+MOL_COLUMN = "Mol"
+
+
+class Conformers:
+    """
+    Memory-mapped 3D coordinates of one conformer per record, stored as ragged arrays.
+
+    `coordinates` (n_atoms x 3, float32) and `atomic_numbers` (n_atoms, uint8) hold the atoms of
+    every record back to back; `offsets[i]:offsets[i + 1]` selects the atoms of record i. Records
+    without a conformer have no atoms.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.coordinates = arrays["coordinates"]
+        self.atomic_numbers = arrays["atomic_numbers"]
+        self.offsets = offsets_from_lengths(np.asarray(arrays["num_atoms"]))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the coordinates and atomic numbers of a record."""
+        start, stop = self.offsets[index], self.offsets[index + 1]
+        return self.coordinates[start:stop], self.atomic_numbers[start:stop]
+
+
+def mol_from_binary(data: Optional[bytes]) -> Optional[Chem.Mol]:
+    """
+    Rebuilds an RDKit molecule from its `Mol.ToBinary()` serialization.
+
+    Unlike parsing SMILES, this does not run sanitization or perception again.
+
+    Args:
+        data (Optional[bytes]): The serialized molecule.
+
+    Returns:
+        Optional[Chem.Mol]: The molecule, or None if `data` is None.
+    """
+    return Chem.Mol(data) if data is not None else None
+
+
+def _apply_to_binary_batch(
+    func: Callable[[Optional[Chem.Mol]], Any], batch: List[Optional[bytes]]
+) -> List[Any]:
+    return [func(mol_from_binary(data)) for data in batch]
+
+
+def iter_binary_batches(
+    dataset: CachedDataset, column: str = MOL_COLUMN, batch_size: int = 1024
+) -> Iterator[List[Optional[bytes]]]:
+    """
+    Streams a binary column of a cached dataset in batches without loading the whole column.
+
+    The cache is read one row group at a time, so at most a row group and a batch are held.
+
+    Args:
+        dataset (CachedDataset): The dataset.
+        column (str): The binary column.
+        batch_size (int): The number of rows per batch.
+
+    Yields:
+        List[Optional[bytes]]: The values of the next `batch_size` rows.
+
+    Raises:
+        ValueError: If the cache has no such column.
+    """
+    cache = dataset.ensure_cache()
+    if column not in pl.read_parquet_schema(cache):
+        raise ValueError(
+            f"The {dataset.__class__.__name__} cache has no {column} column."
+        )
+    scan = pl.scan_parquet(cache).select(column)
+    # Each row group is decoded once and batches are sliced from it in memory
+    pending = []
+    offset = 0
+    for rows in row_group_sizes(cache):
+        values = (
+            pending + scan.slice(offset, rows).collect().get_column(column).to_list()
+        )
+        offset += rows
+        full = len(values) // batch_size * batch_size
+        for start in range(0, full, batch_size):
+            yield values[start : start + batch_size]
+        pending = values[full:]
+    if pending:
+        yield pending
+
+
+def iter_mols(
+    dataset: CachedDataset,
+    column: str = MOL_COLUMN,
+    batch_size: int = 1024,
+    func: Optional[Callable[[Optional[Chem.Mol]], Any]] = None,
+    processes: Optional[int] = None,
+) -> Iterator[List[Any]]:
+    """
+    Iterates over the molecules stored in a binary molecule column, in batches.
+
+    Without `func`, molecules are rebuilt in the calling process: sending an RDKit molecule
+    between processes serializes it to the very same binary form, so workers would not help.
+    With `func`, each batch is rebuilt and passed through `func` on a process pool and only the
+    results are returned, in order.
+
+    Args:
+        dataset (CachedDataset): The dataset.
+        column (str): The binary molecule column.
+        batch_size (int): The number of molecules per batch.
+        func (Optional[Callable]): A picklable function applied to every molecule (None for rows
+            without a molecule).
+        processes (Optional[int]): The number of worker processes used with `func`.
+
+    Yields:
+        List: A batch of molecules, or of `func` results.
+    """
+    batches = iter_binary_batches(dataset, column, batch_size)
+    if func is None:
+        for batch in batches:
+            yield [mol_from_binary(data) for data in batch]
+    else:
+        yield from parallel_imap(
+            functools.partial(_apply_to_binary_batch, func), batches, processes
+        )
+
+
+def _map_chunk(
+    func: Callable[..., Any], params: Dict[str, Any], chunk: List[str]
+) -> List[Tuple[Any, Optional[str]]]:
+    RDLogger.DisableLog("rdApp.*")
+    results = []
+    for smiles in chunk:
+        try:
+            mol = Chem.MolFromSmiles(smiles)
+            if mol is None:
+                raise ValueError(f"Cannot parse SMILES {smiles}")
+            results.append((func(mol, **params), None))
+        except Exception as e:
+            results.append((None, f"{type(e).__name__}: {e}"))
+    return results
+
+
+def map_molecules(
+    dataset: CachedDataset,
+    func: Callable[..., Any],
+    column: Optional[str] = None,
+    version: str = "1",
+    params: Optional[Dict[str, Any]] = None,
+    chunk_size: int = 1000,
+    processes: Optional[int] = None,
+) -> pl.DataFrame:
+    """
+    Applies a per-molecule function to every row of a dataset on a process pool, with caching.
+
+    Each distinct SMILES is parsed and passed to `func(mol, **params)` in chunks of `chunk_size`
+    on a process pool. A function may return a scalar, which becomes a column named after the
+    function, or a dict, whose keys become columns. Exceptions (including unparsable SMILES) do
+    not abort the run; they are captured per molecule in a "<function name>_error" column.
+
+    Results are memoized per SMILES in a store keyed by the function's qualified name, `version`
+    and `params`, so re-runs (including over other datasets or after the dataset grew) only
+    compute molecules that are new. The row-aligned output is also cached as a Parquet column set
+    next to the dataset cache. Bump `version` whenever the function's behaviour changes.
+
+    Args:
+        dataset (CachedDataset): The dataset.
+        func (Callable): A picklable (module-level) function taking an RDKit molecule.
+        column (Optional[str]): The SMILES column. Defaults to the dataset's SMILES_COLUMN.
+        version (str): The version of `func`.
+        params (Optional[Dict[str, Any]]): Keyword arguments passed to `func`.
+        chunk_size (int): The number of molecules sent to a worker at a time.
+        processes (Optional[int]): The number of worker processes.
+
+    Returns:
+        pl.DataFrame: The result columns and the error column, aligned with the dataset rows.
+
+    Raises:
+        ValueError: If no SMILES column is given and the dataset does not declare one.
+    """
+    column = dataset.get_smiles_column(column)
+    params = params or {}
+    name = func.__name__
+    digest = hashlib.sha1(
+        json.dumps(params, sort_keys=True, default=str).encode()
+    ).hexdigest()[:12]
+    store_name = f"{func.__module__}.{func.__qualname__}-v{version}-{digest}"
+
+    path = dataset.get_derived_path(f"{slugify(column)}.{slugify(store_name)}.parquet")
+    if dataset.is_derived_fresh(path):
+        return pl.read_parquet(path)
+
+    def compute(missing: pl.Series) -> pl.DataFrame:
+        chunks = (
+            missing.slice(offset, chunk_size).to_list()
+            for offset in range(0, missing.len(), chunk_size)
+        )
+        outputs, errors = [], []
+        for chunk_results in tqdm(
+            parallel_imap(
+                functools.partial(_map_chunk, func, params), chunks, processes
+            ),
+            total=-(-missing.len() // chunk_size),
+            desc=f"Computing {name}",
+            unit=" chunks",
+        ):
+            for output, error in chunk_results:
+                outputs.append(output)
+                errors.append(error)
+
+        if any(isinstance(output, dict) for output in outputs):
+            values = pl.from_dicts(
+                [output if isinstance(output, dict) else {} for output in outputs],
+                infer_schema_length=None,
+            )
+        else:
+            values = pl.DataFrame({name: pl.Series(outputs, strict=False)})
+        return pl.concat(
+            [
+                missing.to_frame(KEY),
+                values,
+                pl.DataFrame({f"{name}_error": pl.Series(errors, dtype=pl.Utf8)}),
+            ],
+            how="horizontal",
+        )
+
+    smiles = (
+        pl.scan_parquet(dataset.ensure_cache())
+        .select(column)
+        .collect()
+        .get_column(column)
+    )
+    results = ResultStore(store_name).get_or_compute(smiles, compute)
+    results.write_parquet(path)
+    return results
@@ -0,0 +1,123 @@
+import json
+import shutil
+from pathlib import Path
+from typing import Dict, Tuple
+
+import numpy as np
+
+META_FILE = "meta.json"
+
+
+def ragged_arange(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """
+    Concatenates the ranges [start, start + length) for many (start, length) pairs, vectorized.
+
+    Args:
+        starts (np.ndarray): The first index of each range.
+        lengths (np.ndarray): The length of each range.
+
+    Returns:
+        np.ndarray: The concatenated indices.
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    lengths = np.asarray(lengths, dtype=np.int64)
+    total = int(lengths.sum())
+    shifts = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return np.arange(total, dtype=np.int64) + shifts
+
+
+def offsets_from_lengths(lengths: np.ndarray) -> np.ndarray:
+    """Returns the int64 offsets (with a leading 0) of consecutive blocks of the given lengths."""
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return offsets
+
+
+class PackedArrayWriter:
+    """
+    Writes a set of arrays that grow along their first axis to a directory, chunk by chunk.
+
+    Each array is stored as a raw little-endian file, and a "meta.json" file records the dtype and
+    shape of each array once the writer is closed. The directory is written under a temporary
+    name and renamed on close, so readers never see a partial result. Use `load_packed` to open
+    the arrays as read-only memory maps.
+    """
+
+    def __init__(self, path: Path, dtypes: Dict[str, Tuple[str, Tuple[int, ...]]]):
+        """
+        Args:
+            path (Path): The output directory.
+            dtypes (Dict[str, Tuple[str, Tuple[int, ...]]]): The dtype and trailing shape of each
+                array, e.g. {"coordinates": ("<f4", (3,)), "offsets": ("<i8", ())}.
+        """
+        self.path = Path(path)
+        self.tmp_path = self.path.with_name(self.path.name + ".tmp")
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+        self.tmp_path.mkdir(parents=True)
+        self.dtypes = {
+            name: (np.dtype(dtype), shape) for name, (dtype, shape) in dtypes.items()
+        }
+        self.lengths = dict.fromkeys(dtypes, 0)
+        self.files = {
+            name: open(self.tmp_path / f"{name}.bin", "wb") for name in dtypes
+        }
+
+    def append(self, **arrays: np.ndarray) -> None:
+        """Appends rows to some or all of the arrays."""
+        for name, array in arrays.items():
+            dtype, shape = self.dtypes[name]
+            array = np.ascontiguousarray(array, dtype=dtype).reshape((-1,) + shape)
+            self.files[name].write(array.tobytes())
+            self.lengths[name] += len(array)
+
+    def close(self, **metadata) -> None:
+        """
+        Finalizes the arrays and publishes the directory.
+
+        Args:
+            **metadata: Extra JSON-serializable values to record in "meta.json".
+        """
+        for fd in self.files.values():
+            fd.close()
+        meta = {
+            "arrays": {
+                name: {"dtype": dtype.str, "shape": [self.lengths[name], *shape]}
+                for name, (dtype, shape) in self.dtypes.items()
+            },
+            **metadata,
+        }
+        with open(self.tmp_path / META_FILE, "w") as fd:
+            json.dump(meta, fd)
+        shutil.rmtree(self.path, ignore_errors=True)
+        self.tmp_path.replace(self.path)
+
+    def abort(self) -> None:
+        """Discards everything written so far."""
+        for fd in self.files.values():
+            fd.close()
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+
+
+def load_packed(path: Path) -> Tuple[Dict[str, np.ndarray], dict]:
+    """
+    Opens arrays written by `PackedArrayWriter` as read-only memory maps.
+
+    Args:
+        path (Path): The directory.
+
+    Returns:
+        Tuple[Dict[str, np.ndarray], dict]: The arrays by name, and the metadata.
+    """
+    path = Path(path)
+    with open(path / META_FILE) as fd:
+        meta = json.load(fd)
+    arrays = {}
+    for name, spec in meta["arrays"].items():
+        shape = tuple(spec["shape"])
+        if shape[0] == 0:
+            arrays[name] = np.empty(shape, dtype=spec["dtype"])
+        else:
+            arrays[name] = np.memmap(
+                path / f"{name}.bin", dtype=spec["dtype"], mode="r", shape=shape
+            )
+    return arrays, meta
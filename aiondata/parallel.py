@@ -0,0 +1,102 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Optional, TypeVar
+
+from tqdm.auto import tqdm
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Below this many items the cost of starting a process pool outweighs the work
+MIN_PARALLEL_ITEMS = 2048
+
+
+def default_processes() -> int:
+    """
+    Returns the default number of worker processes.
+
+    The number is read from the AIONDATA_PROCESSES environment variable and defaults to the
+    number of CPUs available to the current process.
+    """
+    if "AIONDATA_PROCESSES" in os.environ:
+        return max(1, int(os.environ["AIONDATA_PROCESSES"]))
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def parallel_map(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    processes: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    desc: Optional[str] = None,
+) -> List[R]:
+    """
+    Applies a picklable function to every item on a process pool, preserving order.
+
+    Small inputs and `processes=1` are handled in the current process.
+
+    Args:
+        func (Callable): A picklable (module-level) function.
+        items (Iterable): The items to process.
+        processes (Optional[int]): The number of worker processes. Defaults to `default_processes()`.
+        chunksize (Optional[int]): The number of items sent to a worker at a time.
+        desc (Optional[str]): If given, a progress bar with this description is displayed.
+
+    Returns:
+        List: The results, in the order of `items`.
+    """
+    items = list(items)
+    processes = processes or default_processes()
+    progress = (
+        (lambda x: tqdm(x, total=len(items), desc=desc, unit=" items"))
+        if desc
+        else (lambda x: x)
+    )
+    if processes == 1 or len(items) < MIN_PARALLEL_ITEMS:
+        return list(progress(map(func, items)))
+
+    if chunksize is None:
+        chunksize = max(1, min(4096, len(items) // (processes * 8)))
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        return list(progress(executor.map(func, items, chunksize=chunksize)))
+
+
+def parallel_imap(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    processes: Optional[int] = None,
+    max_pending: Optional[int] = None,
+) -> Iterator[R]:
+    """
+    Lazily applies a picklable function to a stream of items on a process pool, preserving order.
+
+    Unlike `parallel_map`, the input is consumed incrementally and at most `max_pending` items
+    are in flight, so arbitrarily long streams of batches can be processed in bounded memory.
+
+    Args:
+        func (Callable): A picklable (module-level) function.
+        items (Iterable): The items to process, typically batches.
+        processes (Optional[int]): The number of worker processes. Defaults to `default_processes()`.
+        max_pending (Optional[int]): The maximum number of submitted but unconsumed items.
+            Defaults to twice the number of processes.
+
+    Yields:
+        The results, in the order of `items`.
+    """
+    processes = processes or default_processes()
+    if processes == 1:
+        yield from map(func, items)
+        return
+
+    max_pending = max_pending or 2 * processes
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
@@ -0,0 +1,140 @@
+"""
+Row group boundaries of Parquet files.
+
+Polars reads a slice of a Parquet file by decoding every row group that overlaps it, but does
+not expose where row groups start. Slicing on row group boundaries, read here from the file
+footer, decodes every row group once. The footer is a Thrift struct in the compact protocol
+(see https://github.com/apache/parquet-format); only the row counts of the row groups are read
+and everything else is skipped.
+"""
+
+import struct
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+MAGIC = b"PAR1"
+
+# Thrift compact protocol types
+BOOLEAN_TRUE, BOOLEAN_FALSE, BYTE, I16, I32, I64, DOUBLE, BINARY = range(1, 9)
+LIST, SET, MAP, STRUCT = range(9, 13)
+
+# Field ids of FileMetaData.row_groups and RowGroup.num_rows
+ROW_GROUPS_FIELD = 4
+NUM_ROWS_FIELD = 3
+
+
+class _CompactReader:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    def byte(self) -> int:
+        value = self.data[self.pos]
+        self.pos += 1
+        return value
+
+    def varint(self) -> int:
+        result = shift = 0
+        while True:
+            byte = self.byte()
+            result |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                return result
+
+    def zigzag(self) -> int:
+        value = self.varint()
+        return (value >> 1) ^ -(value & 1)
+
+    def fields(self) -> Iterator[Tuple[int, int]]:
+        # Yields the id and type of every field of a struct; the caller reads or skips values
+        field = 0
+        while True:
+            header = self.byte()
+            if header == 0:
+                return
+            delta = header >> 4
+            field = field + delta if delta else self.zigzag()
+            yield field, header & 0x0F
+
+    def list_header(self) -> Tuple[int, int]:
+        header = self.byte()
+        size = header >> 4
+        if size == 15:
+            size = self.varint()
+        return size, header & 0x0F
+
+    def skip(self, kind: int) -> None:
+        if kind in (BOOLEAN_TRUE, BOOLEAN_FALSE):
+            return
+        if kind == BYTE:
+            self.pos += 1
+        elif kind in (I16, I32, I64):
+            self.varint()
+        elif kind == DOUBLE:
+            self.pos += 8
+        elif kind == BINARY:
+            length = self.varint()
+            self.pos += length
+        elif kind in (LIST, SET):
+            size, element = self.list_header()
+            if element in (BOOLEAN_TRUE, BOOLEAN_FALSE):
+                # Booleans in collections take one byte each
+                self.pos += size
+            else:
+                for _ in range(size):
+                    self.skip(element)
+        elif kind == MAP:
+            size = self.varint()
+            if size:
+                types = self.byte()
+                for _ in range(size):
+                    self.skip(types >> 4)
+                    self.skip(types & 0x0F)
+        elif kind == STRUCT:
+            for _, field_kind in self.fields():
+                self.skip(field_kind)
+        else:
+            raise ValueError(f"Invalid Thrift compact type {kind}.")
+
+
+def row_group_sizes(path: Path) -> List[int]:
+    """
+    Reads the number of rows of every row group of a Parquet file from its footer.
+
+    Args:
+        path (Path): The Parquet file.
+
+    Returns:
+        List[int]: The number of rows of each row group, in file order.
+
+    Raises:
+        ValueError: If the file is not a Parquet file.
+    """
+    with open(path, "rb") as fd:
+        fd.seek(0, 2)
+        size = fd.tell()
+        if size < 12:
+            raise ValueError(f"{path} is not a Parquet file.")
+        fd.seek(size - 8)
+        length, magic = struct.unpack("<I4s", fd.read(8))
+        if magic != MAGIC or length > size - 12:
+            raise ValueError(f"{path} is not a Parquet file.")
+        fd.seek(size - 8 - length)
+        reader = _CompactReader(fd.read(length))
+
+    sizes = []
+    for field, kind in reader.fields():
+        if field != ROW_GROUPS_FIELD or kind != LIST:
+            reader.skip(kind)
+            continue
+        count, _ = reader.list_header()
+        for _ in range(count):
+            num_rows = 0
+            for group_field, group_kind in reader.fields():
+                if group_field == NUM_ROWS_FIELD and group_kind == I64:
+                    num_rows = reader.zigzag()
+                else:
+                    reader.skip(group_kind)
+            sizes.append(num_rows)
+    return sizes
@@ -0,0 +1,184 @@
+import argparse
+import functools
+import os
+import shutil
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional, Union
+
+from . import metrics
+
+DEFAULT_PORT = 8765
+DEFAULT_TIMEOUT = 10.0
+# In-progress writes and lock files are never served
+HIDDEN_SUFFIXES = (".tmp", ".lock")
+
+
+def get_peer_url() -> Optional[str]:
+    """
+    Returns the URL of the peer cache server to fetch caches from.
+
+    The peer is set with the environment variable AIONDATA_PEER, e.g.
+    "http://node1.cluster:8765". When it is not set, datasets are downloaded from upstream.
+
+    Returns:
+        Optional[str]: The URL of the peer without a trailing slash, or None.
+    """
+    url = os.environ.get("AIONDATA_PEER")
+    return url.rstrip("/") if url else None
+
+
+def fetch_from_peer(
+    path: Union[str, Path], root: Union[str, Path], timeout: float = DEFAULT_TIMEOUT
+) -> bool:
+    """
+    Copies a file of the local cache from the peer cache server, if one is configured.
+
+    The file is requested at the same path relative to the cache root, so a peer serving its
+    AIONDATA_CACHE provides Parquet caches and raw downloads alike. It is written to a
+    temporary file first and moved in place once complete.
+
+    Args:
+        path (Union[str, Path]): The destination, inside the local cache root.
+        root (Union[str, Path]): The local cache root.
+        timeout (float): The connection timeout in seconds.
+
+    Returns:
+        bool: True if the file was fetched, False if no peer is configured, the peer is
+            unreachable or does not have the file, in which case the caller falls back to
+            upstream.
+    """
+    peer = get_peer_url()
+    path = Path(path)
+    if peer is None:
+        return False
+    try:
+        relative = path.resolve().relative_to(Path(root).resolve())
+    except ValueError:
+        return False
+
+    url = f"{peer}/{urllib.parse.quote(relative.as_posix())}"
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with metrics.span("peer.fetch"):
+            with urllib.request.urlopen(url, timeout=timeout) as response:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with open(tmp_path, "wb") as fd:
+                    shutil.copyfileobj(response, fd, 1 << 20)
+            tmp_path.replace(path)
+    except (urllib.error.URLError, OSError):
+        metrics.count("peer.misses")
+        return False
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    metrics.count("peer.bytes", path.stat().st_size)
+    return True
+
+
+class _CacheRequestHandler(SimpleHTTPRequestHandler):
+    """Serves the files of a cache directory, read-only and without directory listings."""
+
+    def send_head(self):
+        name = urllib.parse.unquote(urllib.parse.urlsplit(self.path).path)
+        if name.endswith(HIDDEN_SUFFIXES) or name.endswith("/"):
+            self.send_error(404)
+            return None
+        return super().send_head()
+
+    def list_directory(self, path):
+        self.send_error(404)
+        return None
+
+    def log_message(self, format, *args):
+        pass
+
+
+class PeerCacheServer:
+    """
+    A small HTTP server sharing the local cache with the other nodes of a cluster.
+
+    One node downloads datasets from upstream and serves its cache directory; the others set
+    AIONDATA_PEER to its URL, and fetch Parquet caches and raw downloads from it before falling
+    back to upstream. Only GET and HEAD are supported, nothing outside the cache directory is
+    served, and files still being written are hidden.
+
+    The server can run in a background thread (`start`, or as a context manager) or in the
+    foreground with `aiondata serve` or `python -m aiondata.peer`. It only listens on the
+    loopback interface unless another host is given, e.g. "0.0.0.0" to serve the cluster.
+    """
+
+    def __init__(
+        self,
+        root: Union[str, Path],
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_PORT,
+    ):
+        """
+        Args:
+            root (Union[str, Path]): The directory to serve, usually `get_cache_root()`.
+            host (str): The interface to listen on. Defaults to loopback only.
+            port (int): The port to listen on, or 0 for any free port.
+        """
+        self.root = Path(root)
+        handler = functools.partial(_CacheRequestHandler, directory=str(self.root))
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        """The URL of the server, to use as AIONDATA_PEER on other nodes."""
+        host, port = self.server.server_address[:2]
+        if host == "0.0.0.0":
+            host = "127.0.0.1"
+        return f"http://{host}:{port}"
+
+    def start(self) -> "PeerCacheServer":
+        """Starts serving in a background thread."""
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serves in the current thread until interrupted."""
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+
+    def stop(self) -> None:
+        """Stops the server and releases its port."""
+        if self._thread is not None:
+            self.server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server.server_close()
+
+    def __enter__(self) -> "PeerCacheServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main() -> None:
+    from .datasets import get_cache_root
+
+    parser = argparse.ArgumentParser(description="Serve the aiondata cache to peers.")
+    parser.add_argument("--root", help="The directory to serve, defaults to the cache.")
+    parser.add_argument(
+        "--host", default="127.0.0.1", help="e.g. 0.0.0.0 to serve other nodes."
+    )
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+    server = PeerCacheServer(args.root or get_cache_root(), args.host, args.port)
+    print(f"Serving {server.root} at {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
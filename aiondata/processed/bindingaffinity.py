@@ -1,14 +1,120 @@
+import hashlib
 import io
-from typing import Optional
+import json
+from typing import Dict, List, Optional, Sequence
 
+import numpy as np
 import polars as pl
 
+from ..clustering import get_sequence_clusters
 from ..datasets import CachedDataset
 from ..raw.bindingdb import BindingDB
+from ..splits import group_split
+from ..star import hash_strings
+from ..tokens import TokenizedColumn, get_tokens
+
+# The affinities (in nM) under which a measurement counts as binding, see `assess_binding`
+DEFAULT_THRESHOLDS = {
+    "Ki (nM)": 100,
+    "IC50 (nM)": 250,
+    "Kd (nM)": 150,
+    "EC50 (nM)": 300,
+}
+# The p-value of each affinity, i.e. -log10 of the affinity in mol/L
+P_COLUMNS = {
+    "Ki (nM)": "pKi",
+    "IC50 (nM)": "pIC50",
+    "Kd (nM)": "pKd",
+    "EC50 (nM)": "pEC50",
+}
+# Bumped when the aggregated table changes, so cached tables are rebuilt
+PAIRS_VERSION = 2
+
+
+def aggregate_pairs(
+    df: pl.LazyFrame, thresholds: Dict[str, Dict[str, float]]
+) -> pl.LazyFrame:
+    """
+    Aggregates the replicate measurements of every (ligand, target) pair in one group-by.
+
+    Rows are grouped on the SMILES and the sequence. Each affinity is converted to its p-value
+    first; values that are not positive are dropped. Measurements without relation columns
+    (e.g. from caches built before they were recorded) have a null "censored" flag.
+
+    Args:
+        df (pl.LazyFrame): The measurements, with the columns of `BindingAffinity`.
+        thresholds (Dict[str, Dict[str, float]]): Named sets of thresholds, each mapping
+            affinity columns (e.g. "Ki (nM)") to the value in nM under which a pair binds.
+
+    Returns:
+        pl.LazyFrame: One row per pair with its "ligand_id" and "target_id" (stable hashes
+            of the SMILES and the sequence, see `aiondata.star.hash_strings`), "SMILES",
+            "Sequence" and number of measurements ("Count"), then for each p-value (e.g.
+            "pKi") its "count", "median", "spread" (max - min) and whether any measurement is
+            "censored", and a "Binds {name}" label per threshold set, as in `assess_binding`
+            but on the medians. Sorted by target, then ligand.
+
+    Raises:
+        ValueError: If a threshold is set on an unknown column.
+    """
+    for name, columns in thresholds.items():
+        unknown = set(columns) - set(P_COLUMNS)
+        if unknown:
+            raise ValueError(
+                f"Unknown affinity columns {sorted(unknown)} in thresholds {name!r}."
+            )
+    schema = df.collect_schema()
+    aggregations = [pl.len().alias("Count")]
+    for column, p_column in P_COLUMNS.items():
+        p_value = pl.col(p_column)
+        relation = BindingDB.RELATIONS[column]
+        censored = (
+            (p_value.is_not_null() & pl.col(relation).is_not_null()).any()
+            if relation in schema
+            else pl.lit(None, pl.Boolean)
+        )
+        aggregations += [
+            p_value.count().alias(f"{p_column} count"),
+            p_value.median().alias(f"{p_column} median"),
+            (p_value.max() - p_value.min()).alias(f"{p_column} spread"),
+            censored.alias(f"{p_column} censored"),
+        ]
+    labels = [
+        pl.all_horizontal(
+            pl.col(f"{P_COLUMNS[column]} median").is_null()
+            | (pl.col(f"{P_COLUMNS[column]} median") > 9 - np.log10(threshold))
+            for column, threshold in columns.items()
+        )
+        .cast(pl.Int32)
+        .alias(f"Binds {name}")
+        for name, columns in thresholds.items()
+    ]
+    return (
+        df.with_columns(
+            pl.when(pl.col(column) > 0).then(9 - pl.col(column).log10()).alias(p_column)
+            for column, p_column in P_COLUMNS.items()
+        )
+        .group_by("SMILES", "Sequence")
+        .agg(aggregations)
+        .select(
+            pl.col("SMILES")
+            .map_batches(hash_strings, return_dtype=pl.Int64)
+            .alias("ligand_id"),
+            pl.col("Sequence")
+            .map_batches(hash_strings, return_dtype=pl.Int64)
+            .alias("target_id"),
+            pl.all(),
+        )
+        .with_columns(labels)
+        .sort("target_id", "ligand_id", "Sequence", "SMILES")
+    )
 
 
 class BindingAffinity(CachedDataset):
     COLLECTION = "processed"
+    SMILES_COLUMN = "SMILES"
+    CPU_BOUND = True
+    DEPENDS_ON = ("BindingDB",)
 
     def __init__(self, fd: Optional[io.BufferedReader] = None):
         """
@@ -22,6 +128,12 @@ class BindingAffinity(CachedDataset):
 
     def get_df(self) -> pl.DataFrame:
         bindingdb = self.bindingdb.to_df()
+        # BindingDB caches built before relations were recorded lack their columns
+        bindingdb = bindingdb.with_columns(
+            pl.lit(None, pl.Utf8).alias(relation)
+            for relation in BindingDB.RELATIONS.values()
+            if relation not in bindingdb.columns
+        )
 
         ba_df = bindingdb.select(
             [
@@ -35,6 +147,7 @@ class BindingAffinity(CachedDataset):
                 "Temp C",
                 "Target Source Organism According to Curator or DataSource",
                 "Curation/DataSource",
+                *BindingDB.RELATIONS.values(),
             ]
         )
         ba_df = ba_df.rename(
@@ -56,6 +169,90 @@ class BindingAffinity(CachedDataset):
 
         return ba_df
 
+    def get_pairs(
+        self, thresholds: Optional[Dict[str, Dict[str, float]]] = None
+    ) -> pl.DataFrame:
+        """
+        Returns the measurements aggregated per (ligand, target) pair, see `aggregate_pairs`.
+
+        Conflicting replicates are reduced to their median p-value, with the count, spread and
+        censoring needed to filter unreliable pairs. The table is cached next to the dataset
+        cache for each set of thresholds.
+
+        Args:
+            thresholds (Optional[Dict[str, Dict[str, float]]]): Named sets of thresholds in nM,
+                each labelled in a "Binds {name}" column, e.g.
+                `{"default": DEFAULT_THRESHOLDS, "strict": {"Ki (nM)": 10, "Kd (nM)": 10}}`.
+                Defaults to `{"default": DEFAULT_THRESHOLDS}`.
+
+        Returns:
+            pl.DataFrame: One row per pair.
+        """
+        if thresholds is None:
+            thresholds = {"default": DEFAULT_THRESHOLDS}
+        key = hashlib.sha1(json.dumps(thresholds, sort_keys=True).encode()).hexdigest()
+        path = self.get_derived_path(f"pairs.{key[:12]}.v{PAIRS_VERSION}.parquet")
+        df = self.scan()
+        if self.is_derived_fresh(path):
+            return pl.read_parquet(path)
+        pairs = aggregate_pairs(df, thresholds).collect()
+        pairs.write_parquet(path)
+        return pairs
+
+    def get_sequence_clusters(
+        self, k: int = 5, num_perm: int = 128, threshold: float = 0.5, seed: int = 0
+    ) -> pl.Series:
+        """
+        Returns the target sequence cluster of every row, from cached MinHash clustering.
+
+        Args:
+            k (int): The k-mer length.
+            num_perm (int): The number of MinHash hash functions.
+            threshold (float): The minimal estimated k-mer Jaccard similarity of linked sequences.
+            seed (int): The random seed of the hash functions.
+
+        Returns:
+            pl.Series: The cluster of each row.
+        """
+        return get_sequence_clusters(self, "Sequence", k, num_perm, threshold, seed)
+
+    def get_sequence_split(
+        self,
+        sizes: Sequence[float] = (0.8, 0.1, 0.1),
+        seed: int = 0,
+        threshold: float = 0.5,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Splits the rows so that similar target sequences never straddle two splits.
+
+        Args:
+            sizes (Sequence[float]): The train, validation and test fractions.
+            seed (int): The random seed.
+            threshold (float): The minimal estimated k-mer Jaccard similarity of sequences that
+                are kept together.
+
+        Returns:
+            Dict[str, np.ndarray]: Sorted row indices for "train", "valid" and "test".
+        """
+        clusters = self.get_sequence_clusters(threshold=threshold)
+        return group_split(clusters, sizes, seed)
+
+    def get_tokens(
+        self, kind: str = "smiles", vocab: Optional[List[str]] = None
+    ) -> TokenizedColumn:
+        """
+        Returns the cached token ids of the ligand SMILES or of the target sequences.
+
+        Args:
+            kind (str): "smiles" for the ligands, or "protein" for the target sequences.
+            vocab (Optional[List[str]]): A custom SMILES vocabulary. Defaults to SMILES_VOCAB.
+
+        Returns:
+            TokenizedColumn: The tokens of each row.
+        """
+        column = "Sequence" if kind == "protein" else self.SMILES_COLUMN
+        return get_tokens(self, column, kind, vocab)
+
     def assess_binding(self, df: pl.DataFrame) -> pl.DataFrame:
         """
         Adds a column 'Good Affinity' to the DataFrame based on defined scientific thresholds.
@@ -66,10 +263,10 @@ class BindingAffinity(CachedDataset):
         Returns:
         pl.DataFrame: The DataFrame with the 'Binds' column added.
         """
-        ki_threshold = 100
-        ic50_threshold = 250
-        kd_threshold = 150
-        ec50_threshold = 300
+        ki_threshold = DEFAULT_THRESHOLDS["Ki (nM)"]
+        ic50_threshold = DEFAULT_THRESHOLDS["IC50 (nM)"]
+        kd_threshold = DEFAULT_THRESHOLDS["Kd (nM)"]
+        ec50_threshold = DEFAULT_THRESHOLDS["EC50 (nM)"]
 
         affinity_column = (
             (
@@ -0,0 +1,254 @@
+"""
+Accounting and garbage collection of the local cache.
+
+Every file or directory directly inside a collection of the cache root is an entry, of one of
+three kinds:
+
+- "raw": downloads such as the BindingDB SDF archive, Weizmann study archives or PDB files,
+- "derived": artifacts stored next to a Parquet cache, e.g. `tox21.scaffolds.parquet`, and
+  the result stores of `aiondata.memo`,
+- "cache": the Parquet caches themselves.
+
+`gc` evicts the least recently used raw entries first, then derived artifacts, then Parquet
+caches (together with what is derived from them), until the cache fits in the quota. Loaders
+mark entries as used with `mark_used` and hold them with `hold` while reading them; an entry
+held by any process is never evicted. With the environment variable AIONDATA_CACHE_QUOTA set
+(e.g. "50GB"), the quota is enforced whenever a cache is built or a raw file downloaded.
+"""
+
+import os
+import re
+import shutil
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, NamedTuple, Optional, Union
+
+from . import metrics
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+KINDS = ("raw", "derived", "cache")
+# Files being written, and the lock files of other modules, are never entries
+SKIPPED = re.compile(r"\.(tmp|lock)$|^\.")
+UNITS = {"": 1, "B": 1, "K": 2**10, "M": 2**20, "G": 2**30, "T": 2**40}
+
+
+class Entry(NamedTuple):
+    path: Path
+    kind: str
+    size: int
+    accessed: float
+    # The Parquet cache an artifact is derived from
+    parent: Optional[Path] = None
+
+
+def parse_size(size: Union[str, int]) -> int:
+    """
+    Parses a size in bytes, such as 1000000, "500MB" or "1.5 TB".
+
+    Args:
+        size (Union[str, int]): The size.
+
+    Returns:
+        int: The size in bytes.
+
+    Raises:
+        ValueError: If the size cannot be parsed.
+    """
+    if isinstance(size, int):
+        return size
+    match = re.fullmatch(r"\s*([\d.]+)\s*([KMGT]?)(?:I?B)?\s*", size.upper())
+    if match is None:
+        raise ValueError(f"Invalid size {size!r}, expected e.g. 500MB or 50GB.")
+    return int(float(match.group(1)) * UNITS[match.group(2)])
+
+
+def get_quota() -> Optional[int]:
+    """Returns the cache quota in bytes set with AIONDATA_CACHE_QUOTA, or None."""
+    quota = os.environ.get("AIONDATA_CACHE_QUOTA")
+    return parse_size(quota) if quota else None
+
+
+def disk_usage(path: Path) -> int:
+    """Returns the size in bytes of a file, or of all files in a directory."""
+    if path.is_dir():
+        return sum(p.stat().st_size for p in path.rglob("*") if p.is_file())
+    return path.stat().st_size
+
+
+def mark_used(path: Path) -> None:
+    """
+    Records that an entry was used, for `gc` to evict the least recently used ones.
+
+    The access time is set explicitly, so it is tracked on file systems mounted with noatime,
+    and the modification time, which tells whether derived artifacts are stale, is kept.
+
+    Args:
+        path (Path): The entry. Missing entries are ignored.
+    """
+    try:
+        os.utime(path, ns=(time.time_ns(), path.stat().st_mtime_ns))
+    except OSError:
+        pass
+
+
+@contextmanager
+def hold(path: Path) -> Iterator[None]:
+    """
+    Prevents `gc` in any process from evicting an entry while the block runs.
+
+    Args:
+        path (Path): The entry. Nothing is held if it does not exist.
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        yield
+        return
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_SH)
+        yield
+    finally:
+        os.close(fd)
+
+
+def _entry(path: Path, kind: str, parent: Optional[Path] = None) -> Entry:
+    stat = path.stat()
+    # Entries never marked as used fall back to the file system's times
+    accessed = max(stat.st_atime, stat.st_mtime)
+    return Entry(path, kind, disk_usage(path), accessed, parent)
+
+
+def list_entries(root: Optional[Path] = None) -> List[Entry]:
+    """
+    Lists the entries of the cache.
+
+    Args:
+        root (Optional[Path]): The cache root. Defaults to `get_cache_root()`.
+
+    Returns:
+        List[Entry]: Each entry with its kind, size in bytes, last access time and, for
+            derived artifacts, the Parquet cache they are derived from.
+    """
+    if root is None:
+        from .datasets import get_cache_root
+
+        root = get_cache_root()
+    entries = []
+    for collection in sorted(Path(root).iterdir()) if Path(root).is_dir() else []:
+        if not collection.is_dir():
+            if not SKIPPED.search(collection.name):
+                entries.append(_entry(collection, "raw"))
+            continue
+        items = [
+            item
+            for item in sorted(collection.iterdir())
+            if not SKIPPED.search(item.name)
+        ]
+        if collection.name == "memo":
+            entries.extend(_entry(item, "derived") for item in items)
+            continue
+        parquet = [
+            item for item in items if item.suffix == ".parquet" and item.is_file()
+        ]
+        # Derived Parquet artifacts are named "{cache stem}.{name}.parquet"
+        caches = [
+            item
+            for item in parquet
+            if not any(
+                p != item and item.name.startswith(f"{p.stem}.") for p in parquet
+            )
+        ]
+        # Longest stems first, so "x_mol.a" is derived from "x_mol", not from "x"
+        stems = sorted(caches, key=lambda cache: -len(cache.stem))
+        for item in items:
+            if item in caches:
+                entries.append(_entry(item, "cache"))
+                continue
+            parent = next(
+                (cache for cache in stems if item.name.startswith(f"{cache.stem}.")),
+                None,
+            )
+            entries.append(_entry(item, "raw" if parent is None else "derived", parent))
+    return entries
+
+
+def _evict(path: Path) -> bool:
+    # An exclusive lock can't be taken while another process holds the entry
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except FileNotFoundError:
+        return False
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        if path.is_dir():
+            shutil.rmtree(path)
+        else:
+            path.unlink()
+        return True
+    except BlockingIOError:
+        return False
+    finally:
+        os.close(fd)
+
+
+def gc(
+    quota: Optional[Union[str, int]] = None,
+    root: Optional[Path] = None,
+    dry_run: bool = False,
+) -> List[Entry]:
+    """
+    Evicts least recently used entries until the cache fits in the quota.
+
+    Raw entries are evicted first, then derived artifacts, then Parquet caches together with
+    their derived artifacts. Entries held by a process (see `hold`) are skipped.
+
+    Args:
+        quota (Optional[Union[str, int]]): The quota, in bytes or as e.g. "50GB". Defaults to
+            AIONDATA_CACHE_QUOTA.
+        root (Optional[Path]): The cache root. Defaults to `get_cache_root()`.
+        dry_run (bool): Whether to only report what would be evicted.
+
+    Returns:
+        List[Entry]: The evicted entries.
+
+    Raises:
+        ValueError: If no quota is given or set.
+    """
+    quota = parse_size(quota) if quota is not None else get_quota()
+    if quota is None:
+        raise ValueError("No quota given, pass one or set AIONDATA_CACHE_QUOTA.")
+    entries = list_entries(root)
+    used = sum(entry.size for entry in entries)
+    evicted = []
+    for entry in sorted(entries, key=lambda e: (KINDS.index(e.kind), e.accessed)):
+        if used <= quota:
+            break
+        if entry in evicted or not (dry_run or _evict(entry.path)):
+            continue
+        group = [entry]
+        if entry.kind == "cache":
+            group += [
+                e
+                for e in entries
+                if e.parent == entry.path
+                and e not in evicted
+                and (dry_run or _evict(e.path))
+            ]
+        evicted.extend(group)
+        used -= sum(member.size for member in group)
+    metrics.count("cache.evictions", len(evicted))
+    metrics.count("cache.evicted_bytes", sum(entry.size for entry in evicted))
+    return evicted
+
+
+def enforce_quota(root: Optional[Path] = None) -> None:
+    """Runs `gc` if AIONDATA_CACHE_QUOTA is set, otherwise does nothing."""
+    if get_quota() is not None:
+        gc(root=root)
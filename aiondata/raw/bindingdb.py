@@ -1,11 +1,39 @@
 import io
-from typing import Optional, Generator, Union, Tuple
+import json
+import os
+import time
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Generator,
+    Union,
+    Tuple,
+)
 import urllib.request
 from rdkit import Chem, RDLogger
 from tqdm.auto import tqdm
 import zipfile
+import numpy as np
 
-from ..datasets import GeneratedDataset, CachedDataset
+from .. import metrics
+from ..datasets import GeneratedDataset, CachedDataset, get_cache_root
+from ..layout import Layout
+from ..molecules import MOL_COLUMN, Conformers, iter_mols
+from ..packed import (
+    META_FILE,
+    PackedArrayWriter,
+    load_packed,
+    offsets_from_lengths,
+    ragged_arange,
+)
+from ..peer import fetch_from_peer
+from ..quota import mark_used
+from ..star import Dimension, join, normalize
 import polars as pl
 
 
@@ -13,10 +41,19 @@ class BindingDB(GeneratedDataset):
     """BindingDB
 
     A public, web-accessible database of measured binding affinities, focusing chiefly on the interactions of protein considered to be drug-targets with small, drug-like molecules.
+
+    The cached rows are sorted by the SwissProt ID of the target (nulls last, ties in SDF
+    order), not in SDF order; see `LAYOUT`.
     """
 
-    SOURCE = "https://www.bindingdb.org/bind/downloads/BindingDB_All_3D_202411_sdf.zip"
+    SOURCE_TEMPLATE = (
+        "https://www.bindingdb.org/bind/downloads/BindingDB_All_3D_{release}_sdf.zip"
+    )
+    RELEASE = "202411"
+    SOURCE = SOURCE_TEMPLATE.format(release=RELEASE)
+    ID_COLUMN = "BindingDB Reactant_set_id"
     COLLECTION = "bindingdb"
+    SMILES_COLUMN = "SMILES"
     SCHEMA = [
         # Primary Identifiers
         ("BindingDB Reactant_set_id", pl.Float64),
@@ -78,24 +115,485 @@ class BindingDB(GeneratedDataset):
         ("Patent Number", pl.Utf8),
         ("Authors", pl.Utf8),
         ("Institution", pl.Utf8),
+        # ">" or "<" where the affinity is censored, i.e. only bounded by the assay; the
+        # affinity columns then hold the bound moved by 1% past it
+        ("Ki Relation", pl.Utf8),
+        ("IC50 Relation", pl.Utf8),
+        ("Kd Relation", pl.Utf8),
+        ("EC50 Relation", pl.Utf8),
     ]
+    # The column holding the relation of each affinity, which is not an SDF tag
+    RELATIONS = {
+        "Ki (nM)": "Ki Relation",
+        "IC50 (nM)": "IC50 Relation",
+        "Kd (nM)": "Kd Relation",
+        "EC50 (nM)": "EC50 Relation",
+    }
+    # Clustered by target, so filtering on a UniProt ID reads few row groups
+    LAYOUT = Layout(
+        sort_by=("UniProt (SwissProt) Primary ID of Target Chain",),
+        row_group_size=50_000,
+    )
+    # The tables of a normalized cache, see `BindingDB(normalized=True)`
+    DIMENSIONS = (
+        Dimension(
+            "ligands",
+            "ligand_id",
+            "BindingDB MonomerID",
+            (
+                "Ligand InChI",
+                "Ligand InChI Key",
+                "BindingDB Ligand Name",
+                "SMILES",
+                "PubChem CID of Ligand",
+                "PubChem SID of Ligand",
+                "ChEBI ID of Ligand",
+                "ChEMBL ID of Ligand",
+                "DrugBank ID of Ligand",
+                "IUPHAR_GRAC ID of Ligand",
+                "KEGG ID of Ligand",
+                "ZINC ID of Ligand",
+                "Ligand HET ID in PDB",
+                "Link to Ligand in BindingDB",
+                MOL_COLUMN,
+            ),
+        ),
+        Dimension(
+            "targets",
+            "target_id",
+            "BindingDB Target Chain Sequence",
+            (
+                "Target Name",
+                "UniProt (SwissProt) Primary ID of Target Chain",
+                "UniProt (SwissProt) Secondary ID(s) of Target Chain",
+                "UniProt (SwissProt) Alternative ID(s) of Target Chain",
+                "UniProt (SwissProt) Recommended Name of Target Chain",
+                "UniProt (SwissProt) Entry Name of Target Chain",
+                "UniProt (TrEMBL) Primary ID of Target Chain",
+                "UniProt (TrEMBL) Secondary ID(s) of Target Chain",
+                "UniProt (TrEMBL) Alternative ID(s) of Target Chain",
+                "UniProt (TrEMBL) Submitted Name of Target Chain",
+                "UniProt (TrEMBL) Entry Name of Target Chain",
+                "Target Source Organism According to Curator or DataSource",
+                "PDB ID(s) of Target Chain",
+                "Number of Protein Chains in Target (bigger than 1 implies a multichain complex)",
+            ),
+            hashed=True,
+        ),
+    )
 
-    def __init__(self, fd: Optional[io.BufferedReader] = None):
+    def __init__(
+        self,
+        fd: Optional[io.BufferedReader] = None,
+        keep_mol: bool = False,
+        keep_coordinates: bool = False,
+        compact: bool = False,
+        normalized: bool = False,
+    ):
         """
         Initializes a BindingDB instance.
 
         Args:
             fd (Optional[io.BufferedReader]): The file-like object containing the dataset content.
                 If `fd` is not provided, the dataset content will be fetched from the default source.
+            keep_mol (bool): Whether to keep each parsed molecule as `Mol.ToBinary()` bytes in a
+                "Mol" column, so consumers can rebuild it with `iter_mols()` instead of re-parsing
+                SMILES. The binary variant is cached separately.
+            keep_coordinates (bool): Whether to store the 3D atom coordinates and atomic numbers of
+                every record in ragged arrays next to the cache, see `get_coordinates()`.
+            compact (bool): Whether to store repeated strings (target sequences and names,
+                organisms, sources, ...) as Categorical and IDs and measurements in their
+                smallest exact types, see `aiondata.compact`. The compact variant is cached
+                separately and `get_compaction_report()` lists the memory saved per column.
+            normalized (bool): Whether to cache a star schema instead of the wide table: a
+                "ligands" table keyed by "ligand_id" (the MonomerID), a "targets" table keyed by
+                "target_id" (a hash of the chain sequence), and a slim measurement table with
+                both keys, the affinities and the per-record fields, which `to_df()` and `scan()`
+                return. `scan_wide()` rebuilds the wide table lazily. Cached separately.
+
+        Raises:
+            ValueError: If `normalized` is combined with `keep_coordinates`.
+        """
+        if normalized and keep_coordinates:
+            raise ValueError("BindingDB(normalized=True) can't keep coordinates.")
+        self.keep_mol = keep_mol
+        self.keep_coordinates = keep_coordinates
+        self.compact = compact
+        self.normalized = normalized
+        self._coordinates_written = False
+        self._tables = None
+        if keep_mol:
+            self.SCHEMA = self.SCHEMA + [(MOL_COLUMN, pl.Binary)]
+        if normalized:
+            # Measurements are clustered by target; the wide table is ordered by UniProt ID
+            self.LAYOUT = Layout(sort_by=("target_id",), row_group_size=50_000)
+        if compact:
+            self.LAYOUT = self.LAYOUT._replace(compact=True)
+        # Without a file, the source is opened when the dataset is first parsed, so no
+        # download happens when the Parquet cache exists locally or on the peer cache server
+        self.outer_fd, self.fd = fd if fd is not None else (None, None)
+        # The release of the default source; unknown for files passed by the caller
+        self.release = self.RELEASE if fd is None else None
+
+    def _open_source(self) -> Tuple[Optional[zipfile.ZipFile], io.BufferedReader]:
+        cached_sdf = self.get_cache_path().parent / "BindingDB.sdf.zip"
+        if cached_sdf.exists() or fetch_from_peer(cached_sdf, get_cache_root()):
+            metrics.count("bindingdb.bytes", cached_sdf.stat().st_size)
+            mark_used(cached_sdf)
+            return self.from_compressed_file(cached_sdf)
+        return self.from_url(self.SOURCE)
+
+    def get_cache_name(self) -> str:
+        name = super().get_cache_name()
+        if self.keep_mol:
+            name = f"{name}_mol"
+        if self.normalized:
+            name = f"{name}_normalized"
+        return f"{name}_compact" if self.compact else name
+
+    def get_cache_metadata(self) -> Dict[str, str]:
+        return {"bindingdb.release": self.release} if self.release else {}
+
+    def update(
+        self, source: Union[str, Path], release: str, replace: bool = False
+    ) -> dict:
         """
-        if fd is None:
-            cached_sdf = self.get_cache_path().parent / "BindingDB.sdf.zip"
-            if cached_sdf.exists():
-                self.outer_fd, self.fd = self.from_compressed_file(cached_sdf)
-            else:
-                self.outer_fd, self.fd = self.from_url(self.SOURCE)
+        Merges a newer release or an update file into the existing cache.
+
+        Records are matched on their "BindingDB Reactant_set_id". The SDF is scanned as text
+        first, so only records that are not cached yet are parsed with RDKit. The applied release
+        is stored in the cache metadata (see `read_cache_metadata`), and the caches of datasets
+        built from this one (e.g. BindingAffinity) that exist are rebuilt.
+
+        Args:
+            source (Union[str, Path]): A zipped or plain SDF file, or the URL of a zipped SDF,
+                e.g. `BindingDB.SOURCE_TEMPLATE.format(release="202501")`.
+            release (str): The release or update name to record, e.g. "202501".
+            replace (bool): Whether records already cached are parsed again and replaced, for
+                update files carrying revised records.
+
+        Returns:
+            dict: The release, the number of records added, replaced and skipped, and the
+                rebuilt dependent datasets.
+
+        Raises:
+            ValueError: If the dataset has no cache yet, or keeps coordinates or is normalized,
+                which can't be merged.
+        """
+        if self.keep_coordinates or self.normalized:
+            raise ValueError(
+                "BindingDB(keep_coordinates=True) and BindingDB(normalized=True) can't be "
+                "updated."
+            )
+        cache = self.get_cache_path()
+        if not cache.exists():
+            raise ValueError(f"No cache to update at {cache}, build it with to_df().")
+        cached = pl.read_parquet(cache)
+        known = set(cached.get_column(self.ID_COLUMN).drop_nulls().to_list())
+
+        source = str(source)
+        if "://" in source:
+            outer_fd, fd = self.from_url(source)
+        elif source.endswith(".zip"):
+            outer_fd, fd = self.from_compressed_file(source)
         else:
-            self.outer_fd, self.fd = fd
+            outer_fd, fd = self.from_uncompressed_file(source)
+        selected = cache.with_name(f"{cache.stem}.update.{os.getpid()}.tmp")
+        try:
+            with metrics.span("bindingdb.update.select"):
+                seen, kept = self._select_records(fd, selected, known, replace)
+            fd.close()
+            if outer_fd is not None:
+                outer_fd.close()
+            with metrics.span("bindingdb.update.parse"):
+                new = BindingDB(
+                    self.from_uncompressed_file(selected), keep_mol=self.keep_mol
+                ).get_df()
+        finally:
+            selected.unlink(missing_ok=True)
+        new = self.LAYOUT.apply(new)
+
+        ids = cached.get_column(self.ID_COLUMN)
+        # Compaction may have picked a narrower type for either side; ids that overflow the
+        # cached type are new
+        replaced = ids.is_in(
+            new.get_column(self.ID_COLUMN).cast(ids.dtype, strict=False).implode()
+        )
+        with metrics.span("bindingdb.update.merge"):
+            merged = self.LAYOUT.apply(
+                pl.concat(
+                    [cached.filter(~replaced), new],
+                    how="diagonal_relaxed",
+                )
+            )
+            metadata = self.read_cache_metadata()
+            updates = json.loads(metadata.get("bindingdb.updates", "[]"))
+            updates.append({"release": release, "records": new.height})
+            metadata.update(
+                {"bindingdb.release": release, "bindingdb.updates": json.dumps(updates)}
+            )
+            tmp_cache = cache.with_name(f"{cache.name}.{os.getpid()}.tmp")
+            self.LAYOUT.write(merged, tmp_cache, metadata)
+            tmp_cache.replace(cache)
+        self.release = release
+        metrics.count("bindingdb.update.records", new.height)
+
+        rebuilt = []
+        if not self.keep_mol:
+            for dependent in self.get_dependents():
+                path = dependent.get_cache_path()
+                if path.exists():
+                    path.unlink()
+                    dependent.to_df()
+                    rebuilt.append(type(dependent).__name__)
+        return {
+            "release": release,
+            "added": new.height - int(replaced.sum()),
+            "replaced": int(replaced.sum()),
+            "skipped": seen - kept,
+            "rebuilt": rebuilt,
+        }
+
+    def _select_records(
+        self, fd: io.BufferedReader, path: Path, known: set, replace: bool
+    ) -> Tuple[int, int]:
+        # Copies the SDF records whose id is not in `known` (or all if `replace`) to `path`
+        tag = f"> <{self.ID_COLUMN}>".encode()
+        seen = kept = 0
+        record, record_id, in_tag = [], None, False
+        with open(path, "wb") as out:
+            for line in fd:
+                record.append(line)
+                if in_tag:
+                    record_id = self._convert_to_numeric(
+                        self.ID_COLUMN, line.decode().strip()
+                    )
+                    in_tag = False
+                elif line.startswith(tag):
+                    in_tag = True
+                elif line.startswith(b"$$$$"):
+                    seen += 1
+                    if replace or record_id not in known:
+                        kept += 1
+                        out.writelines(record)
+                    record, record_id = [], None
+        return seen, kept
+
+    def get_df(self) -> pl.DataFrame:
+        df = super().get_df()
+        if self._coordinates_written:
+            self._reorder_coordinates(self.LAYOUT.order(df))
+        if self.normalized:
+            # Laid out as the wide table first, so the tables follow its row order
+            df, self._tables = normalize(type(self).LAYOUT.apply(df), self.DIMENSIONS)
+        return df
+
+    def to_df(self) -> pl.DataFrame:
+        df = super().to_df()
+        if self._coordinates_written:
+            # The coordinate store is closed before the Parquet cache is written; mark it as
+            # derived from this cache so `get_coordinates` does not consider it stale.
+            self._stamp_coordinates(self.get_cache_path())
+            self._coordinates_written = False
+        if self._tables is not None:
+            # Written after the measurements, so `is_derived_fresh` holds
+            layout = Layout(compact=self.compact)
+            for name, table in self._tables.items():
+                layout.write(
+                    layout.apply(table), self.get_derived_path(f"{name}.parquet")
+                )
+            self._tables = None
+        return df
+
+    def scan_table(self, name: str) -> pl.LazyFrame:
+        """
+        Lazily scans a dimension table of the normalized cache, building it if needed.
+
+        A table that is missing or older than the measurement table (e.g. evicted by
+        `aiondata gc`) is rebuilt together with the measurements, from the SDF.
+
+        Args:
+            name (str): "ligands" or "targets", see `DIMENSIONS`.
+
+        Returns:
+            pl.LazyFrame: The table, one row per key.
+
+        Raises:
+            ValueError: If the dataset is not normalized, or the table is unknown.
+        """
+        if not self.normalized:
+            raise ValueError("scan_table() requires BindingDB(normalized=True).")
+        if name not in {dimension.name for dimension in self.DIMENSIONS}:
+            raise ValueError(f"Unknown BindingDB table {name!r}.")
+        cache = self.ensure_cache()
+        path = self.get_derived_path(f"{name}.parquet")
+        if not self.is_derived_fresh(path):
+            cache.unlink()
+            self.to_df()
+        return pl.scan_parquet(path)
+
+    def scan_wide(self, columns: Optional[List[str]] = None) -> pl.LazyFrame:
+        """
+        Lazily rebuilds the wide table from the normalized cache.
+
+        Only the dimension tables holding selected columns are joined, so selecting measurement
+        columns and keys reads the measurement table alone.
+
+        Args:
+            columns (Optional[List[str]]): The columns to select, including "ligand_id" and
+                "target_id" if needed. Defaults to the columns of the wide table.
+
+        Returns:
+            pl.LazyFrame: The selected columns, one row per measurement, with the same values
+                and types as in the wide cache, ordered by "target_id".
+
+        Raises:
+            ValueError: If the dataset is not normalized.
+        """
+        if not self.normalized:
+            raise ValueError("scan_wide() requires BindingDB(normalized=True).")
+        tables = {
+            dimension.name: self.scan_table(dimension.name)
+            for dimension in self.DIMENSIONS
+        }
+        if columns is None:
+            columns = [name for name, _ in self.SCHEMA]
+        return join(self.scan(), tables, self.DIMENSIONS, columns)
+
+    def iter_mols(
+        self,
+        batch_size: int = 1024,
+        func: Optional[Callable[[Optional[Chem.Mol]], Any]] = None,
+        processes: Optional[int] = None,
+    ) -> Iterator[List[Any]]:
+        """
+        Iterates over the cached molecules in batches, rebuilding them from their binary form.
+
+        Requires the dataset to be created with `keep_mol=True`.
+
+        Args:
+            batch_size (int): The number of molecules per batch.
+            func (Optional[Callable]): A picklable function applied to every molecule on a
+                process pool; only its results are returned.
+            processes (Optional[int]): The number of worker processes used with `func`.
+
+        Yields:
+            List: A batch of molecules, or of `func` results.
+        """
+        if not self.keep_mol:
+            raise ValueError("iter_mols() requires BindingDB(keep_mol=True).")
+        return iter_mols(
+            self,
+            column=MOL_COLUMN,
+            batch_size=batch_size,
+            func=func,
+            processes=processes,
+        )
+
+    def get_coordinates(self) -> Conformers:
+        """
+        Returns the 3D coordinates of every record, memory-mapped from the coordinate store.
+
+        The store is written while parsing the SDF with `keep_coordinates=True` and records
+        the modification time and size of the cache it is aligned with. If the Parquet cache
+        already exists without a matching store, the SDF is parsed once more to extract the
+        coordinates only.
+
+        Returns:
+            Conformers: The coordinates and atomic numbers, aligned with the cached rows.
+
+        Raises:
+            ValueError: If the cache was merged from several releases with `update()`, so no
+                single SDF holds its records.
+        """
+        if not self.keep_coordinates:
+            raise ValueError(
+                "get_coordinates() requires BindingDB(keep_coordinates=True)."
+            )
+        cache = self.ensure_cache()
+        path = self.get_derived_path("coordinates")
+        if not self._coordinates_match(cache):
+            if "bindingdb.updates" in self.read_cache_metadata():
+                raise ValueError(
+                    f"{cache} was merged with update(), remove it and rebuild it with "
+                    "BindingDB(keep_coordinates=True) to extract coordinates."
+                )
+            # The store is written in SDF order, the cache in layout order
+            keys = [
+                {column: record.get(column) for column in self.LAYOUT.sort_by}
+                for record in self.to_generator()
+            ]
+            schema = dict(self.SCHEMA)
+            self._reorder_coordinates(
+                self.LAYOUT.order(
+                    pl.DataFrame(
+                        keys,
+                        schema=[
+                            (column, schema[column]) for column in self.LAYOUT.sort_by
+                        ],
+                        strict=False,
+                    )
+                )
+            )
+            records = pl.scan_parquet(cache).select(pl.len()).collect().item()
+            if load_packed(path)[1]["records"] != records:
+                raise ValueError(
+                    f"The BindingDB source does not hold the {records} records of {cache}."
+                )
+            self._stamp_coordinates(cache)
+        return Conformers(load_packed(path)[0])
+
+    def _coordinates_match(self, cache: Path) -> bool:
+        meta = self.get_derived_path("coordinates") / META_FILE
+        if not meta.exists():
+            return False
+        stat = cache.stat()
+        cached = json.loads(meta.read_text()).get("cache")
+        return cached == [stat.st_mtime_ns, stat.st_size]
+
+    def _stamp_coordinates(self, cache: Path) -> None:
+        # Records the cache the store is aligned with
+        meta = self.get_derived_path("coordinates") / META_FILE
+        stat = cache.stat()
+        meta.write_text(
+            json.dumps(
+                {
+                    **json.loads(meta.read_text()),
+                    "cache": [stat.st_mtime_ns, stat.st_size],
+                }
+            )
+        )
+
+    def _reorder_coordinates(self, order: Optional[pl.Series]) -> None:
+        # Rewrites the coordinate store in the row order of the cache, in chunks of records
+        if order is None:
+            return
+        order = order.to_numpy()
+        if np.array_equal(order, np.arange(len(order))):
+            return
+        arrays, meta = load_packed(self.get_derived_path("coordinates"))
+        num_atoms = np.asarray(arrays["num_atoms"])
+        offsets = offsets_from_lengths(num_atoms)
+        writer = self._coordinate_writer()
+        for start in range(0, len(order), 100_000):
+            chunk = order[start : start + 100_000]
+            atoms = ragged_arange(offsets[chunk], num_atoms[chunk])
+            writer.append(
+                coordinates=arrays["coordinates"][atoms],
+                atomic_numbers=arrays["atomic_numbers"][atoms],
+                num_atoms=num_atoms[chunk],
+            )
+        writer.close(records=meta["records"])
+
+    def _coordinate_writer(self) -> PackedArrayWriter:
+        return PackedArrayWriter(
+            self.get_derived_path("coordinates"),
+            {
+                "coordinates": ("<f4", (3,)),
+                "atomic_numbers": ("u1", ()),
+                "num_atoms": ("<i8", ()),
+            },
+        )
 
     def _convert_to_numeric(
         self, prop_name: str, value: str
@@ -151,8 +649,10 @@ class BindingDB(GeneratedDataset):
         Returns:
             A tuple containing the ZipFile instance and a BufferedReader instance containing the content of the SDF file.
         """
-        response = urllib.request.urlopen(url)
-        return BindingDB.from_compressed_file(io.BytesIO(response.read()))
+        with metrics.span("bindingdb.download"):
+            data = urllib.request.urlopen(url).read()
+        metrics.count("bindingdb.bytes", len(data))
+        return BindingDB.from_compressed_file(io.BytesIO(data))
 
     @staticmethod
     def from_compressed_file(
@@ -186,6 +686,17 @@ class BindingDB(GeneratedDataset):
         """
         return None, open(file_path, "rb")
 
+    @staticmethod
+    def _append_coordinates(writer: PackedArrayWriter, mol: Chem.Mol) -> None:
+        if mol.GetNumConformers() == 0:
+            writer.append(num_atoms=[0])
+            return
+        writer.append(
+            coordinates=mol.GetConformer().GetPositions(),
+            atomic_numbers=[atom.GetAtomicNum() for atom in mol.GetAtoms()],
+            num_atoms=[mol.GetNumAtoms()],
+        )
+
     def to_generator(self, progress_bar: bool = True) -> Generator[dict, None, None]:
         """
         Converts the dataset to a generator.
@@ -205,27 +716,81 @@ class BindingDB(GeneratedDataset):
             def pb(x, **kwargs):
                 return x
 
-        with Chem.ForwardSDMolSupplier(self.fd, sanitize=True, removeHs=False) as sd:
-            for mol in pb(sd, desc="Parsing BindingDB", unit=" molecules"):
-                if mol is not None:
-                    record = {
-                        prop: self._convert_to_numeric(prop, mol.GetProp(prop))
-                        for prop in mol.GetPropNames()
-                        if mol.HasProp(prop)
-                    }
+        if self.fd is None:
+            if self.release is None:
+                raise ValueError(
+                    "The file passed to BindingDB was already parsed, pass it again."
+                )
+            with metrics.span("bindingdb.open"):
+                self.outer_fd, self.fd = self._open_source()
+        coordinates = self._coordinate_writer() if self.keep_coordinates else None
+        records = failures = 0
+        # Decompression and RDKit parsing happen while the supplier is iterated; the time
+        # spent by the consumer between records is excluded. Records are only timed when a
+        # metrics sink is installed.
+        timed = metrics.enabled()
+        parse_seconds = convert_seconds = 0.0
+
+        try:
+            with Chem.ForwardSDMolSupplier(
+                self.fd, sanitize=True, removeHs=False
+            ) as sd:
+                resumed = time.perf_counter() if timed else 0.0
+                for mol in pb(sd, desc="Parsing BindingDB", unit=" molecules"):
+                    if timed:
+                        parsed = time.perf_counter()
+                        parse_seconds += parsed - resumed
+                    if mol is None:
+                        failures += 1
+                    else:
+                        if coordinates is not None:
+                            self._append_coordinates(coordinates, mol)
+                        records += 1
+                        record = {
+                            prop: self._convert_to_numeric(prop, mol.GetProp(prop))
+                            for prop in mol.GetPropNames()
+                            if mol.HasProp(prop)
+                        }
+
+                        # Normalize PubChem SID and CID fields that are sometimes present in the SDF
+                        if "PubChem SID" in record:
+                            record["PubChem SID of Ligand"] = record.pop("PubChem SID")
+                        if "PubChem CID" in record:
+                            record["PubChem CID of Ligand"] = record.pop("PubChem CID")
 
-                    # Normalize PubChem SID and CID fields that are sometimes present in the SDF
-                    if "PubChem SID" in record:
-                        record["PubChem SID of Ligand"] = record.pop("PubChem SID")
-                    if "PubChem CID" in record:
-                        record["PubChem CID of Ligand"] = record.pop("PubChem CID")
+                        for column, relation in self.RELATIONS.items():
+                            value = mol.GetProp(column) if mol.HasProp(column) else ""
+                            record[relation] = (
+                                value[0] if value[:1] in ("<", ">") else None
+                            )
+                        record["SMILES"] = Chem.MolToSmiles(mol)
+                        if self.keep_mol:
+                            record[MOL_COLUMN] = mol.ToBinary()
+                        if timed:
+                            convert_seconds += time.perf_counter() - parsed
+                        yield record
+                    if timed:
+                        resumed = time.perf_counter()
+        except BaseException:
+            # Parsing failed or the generator was closed early: leave no partial store behind
+            if coordinates is not None:
+                coordinates.abort()
+            raise
+        finally:
+            metrics.record_span("bindingdb.parse", parse_seconds)
+            metrics.record_span("bindingdb.convert", convert_seconds)
+            metrics.count("bindingdb.records", records)
+            metrics.count("bindingdb.parse_failures", failures)
 
-                    record["SMILES"] = Chem.MolToSmiles(mol)
-                    yield record
+        if coordinates is not None:
+            coordinates.close(records=records)
+            self._coordinates_written = True
 
         self.fd.close()
         if self.outer_fd is not None:
             self.outer_fd.close()
+        # The default source is opened again if the dataset is parsed once more
+        self.outer_fd = self.fd = None
 
         # Re-enable logging
         RDLogger.EnableLog("rdApp.error")
@@ -1,3 +1,8 @@
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import polars as pl
+
 from ..datasets import CsvDataset
 
 
@@ -9,11 +14,59 @@ class MoleculeNet(CsvDataset):
     """
 
     COLLECTION = "moleculenet"
+    SMILES_COLUMN = "smiles"
 
     def __init__(self):
         if self.__class__ is MoleculeNet:
             raise TypeError("MoleculeNet class may not be instantiated directly")
 
+    def get_scaffolds(self, processes: Optional[int] = None) -> pl.Series:
+        """
+        Returns the Bemis-Murcko scaffold of every molecule, computed once and cached.
+
+        Args:
+            processes (Optional[int]): The number of worker processes.
+
+        Returns:
+            pl.Series: The scaffold of each row.
+        """
+        from .. import splits  # Imports RDKit, which plain loading does not need
+
+        return splits.get_scaffolds(self, self.SMILES_COLUMN, processes)
+
+    def get_split(
+        self,
+        kind: str = "scaffold",
+        sizes: Sequence[float] = (0.8, 0.1, 0.1),
+        seed: int = 0,
+        task: Optional[str] = None,
+        processes: Optional[int] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Returns cached train/validation/test row indices.
+
+        Args:
+            kind (str): One of "scaffold", "random" or "stratified".
+            sizes (Sequence[float]): The train, validation and test fractions.
+            seed (int): The random seed.
+            task (Optional[str]): The label column to stratify on, required for stratified splits.
+            processes (Optional[int]): The number of worker processes for scaffold computation.
+
+        Returns:
+            Dict[str, np.ndarray]: Memory-mapped row indices for "train", "valid" and "test".
+        """
+        from .. import splits
+
+        return splits.get_split(
+            self,
+            kind=kind,
+            sizes=sizes,
+            seed=seed,
+            smiles_column=self.SMILES_COLUMN,
+            task=task,
+            processes=processes,
+        )
+
 
 class Tox21(MoleculeNet):
     """Tox21 is a dataset consisting of qualitative toxicity measurements for 12,000 compounds on 12 different targets."""
@@ -105,6 +158,7 @@ class BACE(MoleculeNet):
     """
 
     SOURCE = "https://deepchemdata.s3-us-west-1.amazonaws.com/datasets/bace.csv"
+    SMILES_COLUMN = "mol"
 
 
 class BBBP(MoleculeNet):
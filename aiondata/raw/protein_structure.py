@@ -1,4 +1,5 @@
 from ..datasets import ExcelDataset, CsvDataset, CachedDataset
+from ..quota import enforce_quota
 from Bio import PDB
 import pypdb
 from pypdb.clients.search.operators import text_operators
@@ -113,6 +114,7 @@ class PDBHandler(CachedDataset):
                 self.pdb_list.retrieve_pdb_file(
                     pdb_id, pdir=self.save_dir, file_format=file_format
                 )
+        enforce_quota()
 
     def get_pdb_info(self, pdb_id):
         """
@@ -1,3 +1,4 @@
+import os
 import urllib.request
 import zipfile
 import io
@@ -8,7 +9,10 @@ from scipy.io import mmread
 from scipy.sparse import issparse, coo_matrix
 import numpy as np
 
-from ..datasets import ParquetDataset
+from .. import metrics
+from ..datasets import ParquetDataset, get_cache_root
+from ..peer import fetch_from_peer
+from ..quota import enforce_quota, hold, mark_used
 
 
 class Weizmann3CA(ParquetDataset):
@@ -45,21 +49,26 @@ class Weizmann3CA(ParquetDataset):
 
         data_url = row.get_column("Data")[0]
 
-        zip_file = self._download_or_cache(study_name_to_find, data_url)
+        with metrics.span("weizmann.download", study=study_name_to_find):
+            zip_file = self._download_or_cache(study_name_to_find, data_url)
+        metrics.count("weizmann.bytes", zip_file.stat().st_size)
 
-        with warnings.catch_warnings():
+        with hold(zip_file), warnings.catch_warnings():
             # Polars raises a UserWarning when reading a CSV file from a file-like object
             # The warning is only performance-related and can be safely ignored
             warnings.simplefilter("ignore", UserWarning)
             with zipfile.ZipFile(zip_file) as zip_file:
-                cells = self._load_csv_from_zip(zip_file, "Cells.csv")
-                genes = self._load_gene_list_file(zip_file, "Genes.txt")
-                metadata = self._load_csv_from_zip(zip_file, "Meta-data.csv")
+                with metrics.span("weizmann.read_tables", study=study_name_to_find):
+                    cells = self._load_csv_from_zip(zip_file, "Cells.csv")
+                    genes = self._load_gene_list_file(zip_file, "Genes.txt")
+                    metadata = self._load_csv_from_zip(zip_file, "Meta-data.csv")
                 # Find matrix market file in zip
                 matrix_file_name = [
                     f for f in zip_file.namelist() if f.endswith(".mtx")
                 ][0]
-                exp_data = self._load_mtx_from_zip(zip_file, matrix_file_name)
+                with metrics.span("weizmann.read_matrix", study=study_name_to_find):
+                    exp_data = self._load_mtx_from_zip(zip_file, matrix_file_name)
+        metrics.count("weizmann.records", cells.height)
 
         return cells, genes, metadata, exp_data
 
@@ -110,10 +119,18 @@ class Weizmann3CA(ParquetDataset):
     def _download_or_cache(self, study_name: str, data_url: str) -> "os.PathLike":
         filename = study_name.replace(" ", "_") + ".zip"
         cache = self.get_cache_path().parent / filename
-        if not cache.exists():
+        if not cache.exists() and not fetch_from_peer(cache, get_cache_root()):
             response = urllib.request.urlopen(data_url)
-            with open(cache, "wb") as fd:
-                fd.write(response.read())
+            tmp_path = cache.with_name(f"{cache.name}.{os.getpid()}.tmp")
+            try:
+                with open(tmp_path, "wb") as fd:
+                    fd.write(response.read())
+                tmp_path.replace(cache)
+            finally:
+                tmp_path.unlink(missing_ok=True)
+            with hold(cache):
+                enforce_quota()
+        mark_used(cache)
         return cache
 
     def _load_csv_from_zip(
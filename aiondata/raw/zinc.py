@@ -1,7 +1,12 @@
+import hashlib
+from typing import Sequence
+
 import polars as pl
 from tqdm.auto import tqdm
 
+from aiondata import metrics
 from aiondata.datasets import CachedDataset
+from aiondata.layout import Layout
 
 ZINC20_TRANCHES = [
     "BAAA",
@@ -730,16 +735,42 @@ ZINC20_TRANCHES = [
 class ZINC(CachedDataset):
     """ZINC is a free database of commercially-available compounds for virtual screening."""
 
+    SOURCE = "http://files.docking.org/2D/{prefix}/{tranche}.txt"
+    SMILES_COLUMN = "smiles"
+    # Rows are in the order of `tranches`, so each row group holds few tranches
+    LAYOUT = Layout(row_group_size=100_000)
+
+    def __init__(self, source: str = SOURCE, tranches: Sequence[str] = ZINC20_TRANCHES):
+        """
+        Initializes the ZINC dataset.
+
+        Args:
+            source (str): The location of a tranche file, formatted with the tranche name and
+                its two-letter `prefix`. May be a URL or a local path.
+            tranches (Sequence[str]): The tranches to read. Defaults to all ZINC20 tranches.
+        """
+        self.source = source
+        self.tranches = list(tranches)
+
+    def get_cache_name(self) -> str:
+        name = super().get_cache_name()
+        if self.tranches == ZINC20_TRANCHES:
+            return name
+        key = hashlib.sha1(",".join(self.tranches).encode()).hexdigest()[:12]
+        return f"{name}_{key}"
+
     def get_df(self) -> pl.DataFrame:
-        df = pl.concat(
-            (
-                pl.read_csv(
-                    f"http://files.docking.org/2D/{tranche[:2]}/{tranche}.txt",
-                    separator="\t",
-                )
-                for tranche in tqdm(
-                    ZINC20_TRANCHES, desc="ZINC20 Download", unit=" tranche"
+        frames = []
+        for tranche in tqdm(self.tranches, desc="ZINC20 Download", unit=" tranche"):
+            with metrics.span("zinc.download", tranche=tranche):
+                frames.append(
+                    pl.read_csv(
+                        self.source.format(prefix=tranche[:2], tranche=tranche),
+                        separator="\t",
+                    )
                 )
-            ),
-        )
+        with metrics.span("zinc.concat"):
+            df = pl.concat(frames)
+        metrics.count("zinc.tranches", len(frames))
+        metrics.count("zinc.records", len(df))
         return df
@@ -0,0 +1,241 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import polars as pl
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+LOCK_FILE = ".lock"
+SUFFIX = ".shared"
+
+
+def get_shared_root() -> Path:
+    """
+    Returns the directory holding shared-memory datasets.
+
+    The directory is determined by the environment variable AIONDATA_SHM. It defaults to
+    "/dev/shm/aiondata" where /dev/shm exists (a RAM-backed tmpfs on Linux), and to a directory
+    in the temporary directory elsewhere.
+
+    Returns:
+        Path: The shared-memory directory.
+    """
+    if "AIONDATA_SHM" in os.environ:
+        return Path(os.environ["AIONDATA_SHM"])
+    if Path("/dev/shm").is_dir():
+        return Path("/dev/shm/aiondata")
+    return Path(tempfile.gettempdir()) / "aiondata-shm"
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+@contextmanager
+def _locked(root: Path) -> Iterator[None]:
+    # Serializes publishing, releasing and cleanup between processes on the node
+    root.mkdir(parents=True, exist_ok=True)
+    with open(root / LOCK_FILE, "a") as fd:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+def _leases(path: Path) -> Path:
+    return path.with_name(f"{path.name}.leases")
+
+
+def _live_leases(path: Path) -> List[int]:
+    """Returns the publishers of a shared file that are still running, dropping the others."""
+    leases = _leases(path)
+    alive = []
+    for lease in leases.glob("*") if leases.is_dir() else []:
+        pid = int(lease.name.split("-")[0])
+        if _is_alive(pid):
+            alive.append(pid)
+        else:
+            lease.unlink(missing_ok=True)
+    return alive
+
+
+def _remove(path: Path) -> None:
+    path.unlink(missing_ok=True)
+    shutil.rmtree(_leases(path), ignore_errors=True)
+
+
+def _write_shared(source: Path, columns: Optional[List[str]], path: Path) -> None:
+    # Streamed, and uncompressed so the IPC buffers can be mapped as they are
+    scan = pl.scan_parquet(source)
+    if columns is not None:
+        scan = scan.select(columns)
+    scan.sink_ipc(path, compression="uncompressed")
+
+
+def cleanup_shared(root: Optional[Path] = None) -> List[Path]:
+    """
+    Removes shared datasets whose publishers all exited without closing them, e.g. after a
+    crash, together with partial files left by interrupted publishers.
+
+    This runs automatically on every `SharedFrame.publish`.
+
+    Args:
+        root (Optional[Path]): The shared-memory directory. Defaults to `get_shared_root()`.
+
+    Returns:
+        List[Path]: The removed datasets.
+    """
+    root = Path(root) if root is not None else get_shared_root()
+    if not root.is_dir():
+        return []
+    removed = []
+    with _locked(root):
+        for tmp_path in root.glob("*.tmp"):
+            pid = (
+                tmp_path.suffixes[-2].lstrip(".") if len(tmp_path.suffixes) > 1 else ""
+            )
+            if pid.isdigit() and not _is_alive(int(pid)):
+                tmp_path.unlink(missing_ok=True)
+        for path in root.glob(f"*{SUFFIX}"):
+            if not _live_leases(path):
+                _remove(path)
+                removed.append(path)
+    return removed
+
+
+class SharedFrame:
+    """
+    A dataset published in shared memory as an uncompressed Arrow IPC file.
+
+    A process publishes the file with `SharedFrame.publish`. Any process on the node can then
+    `attach` to it: with the optional pyarrow dependency (the "arrow" extra), the file is
+    memory-mapped and read without copying, so every process gets a read-only DataFrame backed
+    by the same physical pages instead of its own copy. Without pyarrow, `attach` falls back to
+    Polars' IPC reader, which copies every column.
+
+    A SharedFrame is cheap to pickle (it only holds the file path), so it can be handed to
+    multiprocessing or DataLoader workers as a handle. Start those workers with the "spawn" or
+    "forkserver" method (e.g. `DataLoader(..., multiprocessing_context="spawn")`): Polars is
+    not fork-safe once its thread pool is running, and forked workers calling it can deadlock.
+
+    Every publishing process holds a lease on the file. `close` releases the caller's lease and
+    removes the file once no running publisher holds one, so publishers sharing a file never
+    pull it from under each other's workers. Leases of crashed publishers are detected by
+    process id and their files are removed by `cleanup_shared`.
+    """
+
+    def __init__(
+        self, path: Path, owner: Optional[int] = None, lease: Optional[str] = None
+    ):
+        """
+        Args:
+            path (Path): The shared IPC file.
+            owner (Optional[int]): The process id of the publisher holding a lease.
+            lease (Optional[str]): The name of the publisher's lease.
+        """
+        self.path = Path(path)
+        self.owner = owner
+        self.lease = lease
+
+    @classmethod
+    def publish(
+        cls,
+        source: Path,
+        name: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+    ) -> "SharedFrame":
+        """
+        Streams a Parquet file to shared memory, so the publisher never holds the whole dataset.
+
+        The shared file is keyed by the source path, its modification time and the columns, so
+        publishing the same cache again reuses it and only adds a lease.
+
+        Args:
+            source (Path): The Parquet file, e.g. a dataset cache.
+            name (Optional[str]): A readable prefix for the shared file. Defaults to the file stem.
+            columns (Optional[List[str]]): The columns to share. Defaults to all.
+
+        Returns:
+            SharedFrame: The handle of the shared dataset.
+        """
+        source = Path(source)
+        stat = source.stat()
+        key = hashlib.sha1(
+            f"{source.resolve()}:{stat.st_mtime_ns}:{columns}".encode()
+        ).hexdigest()[:16]
+        root = get_shared_root()
+        cleanup_shared(root)
+        path = root / f"{name or source.stem}-{key}{SUFFIX}"
+        pid = os.getpid()
+        lease = f"{pid}-{uuid.uuid4().hex}"
+        with _locked(root):
+            if not path.exists():
+                tmp_path = path.with_name(f"{path.name}.{pid}.tmp")
+                try:
+                    _write_shared(source, columns, tmp_path)
+                    tmp_path.replace(path)
+                finally:
+                    tmp_path.unlink(missing_ok=True)
+            _leases(path).mkdir(exist_ok=True)
+            (_leases(path) / lease).touch()
+        return cls(path, owner=pid, lease=lease)
+
+    def attach(self) -> pl.DataFrame:
+        """
+        Maps the shared dataset into the current process, without copying it if pyarrow is
+        installed.
+
+        Returns:
+            pl.DataFrame: The dataset, backed by the shared memory when pyarrow is installed.
+
+        Raises:
+            FileNotFoundError: If the dataset is no longer published.
+        """
+        if not self.path.exists():
+            raise FileNotFoundError(f"The shared dataset {self.path} was closed.")
+        try:
+            import pyarrow as pa
+        except ImportError:
+            return pl.read_ipc(self.path)
+        # The buffers of the table keep the mapping alive
+        return pl.from_arrow(pa.ipc.open_file(pa.memory_map(str(self.path))).read_all())
+
+    def close(self) -> None:
+        """
+        Releases the lease of the publishing process and removes the shared dataset once no
+        other publisher holds it. Does nothing in other processes.
+        """
+        if self.owner != os.getpid():
+            return
+        self.owner = None
+        with _locked(self.path.parent):
+            (_leases(self.path) / self.lease).unlink(missing_ok=True)
+            if not _live_leases(self.path):
+                _remove(self.path)
+
+    def __enter__(self) -> "SharedFrame":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"SharedFrame({str(self.path)!r})"
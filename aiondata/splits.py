@@ -0,0 +1,288 @@
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import polars as pl
+from rdkit import Chem, RDLogger
+from rdkit.Chem.Scaffolds import MurckoScaffold
+
+from .datasets import CachedDataset
+from .parallel import parallel_map
+
+SPLIT_NAMES = ("train", "valid", "test")
+SPLIT_KINDS = ("scaffold", "random", "stratified")
+
+
+def murcko_scaffold(smiles: Optional[str]) -> Optional[str]:
+    """
+    Computes the Bemis-Murcko scaffold of a molecule.
+
+    Args:
+        smiles (Optional[str]): The SMILES string of the molecule.
+
+    Returns:
+        Optional[str]: The scaffold SMILES (empty for acyclic molecules), or None if the SMILES
+            cannot be parsed.
+    """
+    RDLogger.DisableLog("rdApp.*")
+    mol = Chem.MolFromSmiles(smiles) if smiles else None
+    if mol is None:
+        return None
+    return MurckoScaffold.MurckoScaffoldSmiles(mol=mol, includeChirality=False)
+
+
+def _check_sizes(sizes: Sequence[float]) -> Tuple[float, float, float]:
+    if len(sizes) != 3 or min(sizes) < 0 or not np.isclose(sum(sizes), 1.0):
+        raise ValueError(
+            "sizes must be three non-negative fractions (train, valid, test) summing to 1."
+        )
+    return tuple(float(size) for size in sizes)
+
+
+def _cut(indices: np.ndarray, sizes: Sequence[float]) -> Dict[str, np.ndarray]:
+    bounds = np.round(np.cumsum(sizes)[:2] * len(indices)).astype(int)
+    return dict(zip(SPLIT_NAMES, np.split(indices, bounds)))
+
+
+def random_split(
+    n: int, sizes: Sequence[float] = (0.8, 0.1, 0.1), seed: int = 0
+) -> Dict[str, np.ndarray]:
+    """
+    Splits row indices uniformly at random.
+
+    Args:
+        n (int): The number of rows.
+        sizes (Sequence[float]): The train, validation and test fractions.
+        seed (int): The random seed.
+
+    Returns:
+        Dict[str, np.ndarray]: Sorted row indices for "train", "valid" and "test".
+    """
+    sizes = _check_sizes(sizes)
+    permutation = np.random.default_rng(seed).permutation(n)
+    return {name: np.sort(part) for name, part in _cut(permutation, sizes).items()}
+
+
+def group_split(
+    groups: Sequence,
+    sizes: Sequence[float] = (0.8, 0.1, 0.1),
+    seed: int = 0,
+) -> Dict[str, np.ndarray]:
+    """
+    Splits row indices so that rows of the same group end up in the same split.
+
+    Groups too large to fit in half of the validation or test split are assigned first, the
+    remaining groups follow in a seeded random order (as in the "balanced" scaffold split). Rows
+    without a group form singleton groups.
+
+    Args:
+        groups (Sequence): The group of each row, e.g. a scaffold or a sequence cluster.
+        sizes (Sequence[float]): The train, validation and test fractions.
+        seed (int): The random seed.
+
+    Returns:
+        Dict[str, np.ndarray]: Sorted row indices for "train", "valid" and "test".
+    """
+    sizes = _check_sizes(sizes)
+    n = len(groups)
+    train_size, valid_size = sizes[0] * n, sizes[1] * n
+    test_size = n - train_size - valid_size
+
+    groups = (
+        pl.DataFrame({"group": pl.Series(groups).cast(pl.Utf8)})
+        .with_row_index("index")
+        .with_columns(
+            pl.when(pl.col("group").is_null())
+            .then(pl.format("#{}", pl.col("index")))
+            .otherwise(pl.col("group"))
+            .alias("group")
+        )
+        .group_by("group", maintain_order=True)
+        .agg(pl.col("index"))
+        .get_column("index")
+        .to_list()
+    )
+
+    rng = np.random.default_rng(seed)
+    big = [g for g in groups if len(g) > valid_size / 2 or len(g) > test_size / 2]
+    small = [
+        g for g in groups if not (len(g) > valid_size / 2 or len(g) > test_size / 2)
+    ]
+    big = [big[i] for i in rng.permutation(len(big))]
+    small = [small[i] for i in rng.permutation(len(small))]
+
+    parts = {name: [] for name in SPLIT_NAMES}
+    counts = dict.fromkeys(SPLIT_NAMES, 0)
+    for group in big + small:
+        if counts["train"] + len(group) <= train_size:
+            name = "train"
+        elif counts["valid"] + len(group) <= valid_size:
+            name = "valid"
+        else:
+            name = "test"
+        parts[name].extend(group)
+        counts[name] += len(group)
+    return {name: np.sort(np.asarray(parts[name], dtype=np.int64)) for name in parts}
+
+
+def scaffold_split(
+    scaffolds: Sequence[Optional[str]],
+    sizes: Sequence[float] = (0.8, 0.1, 0.1),
+    seed: int = 0,
+) -> Dict[str, np.ndarray]:
+    """
+    Splits row indices so that molecules sharing a scaffold end up in the same split.
+
+    Molecules with no scaffold (unparsable SMILES) form singleton sets, see `group_split`.
+
+    Args:
+        scaffolds (Sequence[Optional[str]]): The scaffold of each row.
+        sizes (Sequence[float]): The train, validation and test fractions.
+        seed (int): The random seed.
+
+    Returns:
+        Dict[str, np.ndarray]: Sorted row indices for "train", "valid" and "test".
+    """
+    return group_split(scaffolds, sizes, seed)
+
+
+def stratified_split(
+    labels: Sequence,
+    sizes: Sequence[float] = (0.8, 0.1, 0.1),
+    seed: int = 0,
+    bins: int = 10,
+) -> Dict[str, np.ndarray]:
+    """
+    Splits row indices so that every split has the same label distribution.
+
+    Labels with more than `bins` distinct values (regression targets) are stratified by quantile
+    bins. Missing labels form their own stratum.
+
+    Args:
+        labels (Sequence): The task label of each row.
+        sizes (Sequence[float]): The train, validation and test fractions.
+        seed (int): The random seed.
+        bins (int): The number of quantile bins for continuous labels.
+
+    Returns:
+        Dict[str, np.ndarray]: Sorted row indices for "train", "valid" and "test".
+    """
+    sizes = _check_sizes(sizes)
+    labels = pl.Series("label", labels)
+    if labels.dtype.is_numeric() and labels.n_unique() > bins:
+        strata = (labels.rank("ordinal") - 1) * bins // labels.count()
+    else:
+        strata = labels.rank("dense")
+    strata = strata.fill_null(-1).to_numpy()
+
+    rng = np.random.default_rng(seed)
+    parts = {name: [] for name in SPLIT_NAMES}
+    for stratum in np.unique(strata):
+        members = rng.permutation(np.flatnonzero(strata == stratum))
+        for name, part in _cut(members, sizes).items():
+            parts[name].append(part)
+    return {name: np.sort(np.concatenate(parts[name])) for name in parts}
+
+
+def get_scaffolds(
+    dataset: CachedDataset, smiles_column: str, processes: Optional[int] = None
+) -> pl.Series:
+    """
+    Returns the Bemis-Murcko scaffold of every row of a dataset.
+
+    Scaffolds are computed once on a process pool and cached as a "scaffold" column next to the
+    dataset cache, aligned with its rows.
+
+    Args:
+        dataset (CachedDataset): The dataset.
+        smiles_column (str): The column holding the SMILES strings.
+        processes (Optional[int]): The number of worker processes.
+
+    Returns:
+        pl.Series: The scaffold of each row.
+    """
+    path = dataset.get_derived_path("scaffolds.parquet")
+    if dataset.is_derived_fresh(path):
+        return pl.read_parquet(path).get_column("scaffold")
+
+    smiles = (
+        pl.scan_parquet(dataset.ensure_cache())
+        .select(smiles_column)
+        .collect()
+        .get_column(smiles_column)
+    )
+    scaffolds = pl.Series(
+        "scaffold",
+        parallel_map(
+            murcko_scaffold, smiles, processes=processes, desc="Computing scaffolds"
+        ),
+        dtype=pl.Utf8,
+    )
+    scaffolds.to_frame().write_parquet(path)
+    return scaffolds
+
+
+def get_split(
+    dataset: CachedDataset,
+    kind: str = "scaffold",
+    sizes: Sequence[float] = (0.8, 0.1, 0.1),
+    seed: int = 0,
+    smiles_column: Optional[str] = None,
+    task: Optional[str] = None,
+    processes: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Returns deterministic train/validation/test row indices for a dataset.
+
+    Splits are cached per kind, task, sizes and seed as .npy files next to the dataset cache and
+    loaded as read-only memory maps.
+
+    Args:
+        dataset (CachedDataset): The dataset to split.
+        kind (str): One of "scaffold", "random" or "stratified".
+        sizes (Sequence[float]): The train, validation and test fractions.
+        seed (int): The random seed.
+        smiles_column (Optional[str]): The SMILES column, required for scaffold splits.
+        task (Optional[str]): The label column, required for stratified splits.
+        processes (Optional[int]): The number of worker processes for scaffold computation.
+
+    Returns:
+        Dict[str, np.ndarray]: Sorted row indices for "train", "valid" and "test".
+
+    Raises:
+        ValueError: If the split kind is unknown or a required column is missing.
+    """
+    if kind not in SPLIT_KINDS:
+        raise ValueError(f"Unknown split kind {kind}, expected one of {SPLIT_KINDS}.")
+    if kind == "scaffold" and smiles_column is None:
+        raise ValueError("A scaffold split requires a SMILES column.")
+    if kind == "stratified" and task is None:
+        raise ValueError("A stratified split requires a task column.")
+    sizes = _check_sizes(sizes)
+
+    name = "-".join(
+        [kind]
+        + ([task.replace("/", "_")] if kind == "stratified" else [])
+        + [f"seed{seed}", "_".join(f"{size:g}" for size in sizes)]
+    )
+    split_dir = dataset.get_derived_path("splits") / name
+    paths = {part: split_dir / f"{part}.npy" for part in SPLIT_NAMES}
+    if all(dataset.is_derived_fresh(path) for path in paths.values()):
+        return {part: np.load(path, mmap_mode="r") for part, path in paths.items()}
+
+    if kind == "scaffold":
+        split = scaffold_split(
+            get_scaffolds(dataset, smiles_column, processes).to_list(), sizes, seed
+        )
+    else:
+        frame = pl.scan_parquet(dataset.ensure_cache())
+        if kind == "random":
+            n = frame.select(pl.len()).collect().item()
+            split = random_split(n, sizes, seed)
+        else:
+            labels = frame.select(task).collect().get_column(task)
+            split = stratified_split(labels, sizes, seed)
+
+    split_dir.mkdir(parents=True, exist_ok=True)
+    for part, path in paths.items():
+        np.save(path, split[part])
+    return {part: np.load(path, mmap_mode="r") for part, path in paths.items()}
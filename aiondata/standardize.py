@@ -0,0 +1,123 @@
+from typing import Optional
+
+import polars as pl
+from rdkit import Chem, RDLogger
+from rdkit.Chem.MolStandardize import rdMolStandardize
+
+from .datasets import CachedDataset, slugify
+from .memo import KEY, ResultStore
+from .parallel import parallel_map
+
+# Bump when the standardization pipeline changes so stale results are not reused
+STANDARDIZER_VERSION = 1
+STANDARDIZED_COLUMN = "standardized_smiles"
+
+_uncharger = None
+_tautomer_enumerator = None
+
+
+def standardize_smiles(smiles: Optional[str]) -> Optional[str]:
+    """
+    Standardizes a molecule.
+
+    The molecule is cleaned up, stripped of salts and solvents (keeping the parent fragment),
+    neutralized and converted to its canonical tautomer.
+
+    Args:
+        smiles (Optional[str]): The SMILES string of the molecule.
+
+    Returns:
+        Optional[str]: The canonical SMILES of the standardized molecule, or None if the SMILES
+            cannot be parsed or standardized.
+    """
+    global _uncharger, _tautomer_enumerator
+    if _uncharger is None:
+        RDLogger.DisableLog("rdApp.*")
+        _uncharger = rdMolStandardize.Uncharger()
+        _tautomer_enumerator = rdMolStandardize.TautomerEnumerator()
+
+    mol = Chem.MolFromSmiles(smiles) if smiles else None
+    if mol is None:
+        return None
+    try:
+        mol = rdMolStandardize.Cleanup(mol)
+        mol = rdMolStandardize.FragmentParent(mol)
+        mol = _uncharger.uncharge(mol)
+        mol = _tautomer_enumerator.Canonicalize(mol)
+        return Chem.MolToSmiles(mol)
+    except (RuntimeError, ValueError):
+        return None
+
+
+def standardize_series(smiles: pl.Series, processes: Optional[int] = None) -> pl.Series:
+    """
+    Standardizes a series of SMILES strings, memoizing results across calls.
+
+    Distinct SMILES are looked up in a persistent store under the cache root first; only unseen
+    molecules are standardized, on a process pool, and their results are added to the store.
+
+    Args:
+        smiles (pl.Series): The SMILES strings.
+        processes (Optional[int]): The number of worker processes.
+
+    Returns:
+        pl.Series: The standardized SMILES, aligned with the input.
+    """
+    store = ResultStore(f"standardize-v{STANDARDIZER_VERSION}")
+
+    def compute(missing: pl.Series) -> pl.DataFrame:
+        standardized = parallel_map(
+            standardize_smiles,
+            missing,
+            processes=processes,
+            desc="Standardizing molecules",
+        )
+        return pl.DataFrame(
+            {
+                KEY: missing,
+                STANDARDIZED_COLUMN: pl.Series(standardized, dtype=pl.Utf8),
+            }
+        )
+
+    return store.get_or_compute(smiles, compute).get_column(STANDARDIZED_COLUMN)
+
+
+def standardize(
+    dataset: CachedDataset,
+    column: Optional[str] = None,
+    processes: Optional[int] = None,
+) -> pl.Series:
+    """
+    Returns standardized SMILES for every row of a dataset.
+
+    The result is cached as a "standardized_smiles" column next to the dataset cache, aligned
+    with its rows, so it can be attached with `dataset.to_df().with_columns(...)`.
+
+    Args:
+        dataset (CachedDataset): The dataset.
+        column (Optional[str]): The SMILES column. Defaults to the dataset's SMILES_COLUMN.
+        processes (Optional[int]): The number of worker processes.
+
+    Returns:
+        pl.Series: The standardized SMILES of each row.
+
+    Raises:
+        ValueError: If no SMILES column is given and the dataset does not declare one.
+    """
+    column = dataset.get_smiles_column(column)
+
+    path = dataset.get_derived_path(
+        f"{slugify(column)}.standardized.v{STANDARDIZER_VERSION}.parquet"
+    )
+    if dataset.is_derived_fresh(path):
+        return pl.read_parquet(path).get_column(STANDARDIZED_COLUMN)
+
+    smiles = (
+        pl.scan_parquet(dataset.ensure_cache())
+        .select(column)
+        .collect()
+        .get_column(column)
+    )
+    standardized = standardize_series(smiles, processes=processes)
+    standardized.to_frame().write_parquet(path)
+    return standardized
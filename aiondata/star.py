@@ -0,0 +1,153 @@
+"""
+Normalized (star schema) storage of wide datasets.
+
+A wide dataset repeats the attributes of the same ligand or target on every measurement row. A
+`Dimension` moves such attributes to a table with one row per integer key, and the remaining
+fact table holds the keys instead, so it stays small and cheap to scan. `join` rebuilds the
+wide view lazily, joining only the dimensions whose columns are selected.
+
+Only attributes that have a single value per key are moved, so the wide view is always rebuilt
+exactly; an attribute that varies for the same key (e.g. a per-record name) stays in the fact
+table.
+"""
+
+import hashlib
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+import polars as pl
+
+# Temporary columns of `join`
+ROW_INDEX, NULL_KEY, FILLED_KEY = "__row_index", "__null_key", "__filled_key"
+
+
+class Dimension(NamedTuple):
+    """A table of attributes shared by the rows with the same key."""
+
+    # The name of the table, e.g. "ligands"
+    name: str
+    # The integer key column in both tables, e.g. "ligand_id"
+    key: str
+    # The column the key is computed from
+    source: str
+    # The attributes moved to the table if they have a single value per key
+    columns: Tuple[str, ...] = ()
+    # Whether the key is a hash of the source, otherwise the source cast to an integer
+    hashed: bool = False
+
+    def get_keys(self, df: pl.DataFrame) -> pl.Series:
+        """
+        Computes the key of every row.
+
+        Args:
+            df (pl.DataFrame): The wide dataset.
+
+        Returns:
+            pl.Series: The Int64 keys, null where the source is null.
+        """
+        source = df.get_column(self.source)
+        if not self.hashed:
+            return source.cast(pl.Int64, strict=False).alias(self.key)
+        return hash_strings(source).alias(self.key)
+
+
+def hash_strings(series: pl.Series) -> pl.Series:
+    """
+    Hashes strings to Int64 keys that are stable across processes and Polars versions.
+
+    Args:
+        series (pl.Series): The strings.
+
+    Returns:
+        pl.Series: The first 8 bytes of the BLAKE2b digest of each string, or null.
+    """
+    series = series.cast(pl.Utf8)
+    values = series.drop_nulls().unique()
+    hashes = [
+        int.from_bytes(
+            hashlib.blake2b(value.encode(), digest_size=8).digest(),
+            "little",
+            signed=True,
+        )
+        for value in values
+    ]
+    return series.replace_strict(
+        values, pl.Series(hashes, dtype=pl.Int64), default=None, return_dtype=pl.Int64
+    )
+
+
+def normalize(
+    df: pl.DataFrame, dimensions: Sequence[Dimension]
+) -> Tuple[pl.DataFrame, Dict[str, pl.DataFrame]]:
+    """
+    Splits a wide dataset into a fact table and dimension tables.
+
+    Args:
+        df (pl.DataFrame): The wide dataset.
+        dimensions (Sequence[Dimension]): The dimensions to split out.
+
+    Returns:
+        Tuple[pl.DataFrame, Dict[str, pl.DataFrame]]: The fact table, with a key column per
+            dimension in place of the moved attributes and in the row order of `df`, and each
+            dimension table by name, sorted by key.
+    """
+    df = df.with_columns(dimension.get_keys(df) for dimension in dimensions)
+    tables = {}
+    for dimension in dimensions:
+        candidates = [
+            column
+            for column in (dimension.source, *dimension.columns)
+            if column in df.columns
+        ]
+        # Null counts as a value, so nulls next to non-null values for a key are kept too
+        counts = df.group_by(dimension.key).agg(pl.col(candidates).n_unique()).max()
+        moved = [column for column in candidates if (counts[column].item() or 0) <= 1]
+        tables[dimension.name] = (
+            df.select(dimension.key, *moved)
+            .unique(dimension.key, keep="first", maintain_order=True)
+            .sort(dimension.key, nulls_last=True)
+        )
+        df = df.drop(moved)
+    return df, tables
+
+
+def join(
+    fact: pl.LazyFrame,
+    tables: Dict[str, pl.LazyFrame],
+    dimensions: Sequence[Dimension],
+    columns: List[str],
+) -> pl.LazyFrame:
+    """
+    Lazily rebuilds the wide view of a normalized dataset.
+
+    Args:
+        fact (pl.LazyFrame): The fact table.
+        tables (Dict[str, pl.LazyFrame]): The dimension tables by name.
+        dimensions (Sequence[Dimension]): The dimensions of the dataset.
+        columns (List[str]): The columns to select, in order, from the wide view or the keys.
+
+    Returns:
+        pl.LazyFrame: The selected columns, in the row order of the fact table. Dimension
+            tables with none of them are not read.
+    """
+    # Joins do not keep the row order in every Polars version, so rows are sorted back by index
+    fact = fact.with_row_index(ROW_INDEX)
+    for dimension in dimensions:
+        table = tables[dimension.name]
+        needed = [
+            column
+            for column in table.collect_schema().names()
+            if column in columns and column != dimension.key
+        ]
+        if needed:
+            key = pl.col(dimension.key)
+            # Null keys don't match in joins, so they are matched on a null flag instead
+            on = [
+                key.is_null().alias(NULL_KEY),
+                key.fill_null(0).alias(FILLED_KEY),
+            ]
+            fact = (
+                fact.with_columns(on)
+                .join(table.select(*on, *needed), on=[NULL_KEY, FILLED_KEY], how="left")
+                .drop(NULL_KEY, FILLED_KEY)
+            )
+    return fact.sort(ROW_INDEX).select(columns)
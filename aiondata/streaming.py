@@ -0,0 +1,211 @@
+import os
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import polars as pl
+
+from .parquet import row_group_sizes
+
+FORMATS = ("polars", "numpy", "arrow")
+
+
+def shard_info(
+    worker: Optional[int] = None,
+    num_workers: Optional[int] = None,
+    rank: Optional[int] = None,
+    world_size: Optional[int] = None,
+) -> Tuple[int, int]:
+    """
+    Resolves the shard of the current process among all data loader workers of all ranks.
+
+    Unset values are taken from the environment: the worker from
+    `torch.utils.data.get_worker_info()` when PyTorch is already imported, and the rank from the
+    RANK and WORLD_SIZE environment variables set by distributed launchers.
+
+    Returns:
+        Tuple[int, int]: The shard index and the number of shards.
+    """
+    if worker is None or num_workers is None:
+        torch = sys.modules.get("torch")
+        info = torch.utils.data.get_worker_info() if torch is not None else None
+        worker = info.id if info is not None else 0
+        num_workers = info.num_workers if info is not None else 1
+    if rank is None or world_size is None:
+        rank = int(os.environ.get("RANK", 0))
+        world_size = int(os.environ.get("WORLD_SIZE", 1))
+    if not (0 <= worker < num_workers and 0 <= rank < world_size):
+        raise ValueError(
+            f"Invalid shard: worker {worker} of {num_workers}, rank {rank} of {world_size}."
+        )
+    return rank * num_workers + worker, world_size * num_workers
+
+
+def _read_chunk(
+    path: Path, columns: Optional[List[str]], offset: int, length: int
+) -> pl.DataFrame:
+    scan = pl.scan_parquet(path)
+    if columns is not None:
+        scan = scan.select(columns)
+    return scan.slice(offset, length).collect()
+
+
+def _prefetch(
+    path: Path,
+    columns: Optional[List[str]],
+    chunks: Sequence[Tuple[int, int]],
+    prefetch: int,
+) -> Iterator[pl.DataFrame]:
+    # Polars releases the GIL while decoding Parquet, so reading on threads overlaps with the
+    # consumer without copying data between processes.
+    with ThreadPoolExecutor(max_workers=max(prefetch, 1)) as executor:
+        pending = deque()
+        for offset, length in chunks:
+            pending.append(executor.submit(_read_chunk, path, columns, offset, length))
+            if len(pending) > prefetch:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _require_pyarrow() -> None:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        raise ImportError(
+            'format="arrow" requires pyarrow, install it with `pip install aiondata[arrow]`.'
+        ) from e
+
+
+def _convert(batch: pl.DataFrame, format: str):
+    if format == "numpy":
+        return {name: batch.get_column(name).to_numpy() for name in batch.columns}
+    if format == "arrow":
+        return batch.to_arrow()
+    return batch
+
+
+def iter_parquet_batches(
+    path: Path,
+    batch_size: int = 1024,
+    columns: Optional[List[str]] = None,
+    shuffle: bool = True,
+    seed: int = 0,
+    epoch: int = 0,
+    buffer_size: int = 65536,
+    prefetch: int = 2,
+    worker: Optional[int] = None,
+    num_workers: Optional[int] = None,
+    rank: Optional[int] = None,
+    world_size: Optional[int] = None,
+    drop_last: bool = False,
+    format: str = "polars",
+) -> Iterator[Union[pl.DataFrame, dict]]:
+    """
+    Streams batches from a Parquet file without loading it in memory.
+
+    The file is read one row group at a time, using the row group boundaries of the Parquet
+    footer, so every row group is decoded once. With `shuffle`, the row group order is a
+    permutation seeded by `seed` and `epoch`, and rows are mixed in a shuffle buffer: row groups
+    accumulate until the buffer holds `buffer_size` rows, the buffer is permuted and batches are
+    emitted until half of it is left to mix with the next row groups. Upcoming row groups are
+    read ahead on `prefetch` threads.
+
+    Row groups are dealt round-robin to shards, so every data loader worker of every rank reads
+    a disjoint part of the file; see `shard_info`. All shards must use the same seed and epoch.
+    A file needs at least as many row groups as shards to keep every shard busy.
+
+    Args:
+        path (Path): The Parquet file.
+        batch_size (int): The number of rows per batch.
+        columns (Optional[List[str]]): The columns to read. Defaults to all.
+        shuffle (bool): Whether to shuffle row groups and rows.
+        seed (int): The random seed.
+        epoch (int): The epoch, combined with the seed so each epoch has a different order.
+        buffer_size (int): The number of rows of the shuffle buffer.
+        prefetch (int): The number of row groups read ahead.
+        worker (Optional[int]): The data loader worker index.
+        num_workers (Optional[int]): The number of data loader workers.
+        rank (Optional[int]): The distributed rank.
+        world_size (Optional[int]): The number of distributed ranks.
+        drop_last (bool): Whether to drop the last incomplete batch.
+        format (str): "polars" for DataFrames, "numpy" for dicts of arrays or "arrow" for
+            pyarrow Tables (requires the optional pyarrow dependency, the "arrow" extra).
+
+    Returns:
+        Iterator: The batches.
+
+    Raises:
+        ValueError: If the format or the shard is invalid.
+        ImportError: If the format is "arrow" and pyarrow is not installed.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown batch format {format!r}, expected one of {FORMATS}.")
+    if format == "arrow":
+        _require_pyarrow()
+    shard, num_shards = shard_info(worker, num_workers, rank, world_size)
+    return _iter_batches(
+        path,
+        batch_size,
+        columns,
+        shuffle,
+        seed,
+        epoch,
+        buffer_size,
+        prefetch,
+        shard,
+        num_shards,
+        drop_last,
+        format,
+    )
+
+
+def _iter_batches(
+    path: Path,
+    batch_size: int,
+    columns: Optional[List[str]],
+    shuffle: bool,
+    seed: int,
+    epoch: int,
+    buffer_size: int,
+    prefetch: int,
+    shard: int,
+    num_shards: int,
+    drop_last: bool,
+    format: str,
+) -> Iterator[Union[pl.DataFrame, dict]]:
+    # A separate generator, so invalid arguments raise when iter_parquet_batches is called
+    sizes = row_group_sizes(path)
+    offsets = np.cumsum([0, *sizes[:-1]], dtype=np.int64)
+    rng = np.random.default_rng([seed, epoch])
+    groups = np.arange(len(sizes))
+    if shuffle:
+        groups = rng.permutation(groups)
+    groups = groups[shard::num_shards]
+    chunks = [(int(offsets[group]), sizes[group]) for group in groups]
+    # Shards draw their row permutations from independent streams
+    rng = np.random.default_rng([seed, epoch, shard])
+
+    buffer = None
+    for chunk in _prefetch(path, columns, chunks, prefetch):
+        buffer = chunk if buffer is None else pl.concat([buffer, chunk])
+        if len(buffer) < max(buffer_size, batch_size):
+            continue
+        if shuffle:
+            buffer = buffer[rng.permutation(len(buffer))]
+        ready = (len(buffer) - buffer_size // 2) // batch_size * batch_size
+        for start in range(0, ready, batch_size):
+            yield _convert(buffer.slice(start, batch_size), format)
+        buffer = buffer.slice(ready)
+
+    if buffer is None:
+        return
+    if shuffle:
+        buffer = buffer[rng.permutation(len(buffer))]
+    for start in range(0, len(buffer), batch_size):
+        batch = buffer.slice(start, batch_size)
+        if len(batch) == batch_size or not drop_last:
+            yield _convert(batch, format)
@@ -0,0 +1,345 @@
+import hashlib
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import polars as pl
+
+from .datasets import CachedDataset, slugify
+from .packed import (
+    META_FILE,
+    PackedArrayWriter,
+    load_packed,
+    offsets_from_lengths,
+    ragged_arange,
+)
+
+# Bump when the tokenization changes so stale token caches are rebuilt
+TOKEN_VERSION = 1
+
+PAD, UNK = "<pad>", "<unk>"
+SPECIAL_TOKENS = [PAD, UNK]
+PAD_ID, UNK_ID = 0, 1
+
+AMINO_ACIDS = "ACDEFGHIKLMNPQRSTVWYXBZUO"
+PROTEIN_VOCAB = SPECIAL_TOKENS + list(AMINO_ACIDS)
+
+# Bracket atoms, two-letter organic atoms and ring bond numbers are single tokens, and the
+# trailing catch-all keeps every character so no input is silently dropped.
+SMILES_PATTERN = (
+    r"\[[^\]]+\]|Br?|Cl?|N|O|S|P|F|I|b|c|n|o|s|p|\(|\)|\.|=|#|-|\+|\\|/|:|~|@|\?|>|\*|\$"
+    r"|%[0-9]{2}|[0-9]|."
+)
+
+KINDS = ("smiles", "protein")
+
+
+# Tokens added to SMILES_VOCAB after its first release. Token ids are positions in the final
+# vocabulary, which concatenates the lists below, so new tokens only go at the end of this list;
+# adding them anywhere else shifts the ids of every later token.
+SMILES_EXTRA_TOKENS: List[str] = []
+
+
+def _smiles_vocab() -> List[str]:
+    # Frozen: see SMILES_EXTRA_TOKENS to add tokens
+    organic = ["B", "C", "N", "O", "P", "S", "F", "Cl", "Br", "I"]
+    aromatic = ["b", "c", "n", "o", "p", "s"]
+    symbols = list("()[].=#-+\\/:~@?>*$") + list("0123456789")
+    ring_bonds = [f"%{i:02d}" for i in range(10, 100)]
+    elements = organic + aromatic + ["H", "se", "as", "te"]
+    elements += "Li Na K Rb Cs Be Mg Ca Sr Ba Al Ga In Tl Si Ge Sn Pb Sb Bi".split()
+    elements += (
+        "Zn Cu Fe Co Ni Mn Cr V Ti Pt Pd Ru Rh Ir Os Au Ag Hg Cd Mo W Gd".split()
+    )
+    elements += "Se Te As Tc Re".split()
+    isotopes = "2H 3H 11C 13C 14C 15N 17O 18O 18F 32P 35S 99Tc 123I 125I 131I".split()
+    brackets = [
+        f"[{element}{chirality}{hydrogens}{charge}]"
+        for element in isotopes + elements
+        for chirality in ["", "@", "@@"]
+        for hydrogens in ["", "H", "H2", "H3", "H4"]
+        for charge in ["", "+", "-", "+2", "-2", "+3", "-3", "+4"]
+    ]
+    return (
+        SPECIAL_TOKENS
+        + organic
+        + aromatic
+        + symbols
+        + ring_bonds
+        + brackets
+        + SMILES_EXTRA_TOKENS
+    )
+
+
+# The default SMILES vocabulary is fixed, so token ids mean the same across datasets and
+# releases. Bracket atoms cover common elements, isotopes, chirality, hydrogens and charges;
+# rarer ones map to UNK unless a custom vocabulary is passed.
+SMILES_VOCAB = _smiles_vocab()
+
+
+def build_smiles_vocab(smiles: pl.Series) -> List[str]:
+    """
+    Builds a vocabulary from the tokens found in some SMILES.
+
+    The ids depend on the data, so pass the same vocabulary wherever the ids are compared,
+    e.g. when tokenizing the training and test sets of a model.
+
+    Args:
+        smiles (pl.Series): The SMILES.
+
+    Returns:
+        List[str]: The special tokens followed by the sorted tokens found in `smiles`.
+    """
+    tokens = smiles.drop_nulls().str.extract_all(SMILES_PATTERN).explode().drop_nulls()
+    return SPECIAL_TOKENS + sorted(tokens.unique().to_list())
+
+
+def vocab_hash(vocab: List[str]) -> str:
+    """Returns a short hash identifying a vocabulary."""
+    return hashlib.sha1("\n".join(vocab).encode()).hexdigest()[:12]
+
+
+def encode_proteins(sequences: pl.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Encodes protein sequences one residue per token, vectorized over all sequences at once.
+
+    Args:
+        sequences (pl.Series): The sequences. Nulls are encoded as empty sequences.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The concatenated uint8 token ids (indices into
+            PROTEIN_VOCAB, unknown residues map to UNK_ID) and the offsets of each sequence.
+    """
+    sequences = sequences.fill_null("")
+    lengths = sequences.str.len_bytes().to_numpy().astype(np.int64)
+    table = np.full(256, UNK_ID, dtype=np.uint8)
+    for token_id, residue in enumerate(AMINO_ACIDS, len(SPECIAL_TOKENS)):
+        table[ord(residue)] = table[ord(residue.lower())] = token_id
+    residues = np.frombuffer("".join(sequences.to_list()).encode(), np.uint8)
+    return table[residues], offsets_from_lengths(lengths)
+
+
+def encode_smiles(
+    smiles: pl.Series, vocab: Optional[List[str]] = None
+) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """
+    Splits SMILES into tokens with SMILES_PATTERN and encodes them, vectorized with Polars.
+
+    Args:
+        smiles (pl.Series): The SMILES. Nulls are encoded as empty sequences.
+        vocab (Optional[List[str]]): The vocabulary to encode with, starting with SPECIAL_TOKENS.
+            Defaults to SMILES_VOCAB.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, List[str]]: The concatenated uint16 token ids (tokens
+            missing from `vocab` map to UNK_ID), the offsets of each SMILES and the vocabulary.
+
+    Raises:
+        ValueError: If the vocabulary does not fit in uint16.
+    """
+    tokens = smiles.fill_null("").str.extract_all(SMILES_PATTERN)
+    lengths = tokens.list.len().to_numpy().astype(np.int64)
+    # Depending on the Polars version, exploding an empty list yields a null or nothing
+    flat = tokens.explode().drop_nulls()
+    if vocab is None:
+        vocab = SMILES_VOCAB
+    if len(vocab) > np.iinfo(np.uint16).max + 1:
+        raise ValueError(f"A vocabulary of {len(vocab)} tokens does not fit in uint16.")
+
+    ids = (
+        flat.to_frame("token")
+        .with_row_index("index")
+        .join(
+            pl.DataFrame(
+                {"token": vocab, "id": np.arange(len(vocab), dtype=np.uint16)}
+            ),
+            on="token",
+            how="left",
+        )
+        .sort("index")
+        .get_column("id")
+        .fill_null(UNK_ID)
+        .to_numpy()
+        .astype(np.uint16)
+    )
+    return ids, offsets_from_lengths(lengths), vocab
+
+
+class TokenizedColumn:
+    """
+    Packed, memory-mapped token ids for a dataset column.
+
+    Distinct values are tokenized once: `tokens[offsets[j]:offsets[j + 1]]` holds the tokens of
+    distinct value j, and `index[i]` is the distinct value of row i.
+    """
+
+    def __init__(self, arrays: dict, vocab: List[str]):
+        self.tokens = arrays["tokens"]
+        self.offsets = np.asarray(arrays["offsets"])
+        self.index = np.asarray(arrays["index"])
+        self.vocab = vocab
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __getitem__(self, row: int) -> np.ndarray:
+        value = self.index[row]
+        return self.tokens[self.offsets[value] : self.offsets[value + 1]]
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """The number of tokens of each row."""
+        return np.diff(self.offsets)[self.index]
+
+    def pad(
+        self,
+        rows: Union[Sequence[int], np.ndarray],
+        max_length: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Assembles the tokens of some rows into a right-padded matrix, without per-row Python work.
+
+        Args:
+            rows: The row indices.
+            max_length (Optional[int]): Truncates longer rows. Defaults to the longest row.
+
+        Returns:
+            np.ndarray: A (len(rows) x length) matrix filled with PAD_ID past each row's end.
+        """
+        values = self.index[np.asarray(rows, dtype=np.int64)]
+        lengths = self.offsets[values + 1] - self.offsets[values]
+        if max_length is not None:
+            lengths = np.minimum(lengths, max_length)
+        width = int(lengths.max(initial=0))
+        batch = np.full((len(values), width), PAD_ID, dtype=self.tokens.dtype)
+        positions = ragged_arange(np.zeros(len(values)), lengths)
+        batch[np.repeat(np.arange(len(values)), lengths), positions] = self.tokens[
+            ragged_arange(self.offsets[values], lengths)
+        ]
+        return batch
+
+
+def get_tokens(
+    dataset: CachedDataset,
+    column: Optional[str] = None,
+    kind: str = "smiles",
+    vocab: Optional[List[str]] = None,
+) -> TokenizedColumn:
+    """
+    Returns the token ids of every row of a dataset column, tokenizing it if needed.
+
+    Args:
+        dataset (CachedDataset): The dataset.
+        column (Optional[str]): The column. Defaults to the dataset's SMILES_COLUMN for SMILES.
+        kind (str): "smiles" for regex-tokenized SMILES, or "protein" for amino-acid sequences.
+        vocab (Optional[List[str]]): A custom SMILES vocabulary starting with SPECIAL_TOKENS,
+            e.g. from `build_smiles_vocab`. Defaults to SMILES_VOCAB. Each vocabulary gets its
+            own cache.
+
+    Returns:
+        TokenizedColumn: The tokens, aligned with the dataset rows.
+
+    Raises:
+        ValueError: If `kind` is unknown, no column is given and none can be inferred, or a
+            vocabulary is passed for proteins.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown token kind {kind!r}, expected one of {KINDS}.")
+    if kind == "smiles":
+        column = dataset.get_smiles_column(column)
+        vocab = vocab if vocab is not None else SMILES_VOCAB
+    elif column is None:
+        raise ValueError("Pass the column holding the protein sequences.")
+    elif vocab is not None:
+        raise ValueError("Protein sequences always use PROTEIN_VOCAB.")
+    else:
+        vocab = PROTEIN_VOCAB
+
+    path = dataset.get_derived_path(
+        f"{slugify(column)}.tokens.{kind}-{vocab_hash(vocab)}.v{TOKEN_VERSION}"
+    )
+    if dataset.is_derived_fresh(path / META_FILE):
+        arrays, meta = load_packed(path)
+        return TokenizedColumn(arrays, meta["vocab"])
+
+    values = (
+        pl.scan_parquet(dataset.ensure_cache())
+        .select(column)
+        .collect()
+        .get_column(column)
+        .fill_null("")
+    )
+    distinct = values.unique(maintain_order=True)
+    index = (
+        values.to_frame()
+        .with_row_index("row")
+        .join(distinct.to_frame().with_row_index("value"), on=column, how="left")
+        .sort("row")
+        .get_column("value")
+        .to_numpy()
+    )
+    if kind == "smiles":
+        tokens, offsets, _ = encode_smiles(distinct, vocab)
+    else:
+        tokens, offsets = encode_proteins(distinct)
+
+    writer = PackedArrayWriter(
+        path,
+        {
+            "tokens": (tokens.dtype.str, ()),
+            "offsets": ("<i8", ()),
+            "index": ("<i8", ()),
+        },
+    )
+    writer.append(tokens=tokens, offsets=offsets, index=index)
+    writer.close(column=column, kind=kind, vocab=vocab)
+    arrays, meta = load_packed(path)
+    return TokenizedColumn(arrays, meta["vocab"])
+
+
+def bucket_batches(
+    lengths: np.ndarray,
+    batch_size: int,
+    shuffle: bool = True,
+    seed: int = 0,
+    bucket_factor: int = 50,
+    drop_last: bool = False,
+) -> List[np.ndarray]:
+    """
+    Groups rows of similar length into batches to cut padding.
+
+    Rows are shuffled, cut into pools of `batch_size * bucket_factor` rows, sorted by length
+    within each pool and then cut into batches, so batches stay random across epochs while
+    their rows have similar lengths. The batch order is shuffled as well.
+
+    Args:
+        lengths (np.ndarray): The length of each row, e.g. `TokenizedColumn.lengths`.
+        batch_size (int): The number of rows per batch.
+        shuffle (bool): Whether to shuffle rows and batches. Without shuffling, batches follow
+            the sorted lengths of the whole dataset.
+        seed (int): The random seed.
+        bucket_factor (int): The number of batches per sorting pool.
+        drop_last (bool): Whether to drop the last batch of each pool if it is incomplete.
+
+    Returns:
+        List[np.ndarray]: The row indices of each batch.
+    """
+    lengths = np.asarray(lengths)
+    rng = np.random.default_rng(seed)
+    if shuffle:
+        order = rng.permutation(len(lengths))
+        pool_size = batch_size * bucket_factor
+    else:
+        order = np.arange(len(lengths))
+        pool_size = max(len(lengths), 1)
+
+    batches = []
+    for start in range(0, len(order), pool_size):
+        pool = order[start : start + pool_size]
+        pool = pool[np.argsort(lengths[pool], kind="stable")]
+        for offset in range(0, len(pool), batch_size):
+            batch = pool[offset : offset + batch_size]
+            if len(batch) == batch_size or not drop_last:
+                batches.append(batch)
+    if shuffle:
+        batches = [batches[i] for i in rng.permutation(len(batches))]
+    return batches
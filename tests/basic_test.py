@@ -1,3 +1,4 @@
+import os
 import pytest
 from unittest.mock import patch
 import polars as pl
@@ -48,6 +49,7 @@ datasets = [
 
 
 @pytest.mark.parametrize("dataset_cls", datasets)
+@patch("pathlib.Path.replace")
 @patch("pathlib.Path.mkdir")
 @patch("polars.DataFrame.write_parquet")
 @patch("pathlib.Path.exists")
@@ -61,6 +63,7 @@ def test_dataframe_loading_without_cache(
     mock_exists,
     mock_write_parquet,
     mock_mkdir,
+    mock_replace,
     dataset_cls,
 ):
     """Test that the to_df method correctly loads a dataset into a DataFrame without using the cache."""
@@ -98,8 +101,9 @@ def test_dataframe_loading_without_cache(
         mock_write_parquet.called
     ), "The DataFrame should be written to a parquet file."
     assert str(mock_write_parquet.call_args.args[0]).endswith(
-        f"{dataset_name}.parquet"
+        f"{dataset_name}.parquet.{os.getpid()}.tmp"
     ), f"The parquet file for {dataset_name} should be written to the cache directory with the correct name."
+    assert str(mock_replace.call_args.args[0]).endswith(f"{dataset_name}.parquet")
     assert dataset_name in str(
         mock_write_parquet.call_args.args[0]
     ), f"The parquet file for {dataset_name} should be written to the cache directory."
@@ -0,0 +1,58 @@
+import pytest
+
+from aiondata.benchmarks import CASES, compare, measure, run_case
+from aiondata.raw.zinc import ZINC, ZINC20_TRANCHES
+
+
+@pytest.mark.parametrize("name", list(CASES))
+def test_run_case(name, tmp_path, monkeypatch):
+    """Test that every loader runs offline on synthetic inputs and reports its stages."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    result = run_case(name, scale=0.02)
+    assert result["records"] > 0
+    assert result["stages"] and all(t >= 0 for t in result["stages"].values())
+    assert result["seconds"] == pytest.approx(sum(result["stages"].values()))
+    assert result["peak_rss_mb"] > 0
+    assert not list(tmp_path.iterdir())
+
+
+def test_measure_isolates_runs():
+    """Test that a case runs in a fresh process and keeps the fastest of the runs."""
+    result = measure("zinc", scale=0.01, repeat=2)
+    assert result["records"] == 8 * 250
+    assert set(result["stages"]) == {"read", "write_parquet"}
+
+
+def test_compare():
+    """Test that slowdowns and memory growth beyond the tolerance are reported."""
+    baseline = {
+        "zinc": {
+            "seconds": 1.0,
+            "stages": {"read": 0.8, "write_parquet": 0.01},
+            "peak_rss_mb": 100,
+        }
+    }
+    same = {"zinc": dict(baseline["zinc"])}
+    assert compare(same, baseline) == []
+
+    slower = {
+        "zinc": {
+            "seconds": 1.5,
+            "stages": {"read": 1.3, "write_parquet": 0.05},
+            "peak_rss_mb": 150,
+        },
+        "uniprot": {"seconds": 9.0, "stages": {}, "peak_rss_mb": 100},
+    }
+    regressions = compare(slower, baseline, tolerance=0.2)
+    assert [r.split(":")[0] for r in regressions] == [
+        "zinc seconds",
+        "zinc stage read",
+        "zinc peak_rss_mb",
+    ]
+    assert compare(slower, baseline, tolerance=1.0) == []
+
+
+def test_zinc_subset_cache_name():
+    """Test that a subset of the ZINC tranches gets its own cache."""
+    assert ZINC().get_cache_name() == "zinc"
+    assert ZINC(tranches=ZINC20_TRANCHES[:2]).get_cache_name().startswith("zinc_")
@@ -1,10 +1,16 @@
+import json
 import os
 from pathlib import Path
 from unittest.mock import patch
+import numpy as np
 import polars as pl
+import pytest
+from rdkit import Chem
 from polars.testing import assert_frame_equal
 from aiondata import BindingDB
 from aiondata import BindingAffinity
+from aiondata.processed.bindingaffinity import DEFAULT_THRESHOLDS
+from aiondata.star import hash_strings
 
 current_file_dir = Path(__file__).resolve().parent
 mock_sdf_path = current_file_dir / "mock.sdf"
@@ -38,10 +44,11 @@ def test_numeric_conversion():
                 ), f"Field {key} is not a float or None."
 
 
+@patch("pathlib.Path.replace")
 @patch("pathlib.Path.mkdir")
 @patch("pathlib.Path.exists")
 @patch("polars.DataFrame.write_parquet")
-def test_dataframe_no_cache(mock_write_parquet, mock_exists, mock_mkdir):
+def test_dataframe_no_cache(mock_write_parquet, mock_exists, mock_mkdir, mock_replace):
     """Test that a DataFrame is created and cached."""
     mock_exists.return_value = False
 
@@ -77,10 +84,11 @@ def test_dataframe_creation_from_cache(
     assert_frame_equal(df, mock_df)
 
 
+@patch("pathlib.Path.replace")
 @patch("pathlib.Path.mkdir")
 @patch("polars.DataFrame.write_parquet")
 @patch("pathlib.Path.exists")
-def test_bindingaffinity(mock_exists, mock_write_parquet, mock_mkdir):
+def test_bindingaffinity(mock_exists, mock_write_parquet, mock_mkdir, mock_replace):
     """Test that the BindingAffinity dataset is correctly created."""
     mock_exists.return_value = False
     df = BindingAffinity(BindingDB.from_uncompressed_file(mock_sdf_path)).get_df()
@@ -88,3 +96,243 @@ def test_bindingaffinity(mock_exists, mock_write_parquet, mock_mkdir):
     assert df.height > 0, "DataFrame is empty."
     assert "SMILES" in df.columns, "SMILES column missing in DataFrame."
     assert "Sequence" in df.columns, "Sequence column missing in DataFrame."
+
+
+def num_atoms(mol):
+    return mol.GetNumAtoms()
+
+
+def test_keep_mol_binary_column(tmp_path, monkeypatch):
+    """Test that molecules are cached in binary form and rebuilt without SMILES parsing."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    bindingdb = BindingDB(
+        BindingDB.from_uncompressed_file(mock_sdf_path), keep_mol=True
+    )
+
+    df = bindingdb.to_df()
+    assert df.schema["Mol"] == pl.Binary
+    assert bindingdb.get_cache_path().name == "bindingdb_mol.parquet"
+
+    mols = [mol for batch in bindingdb.iter_mols(batch_size=2) for mol in batch]
+    assert len(mols) == df.height
+    assert [Chem.MolToSmiles(mol) for mol in mols] == df["SMILES"].to_list()
+
+    atoms = [
+        atoms
+        for batch in bindingdb.iter_mols(func=num_atoms, processes=2)
+        for atoms in batch
+    ]
+    assert atoms == [mol.GetNumAtoms() for mol in mols]
+
+
+def test_iter_mols_requires_keep_mol():
+    """Test that iter_mols() refuses a cache without a binary molecule column."""
+    with pytest.raises(ValueError):
+        BindingDB(BindingDB.from_uncompressed_file(mock_sdf_path)).iter_mols()
+
+
+def test_keep_coordinates(tmp_path, monkeypatch):
+    """Test that 3D coordinates are stored in ragged arrays aligned with the rows."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    bindingdb = BindingDB(
+        BindingDB.from_uncompressed_file(mock_sdf_path), keep_coordinates=True
+    )
+    df = bindingdb.to_df()
+
+    conformers = bindingdb.get_coordinates()
+    assert len(conformers) == df.height
+    assert conformers.coordinates.dtype == "float32"
+    coordinates, atomic_numbers = conformers[0]
+    assert coordinates.shape == (6, 3)
+    assert atomic_numbers.tolist() == [6] * 6
+    assert coordinates[1, 1] == pytest.approx(1.209)
+
+
+def test_stale_coordinates_are_rebuilt(tmp_path, monkeypatch):
+    """Test that a coordinate store made for another version of the cache is re-extracted."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    BindingDB(
+        BindingDB.from_uncompressed_file(mock_sdf_path), keep_coordinates=True
+    ).to_df()
+    meta = tmp_path / "bindingdb" / "bindingdb.coordinates" / "meta.json"
+    cache = tmp_path / "bindingdb" / "bindingdb.parquet"
+    stamp = json.loads(meta.read_text())["cache"]
+    assert stamp == [cache.stat().st_mtime_ns, cache.stat().st_size]
+
+    # A cache rebuilt with the same number of rows must not reuse the old coordinates
+    os.utime(cache, ns=(stamp[0] + 10**9, stamp[0] + 10**9))
+    bindingdb = BindingDB(
+        BindingDB.from_uncompressed_file(mock_sdf_path), keep_coordinates=True
+    )
+    assert len(bindingdb.get_coordinates()) == bindingdb.to_df().height
+    assert json.loads(meta.read_text())["cache"][0] == stamp[0] + 10**9
+    # A matching store is not re-extracted
+    mtime = meta.stat().st_mtime_ns
+    BindingDB(keep_coordinates=True).get_coordinates()
+    assert meta.stat().st_mtime_ns == mtime
+
+
+def test_interrupted_parse_leaves_no_partial_store(tmp_path, monkeypatch):
+    """Test that closing the generator early discards the partial coordinate store."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    bindingdb = BindingDB(
+        BindingDB.from_uncompressed_file(mock_sdf_path), keep_coordinates=True
+    )
+    records = bindingdb.to_generator(progress_bar=False)
+    next(records)
+    records.close()
+    assert not (tmp_path / "bindingdb" / "bindingdb.coordinates.tmp").exists()
+    assert not (tmp_path / "bindingdb" / "bindingdb.coordinates").exists()
+
+
+def test_incremental_update(tmp_path, monkeypatch):
+    """Test that an update only adds new records, records its release and rebuilds dependents."""
+    from aiondata.benchmarks.synthetic import write_bindingdb_sdf
+
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    monkeypatch.delenv("AIONDATA_PEER", raising=False)
+    write_bindingdb_sdf(tmp_path / "old.sdf", 20)
+    write_bindingdb_sdf(tmp_path / "new.sdf.zip", 30, compress=True)
+    BindingDB(BindingDB.from_uncompressed_file(tmp_path / "old.sdf")).to_df()
+    affinity = BindingAffinity().to_df()
+
+    bindingdb = BindingDB()
+    result = bindingdb.update(tmp_path / "new.sdf.zip", "202501")
+    assert result == {
+        "release": "202501",
+        "added": 10,
+        "replaced": 0,
+        "skipped": 20,
+        "rebuilt": ["BindingAffinity"],
+    }
+    df = bindingdb.to_df()
+    assert sorted(df["BindingDB Reactant_set_id"].to_list()) == list(range(1, 31))
+    assert bindingdb.read_cache_metadata()["bindingdb.release"] == "202501"
+    assert BindingAffinity().to_df().height > affinity.height
+
+    result = bindingdb.update(tmp_path / "new.sdf.zip", "202501-fix", replace=True)
+    assert (result["added"], result["replaced"], result["skipped"]) == (0, 30, 0)
+    assert bindingdb.to_df().height == 30
+    assert json.loads(bindingdb.read_cache_metadata()["bindingdb.updates"]) == [
+        {"release": "202501", "records": 10},
+        {"release": "202501-fix", "records": 30},
+    ]
+
+
+def test_normalized(tmp_path, monkeypatch):
+    """Test that the normalized cache rebuilds the wide table and can be scanned alone."""
+    from aiondata.benchmarks.synthetic import write_bindingdb_sdf
+
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    monkeypatch.delenv("AIONDATA_PEER", raising=False)
+    sdf = write_bindingdb_sdf(tmp_path / "bindingdb.sdf", 50)
+    wide = BindingDB(BindingDB.from_uncompressed_file(sdf)).to_df()
+    bindingdb = BindingDB(BindingDB.from_uncompressed_file(sdf), normalized=True)
+    measurements = bindingdb.to_df()
+    assert bindingdb.get_cache_path().name == "bindingdb_normalized.parquet"
+    assert "BindingDB Target Chain Sequence" not in measurements.columns
+    assert measurements["target_id"].dtype == pl.Int64
+    assert measurements["target_id"].is_sorted()
+
+    targets = bindingdb.scan_table("targets").collect()
+    assert targets["target_id"].is_unique().all()
+    rebuilt = bindingdb.scan_wide().collect()
+    assert_frame_equal(
+        rebuilt.sort("BindingDB Reactant_set_id"),
+        wide.sort("BindingDB Reactant_set_id"),
+    )
+    assert bindingdb.scan_wide(["target_id", "Ki (nM)"]).collect().height == 50
+
+    # An evicted table is rebuilt
+    bindingdb.get_derived_path("ligands.parquet").unlink()
+    normalized = BindingDB(BindingDB.from_uncompressed_file(sdf), normalized=True)
+    assert normalized.scan_table("ligands").collect().height > 0
+    with pytest.raises(ValueError):
+        BindingDB().scan_wide()
+    with pytest.raises(ValueError):
+        BindingDB(normalized=True, keep_coordinates=True)
+
+
+def test_aggregate_pairs():
+    """Test that replicates are reduced per pair with p-values, censoring and labels."""
+    from aiondata.processed.bindingaffinity import aggregate_pairs
+
+    df = pl.DataFrame(
+        {
+            "SMILES": ["C", "C", "C", "CC", "C"],
+            "Sequence": ["MKV", "MKV", "MKV", "MKV", "GGA"],
+            "Ki (nM)": [10.0, 1000.0, 10000.0 * 1.01, None, None],
+            "IC50 (nM)": [None, None, None, 1.0, None],
+            "Kd (nM)": [None] * 5,
+            "EC50 (nM)": [None, None, None, None, 0.0],
+            "Ki Relation": [None, None, ">", None, None],
+            "IC50 Relation": [None] * 5,
+            "Kd Relation": [None] * 5,
+            "EC50 Relation": [None] * 5,
+        },
+        schema_overrides={"Kd (nM)": pl.Float64},
+    )
+    pairs = aggregate_pairs(
+        df.lazy(), {"default": {"Ki (nM)": 100}, "loose": {"Ki (nM)": 10000}}
+    ).collect()
+    assert pairs.height == 3
+    pair = pairs.filter(pl.col("SMILES") == "C", pl.col("Sequence") == "MKV").row(
+        0, named=True
+    )
+    assert pair["Count"] == 3 and pair["pKi count"] == 3
+    assert pair["pKi median"] == pytest.approx(6.0)
+    assert pair["pKi spread"] == pytest.approx(8 - (9 - np.log10(10100)))
+    assert pair["pKi censored"] and not pair["pIC50 censored"]
+    assert (pair["Binds default"], pair["Binds loose"]) == (0, 1)
+    # Non-positive affinities have no p-value
+    other = pairs.filter(pl.col("Sequence") == "GGA").row(0, named=True)
+    assert other["pEC50 count"] == 0 and other["Binds default"] == 1
+    assert pair["ligand_id"] == hash_strings(pl.Series(["C"])).item()
+    with pytest.raises(ValueError):
+        aggregate_pairs(df.lazy(), {"bad": {"pH": 7}})
+
+    # Caches built before relations were recorded have no censoring information
+    legacy = df.drop(BindingDB.RELATIONS.values())
+    pairs = aggregate_pairs(legacy.lazy(), {"default": DEFAULT_THRESHOLDS}).collect()
+    assert pairs["pKi censored"].null_count() == pairs.height
+    assert pairs["pKi median"].equals(
+        aggregate_pairs(df.lazy(), {"default": DEFAULT_THRESHOLDS}).collect()[
+            "pKi median"
+        ]
+    )
+
+
+def test_binding_affinity_pairs(tmp_path, monkeypatch):
+    """Test that the aggregated pairs are cached per threshold set."""
+    from aiondata.benchmarks.synthetic import write_bindingdb_sdf
+
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    monkeypatch.delenv("AIONDATA_PEER", raising=False)
+    sdf = write_bindingdb_sdf(tmp_path / "bindingdb.sdf", 100)
+    affinity = BindingAffinity(BindingDB.from_uncompressed_file(sdf))
+    df = affinity.to_df()
+    assert df["Ki Relation"].drop_nulls().is_in([">", "<"]).all()
+
+    pairs = affinity.get_pairs()
+    assert pairs.height == df.select("SMILES", "Sequence").unique().height
+    assert pairs["Count"].sum() == df.height
+    assert list(tmp_path.glob("processed/*.pairs.*.parquet"))
+    assert BindingAffinity().get_pairs().equals(pairs)
+    strict = affinity.get_pairs(
+        {"default": DEFAULT_THRESHOLDS, "strict": {"Ki (nM)": 1}}
+    )
+    assert strict["Binds default"].equals(pairs["Binds default"])
+    assert len(list(tmp_path.glob("processed/*.pairs.*.parquet"))) == 2
+
+
+def test_generator_releases_the_file(monkeypatch):
+    """Test that records are not timed without metrics and the parsed file is released."""
+    monkeypatch.setattr(
+        "aiondata.raw.bindingdb.time.perf_counter",
+        lambda: pytest.fail("Records were timed without a metrics sink."),
+    )
+    bindingdb = BindingDB(BindingDB.from_uncompressed_file(mock_sdf_path))
+    assert len(list(bindingdb.to_generator())) > 0
+    assert bindingdb.fd is None and bindingdb.outer_fd is None
+    with pytest.raises(ValueError):
+        next(bindingdb.to_generator())
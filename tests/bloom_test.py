@@ -0,0 +1,73 @@
+import numpy as np
+import polars as pl
+
+from aiondata.bloom import BloomFilter, hash_keys
+from aiondata.datasets import CachedDataset
+
+
+class MockKeys(CachedDataset):
+    def get_df(self) -> pl.DataFrame:
+        return pl.DataFrame({"inchikey": [f"KEY{i:05d}" for i in range(2000)] + [None]})
+
+
+def test_hash_is_independent_of_batch():
+    """Test that a key hashes the same regardless of the other keys in the batch."""
+    single = hash_keys(["CCO"])
+    batch = hash_keys(["CCO", "a much longer key that widens the byte matrix"])
+    assert single[0] == batch[0]
+    assert hash_keys(["CCO"])[0] != hash_keys(["OCC"])[0]
+
+
+def reference_hash(key: str) -> int:
+    value = 0xCBF29CE484222325
+    for byte in key.encode():
+        value = ((value ^ byte) * 0x100000001B3) % 2**64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) % 2**64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) % 2**64
+    return value ^ (value >> 31)
+
+
+def test_hash_mixed_lengths():
+    """Test that short keys next to very long SMILES hash to FNV-1a of their own bytes."""
+    keys = ["", "C", "CCO", "C" * 3000, "N[C@@H](C)C(=O)O" * 200, "é"]
+    short = [f"KEY{i:06d}" for i in range(100_000)]
+    hashes = hash_keys(keys + short)
+    assert hashes[: len(keys)].tolist() == [reference_hash(key) for key in keys]
+    assert np.array_equal(hashes[len(keys) :], hash_keys(short))
+    assert hashes[-1] == reference_hash(short[-1])
+
+
+def test_no_false_negatives_and_bounded_fpr(tmp_path):
+    """Test that inserted keys are always found and unseen keys rarely are."""
+    keys = [f"member-{i}" for i in range(5000)]
+    bloom = BloomFilter.build(keys, tmp_path / "keys.bloom", error_rate=0.01)
+
+    assert bloom.contains(keys).all()
+    assert "member-42" in bloom
+    assert len(bloom) == 5000
+
+    false_positives = bloom.contains([f"stranger-{i}" for i in range(20000)]).mean()
+    assert false_positives < 0.03
+
+
+def test_reopen_from_disk(tmp_path):
+    """Test that a filter file can be reopened and queried."""
+    BloomFilter.build(["A", "B", "C"], tmp_path / "abc.bloom")
+    bloom = BloomFilter(tmp_path / "abc.bloom")
+    assert bloom.contains(["A", "B", "C", None]).tolist() == [True, True, True, False]
+
+
+def test_from_dataset(tmp_path, monkeypatch):
+    """Test that a filter is built once from a cached dataset column."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    dataset = MockKeys()
+
+    bloom = BloomFilter.from_dataset(dataset, "inchikey")
+    assert bloom.path.name == "mockkeys.inchikey.0.001.bloom"
+    assert len(bloom) == 2000
+    assert bloom.contains(["KEY00000", "KEY01999"]).all()
+
+    mtime = bloom.path.stat().st_mtime_ns
+    again = BloomFilter.from_dataset(dataset, "inchikey")
+    assert again.path.stat().st_mtime_ns == mtime
+    assert np.array_equal(again.bits, bloom.bits)
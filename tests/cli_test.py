@@ -0,0 +1,86 @@
+import time
+
+import polars as pl
+import pytest
+
+from aiondata.cli import format_status, main, prefetch, resolve_dataset, status
+from aiondata.datasets import CachedDataset
+from aiondata.raw.moleculenet import Tox21
+
+
+class MockSlow(CachedDataset):
+    def get_df(self) -> pl.DataFrame:
+        start = time.time()
+        time.sleep(1)
+        return pl.DataFrame({"start": [start], "end": [time.time()]})
+
+
+class MockSlowToo(MockSlow):
+    pass
+
+
+class MockParent(CachedDataset):
+    CPU_BOUND = True
+
+    def get_df(self) -> pl.DataFrame:
+        time.sleep(0.5)
+        return pl.DataFrame({"id": [1]})
+
+
+class MockChild(CachedDataset):
+    DEPENDS_ON = ("MockParent",)
+
+    def get_df(self) -> pl.DataFrame:
+        return pl.DataFrame({"parent_cached": [MockParent().get_cache_path().exists()]})
+
+
+class MockBroken(CachedDataset):
+    def get_df(self) -> pl.DataFrame:
+        raise RuntimeError("upstream is down")
+
+
+def name(cls: type) -> str:
+    return f"{__name__}:{cls.__name__}"
+
+
+def test_resolve_dataset():
+    """Test that datasets resolve by case-insensitive public name or module path."""
+    assert resolve_dataset("tox21") is Tox21
+    assert resolve_dataset(name(MockSlow)) is MockSlow
+    with pytest.raises(ValueError):
+        resolve_dataset("NotADataset")
+
+
+def test_prefetch_is_concurrent(tmp_path, monkeypatch):
+    """Test that I/O-bound datasets are built at the same time."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    results = prefetch([name(MockSlow), name(MockSlowToo)], io=2)
+    assert all(result["built"] for result in results.values())
+    first, second = MockSlow().to_df(), MockSlowToo().to_df()
+    assert first["start"][0] < second["end"][0] and second["start"][0] < first["end"][0]
+
+    again = prefetch([name(MockSlow)])
+    assert not again[name(MockSlow)]["built"]
+
+
+def test_prefetch_dependencies_and_errors(tmp_path, monkeypatch):
+    """Test that dependencies are built first and failures are reported."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    results = prefetch([name(MockChild), name(MockParent), name(MockBroken)], cpu=1)
+    assert MockChild().to_df()["parent_cached"][0]
+    assert "upstream is down" in results[name(MockBroken)]["error"]
+    assert main(["prefetch", name(MockBroken)]) == 1
+
+
+def test_status(tmp_path, monkeypatch, capsys):
+    """Test that the status reports the cache state, size, age and build time."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    assert main(["prefetch", name(MockParent)]) == 0
+    missing, cached = status([name(MockChild), name(MockParent)])
+    assert not missing["cached"]
+    assert cached["cached"] and cached["size"] > 0 and cached["age"] >= 0
+    assert cached["build_seconds"] >= 0.5
+    assert "missing" in format_status([missing, cached])
+
+    assert main(["status", name(MockParent), "--json"]) == 0
+    assert '"cached": true' in capsys.readouterr().out
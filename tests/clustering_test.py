@@ -0,0 +1,79 @@
+import numpy as np
+import polars as pl
+
+from aiondata.clustering import (
+    cluster_sequences,
+    get_sequence_clusters,
+    kmer_codes,
+    minhash_signatures,
+)
+from aiondata.datasets import CachedDataset
+
+rng = np.random.default_rng(0)
+AMINO_ACIDS = np.array(list("ACDEFGHIKLMNPQRSTVWY"))
+FAMILY_A = "".join(rng.choice(AMINO_ACIDS, 300))
+FAMILY_B = "".join(rng.choice(AMINO_ACIDS, 300))
+
+
+def mutate(sequence, positions):
+    residues = list(sequence)
+    for position in positions:
+        residues[position] = "W" if residues[position] != "W" else "A"
+    return "".join(residues)
+
+
+class MockTargets(CachedDataset):
+    def get_df(self) -> pl.DataFrame:
+        return pl.DataFrame(
+            {
+                "Sequence": [
+                    FAMILY_A,
+                    FAMILY_B,
+                    mutate(FAMILY_A, [10, 150]),
+                    FAMILY_A,
+                    None,
+                    mutate(FAMILY_B, [5]),
+                ]
+            }
+        )
+
+
+def test_kmer_codes():
+    """Test that k-mers never span two sequences."""
+    codes, owners = kmer_codes(pl.Series(["ABCD", "AB", "ABC"]), 3)
+    assert owners.tolist() == [0, 0, 2]
+    assert codes[0] == codes[2]
+
+
+def test_minhash_estimates_similarity():
+    """Test that near-identical sequences get near-identical signatures."""
+    signatures = minhash_signatures(
+        pl.Series([FAMILY_A, mutate(FAMILY_A, [100]), FAMILY_B])
+    )
+    assert (signatures[0] == signatures[1]).mean() > 0.8
+    assert (signatures[0] == signatures[2]).mean() < 0.2
+
+
+def test_cluster_sequences():
+    """Test that each distinct sequence gets a cluster and families are grouped."""
+    sequences = pl.Series(
+        "Sequence", [FAMILY_A, FAMILY_B, mutate(FAMILY_A, [7]), "MK", "MK", "AC"]
+    )
+    clusters = cluster_sequences(sequences)
+    assert clusters["Sequence"].to_list() == [
+        FAMILY_A,
+        FAMILY_B,
+        mutate(FAMILY_A, [7]),
+        "MK",
+        "AC",
+    ]
+    assert clusters["cluster"].to_list() == [0, 1, 0, 2, 3]
+
+
+def test_get_sequence_clusters(tmp_path, monkeypatch):
+    """Test that per-row clusters are returned and the cluster table is cached."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    clusters = get_sequence_clusters(MockTargets())
+    assert clusters.to_list() == [0, 1, 0, 0, None, 1]
+    assert (tmp_path / "mocktargets.sequence.clusters.k5-p128-t0.5-s0.parquet").exists()
+    assert get_sequence_clusters(MockTargets()).to_list() == clusters.to_list()
@@ -0,0 +1,11 @@
+import pytest
+
+from aiondata.frames import get_registry
+
+
+@pytest.fixture(autouse=True)
+def clear_frame_registry():
+    # Tests mock Parquet reads, so frames kept by one test must not leak into the next
+    get_registry().clear()
+    yield
+    get_registry().clear()
@@ -0,0 +1,68 @@
+import os
+
+import polars as pl
+import pytest
+
+from aiondata.datasets import CachedDataset
+from aiondata.frames import FrameRegistry, get_registry
+
+
+class MockFrames(CachedDataset):
+    COLLECTION = "frames"
+
+    def get_df(self) -> pl.DataFrame:
+        return pl.DataFrame({"id": list(range(1000))})
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+
+
+def test_to_df_is_memoized(monkeypatch):
+    """Test that a cached dataset is read from disk once, and again after it changes."""
+    dataset = MockFrames()
+    dataset.to_df()
+    reads = []
+    read_parquet = pl.read_parquet
+    monkeypatch.setattr(
+        pl, "read_parquet", lambda *a, **k: reads.append(a) or read_parquet(*a, **k)
+    )
+
+    first = dataset.to_df()
+    assert MockFrames().to_df().equals(first)
+    assert len(reads) == 1
+    assert len(get_registry()) == 1
+
+    # In-place changes of a returned frame don't reach the registry
+    first.insert_column(1, pl.Series("extra", range(1000)))
+    assert MockFrames().to_df().columns == ["id"]
+
+    cache = dataset.get_cache_path()
+    pl.DataFrame({"id": [1]}).write_parquet(cache)
+    os.utime(cache, ns=(0, 0))
+    assert dataset.to_df()["id"].to_list() == [1]
+    assert len(reads) == 2
+
+
+def test_lru_eviction(tmp_path):
+    """Test that least recently used frames are evicted to stay within the budget."""
+    frames = {}
+    for name in "abc":
+        frames[name] = pl.DataFrame({"x": range(100)})
+        frames[name].write_parquet(tmp_path / f"{name}.parquet")
+    size = frames["a"].estimated_size()
+    registry = FrameRegistry(budget=2 * size)
+
+    registry.put("a", tmp_path / "a.parquet", frames["a"])
+    registry.put("b", tmp_path / "b.parquet", frames["b"])
+    assert registry.get("a", tmp_path / "a.parquet") is not None
+    registry.put("c", tmp_path / "c.parquet", frames["c"])
+    assert registry.get("b", tmp_path / "b.parquet") is None
+    assert registry.get("a", tmp_path / "a.parquet") is not None
+    assert registry.size == 2 * size
+
+    registry.put("big", tmp_path / "a.parquet", pl.concat([frames["a"]] * 3))
+    assert registry.get("big", tmp_path / "a.parquet") is None
+    registry.put("missing", tmp_path / "missing.parquet", frames["a"])
+    assert len(registry) == 2
@@ -0,0 +1,49 @@
+import numpy as np
+import polars as pl
+
+from aiondata.datasets import CachedDataset
+from aiondata.graphs import get_graphs
+from aiondata.packed import ragged_arange
+
+
+class MockGraphs(CachedDataset):
+    SMILES_COLUMN = "smiles"
+
+    def get_df(self) -> pl.DataFrame:
+        return pl.DataFrame({"smiles": ["CCO", "not a smiles", "c1ccccc1", "[Na+]"]})
+
+
+def test_ragged_arange():
+    """Test that ranges are concatenated in order."""
+    assert ragged_arange([5, 0, 2], [2, 0, 3]).tolist() == [5, 6, 2, 3, 4]
+
+
+def test_graph_featurization(tmp_path, monkeypatch):
+    """Test that graphs are packed with offsets and cached memory-mappable."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    graphs = get_graphs(MockGraphs(), chunk_size=2, processes=1)
+
+    assert len(graphs) == 4
+    assert graphs.valid.tolist() == [True, False, True, True]
+    assert graphs.atom_offsets.tolist() == [0, 3, 3, 9, 10]
+    assert graphs.edge_offsets.tolist() == [0, 4, 4, 16, 16]
+    assert isinstance(graphs.atom_features, np.memmap)
+    assert graphs.atom_features[:3, 0].tolist() == [6, 6, 8]
+
+    cached = get_graphs(MockGraphs())
+    assert np.array_equal(cached.edges, graphs.edges)
+
+
+def test_collate(tmp_path, monkeypatch):
+    """Test that a batch is assembled with edge indices relative to the batch."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    graphs = get_graphs(MockGraphs(), processes=1)
+
+    batch = graphs.collate([2, 0])
+    assert batch["atom_features"].shape == (9, 8)
+    assert batch["atom_offsets"].tolist() == [0, 6, 9]
+    assert batch["batch"].tolist() == [0] * 6 + [1] * 3
+    assert batch["edge_index"].shape == (2, 16)
+    # The ethanol edges come last and point at the last three atoms of the batch
+    assert sorted(set(batch["edge_index"][:, 12:].ravel().tolist())) == [6, 7, 8]
+    assert batch["bond_features"].shape == (16, 4)
@@ -0,0 +1,40 @@
+import subprocess
+import sys
+
+import pytest
+
+import aiondata
+
+HEAVY = ["rdkit", "Bio", "pypdb", "scipy", "requests", "tqdm"]
+
+
+def loaded_after(code: str) -> list:
+    check = (
+        f"import sys\n{code}\nprint(' '.join(m for m in {HEAVY!r} if m in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", check], capture_output=True, text=True, check=True
+    )
+    return output.stdout.split()
+
+
+def test_import_is_lazy():
+    """Test that importing the package loads none of the heavy dependencies."""
+    assert loaded_after("import aiondata") == []
+
+
+def test_light_datasets_skip_heavy_dependencies():
+    """Test that loading a MoleculeNet dataset does not import RDKit or the PDB clients."""
+    assert loaded_after("from aiondata import Tox21") == []
+    assert "rdkit" in loaded_after("from aiondata import BindingDB")
+
+
+def test_public_api():
+    """Test that the dataset classes resolve on attribute access and are listed."""
+    from aiondata.raw.moleculenet import Tox21
+
+    assert aiondata.Tox21 is Tox21
+    assert "BindingDB" in dir(aiondata)
+    assert set(aiondata.__all__) >= {"BindingDB", "UniProt", "ZINC", "BindingAffinity"}
+    with pytest.raises(AttributeError):
+        aiondata.NotADataset
@@ -0,0 +1,129 @@
+import polars as pl
+import pytest
+
+from aiondata.benchmarks.synthetic import write_bindingdb_sdf, write_zinc_tranches
+from aiondata.compact import compact, savings
+from aiondata.layout import Layout
+from aiondata.raw.bindingdb import BindingDB
+from aiondata.raw.zinc import ZINC
+
+
+def test_apply_and_write(tmp_path):
+    """Test that rows are sorted with nulls last and column types are kept."""
+    layout = Layout(sort_by=("key",), row_group_size=2)
+    df = pl.DataFrame({"key": ["b", None, "a", "b"], "kind": ["x", "y", "x", "z"]})
+    assert layout.order(df).to_list() == [2, 0, 3, 1]
+
+    laid_out = layout.apply(df)
+    assert laid_out["key"].to_list() == ["a", "b", "b", None]
+    assert laid_out["kind"].to_list() == ["x", "x", "z", "y"]
+    assert laid_out.schema == df.schema
+
+    layout.write(laid_out, tmp_path / "data.parquet")
+    assert pl.read_parquet(tmp_path / "data.parquet").equals(laid_out)
+    assert Layout().order(df) is None
+    with pytest.raises(ValueError):
+        Layout(sort_by=("missing",)).apply(df)
+
+
+def test_write_is_atomic(tmp_path, monkeypatch):
+    """Test that an interrupted write leaves neither a partial file nor a temporary one."""
+    path = tmp_path / "data.parquet"
+    Layout().write(pl.DataFrame({"id": [1]}), path)
+
+    def fail(self, file, **kwargs):
+        open(file, "wb").write(b"partial")
+        raise OSError("disk full")
+
+    monkeypatch.setattr(pl.DataFrame, "write_parquet", fail)
+    with pytest.raises(OSError):
+        Layout().write(pl.DataFrame({"id": [2]}), path)
+    assert [p.name for p in tmp_path.iterdir()] == ["data.parquet"]
+    assert pl.read_parquet(path)["id"].to_list() == [1]
+
+
+def test_zinc_keeps_its_columns_and_order(tmp_path, monkeypatch):
+    """Test that the ZINC cache has the source columns, in tranche order."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path / "cache"))
+    tranches = ["JJEA", "BAAA", "CAAB"]
+    source = write_zinc_tranches(tmp_path / "zinc", tranches, 10)
+    expected = pl.concat(
+        pl.read_csv(source.format(prefix=t[:2], tranche=t), separator="\t")
+        for t in tranches
+    )
+    built = ZINC(source, tranches).to_df()
+    assert built.equals(expected)
+    assert ZINC(source, tranches).to_df().equals(built)
+
+
+def _atoms_by_id(cache, monkeypatch, sdf, layout):
+    monkeypatch.setenv("AIONDATA_CACHE", str(cache))
+    monkeypatch.setattr(BindingDB, "LAYOUT", layout)
+    bindingdb = BindingDB(BindingDB.from_uncompressed_file(sdf), keep_coordinates=True)
+    ids = bindingdb.to_df()["BindingDB Reactant_set_id"].to_list()
+    conformers = bindingdb.get_coordinates()
+    return ids, {id: conformers[i][1].tolist() for i, id in enumerate(ids)}
+
+
+def test_bindingdb_coordinates_follow_layout(tmp_path, monkeypatch):
+    """Test that the coordinate store stays aligned with rows sorted by target."""
+    layout = BindingDB.LAYOUT
+    sdf = write_bindingdb_sdf(tmp_path / "bindingdb.sdf", 40)
+    ids, sorted_atoms = _atoms_by_id(tmp_path / "sorted", monkeypatch, sdf, layout)
+    assert ids != sorted(ids)
+    reference_ids, reference = _atoms_by_id(
+        tmp_path / "plain", monkeypatch, sdf, Layout()
+    )
+    assert reference_ids == sorted(reference_ids)
+    assert sorted_atoms == reference
+
+    # Re-extracting the coordinates for an existing cache keeps them aligned too
+    store = tmp_path / "sorted" / "bindingdb" / "bindingdb.coordinates"
+    for path in store.iterdir():
+        path.unlink()
+    store.rmdir()
+    assert _atoms_by_id(tmp_path / "sorted", monkeypatch, sdf, layout)[1] == reference
+
+
+def test_compact():
+    """Test that compaction picks the smallest exact types and reports the savings."""
+    df = pl.DataFrame(
+        {
+            "id": [1.0, 2.0, 300.0, None],
+            "value": [0.5, 1.25, None, 2.0],
+            "precise": [0.1, 0.2, 0.3, 0.4],
+            "organism": ["Homo sapiens"] * 3 + ["Mus musculus"],
+            "smiles": ["C", "CC", "CCC", "CCCC"],
+        }
+    )
+    compacted = compact(df)
+    assert dict(compacted.schema) == {
+        "id": pl.Int16,
+        "value": pl.Float32,
+        "precise": pl.Float64,
+        "organism": pl.Categorical,
+        "smiles": pl.Utf8,
+    }
+    assert compacted.cast(df.schema).equals(df)
+    report = savings(df, compacted)
+    assert report["saved"][0] > 0
+    assert report.filter(pl.col("column") == "smiles")["saved"].item() == 0
+
+
+def test_bindingdb_compact(tmp_path, monkeypatch):
+    """Test that a compact BindingDB is cached separately with a savings report."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path / "cache"))
+    sdf = write_bindingdb_sdf(tmp_path / "bindingdb.sdf", 200)
+    plain = BindingDB(BindingDB.from_uncompressed_file(sdf)).to_df()
+    bindingdb = BindingDB(BindingDB.from_uncompressed_file(sdf), compact=True)
+    df = bindingdb.to_df()
+    assert bindingdb.get_cache_path().name == "bindingdb_compact.parquet"
+    assert df.schema["BindingDB Reactant_set_id"] == pl.Int16
+    assert df.estimated_size() < plain.estimated_size()
+    assert BindingDB(compact=True).to_df().equals(df)
+
+    report = bindingdb.get_compaction_report()
+    assert report["compact_bytes"].sum() == df.estimated_size()
+    assert report["saved"].min() >= 0
+    with pytest.raises(ValueError):
+        BindingDB().get_compaction_report()
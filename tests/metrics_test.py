@@ -0,0 +1,75 @@
+import json
+import time
+from pathlib import Path
+
+import polars as pl
+
+from aiondata import BindingDB, metrics
+from aiondata.datasets import CachedDataset
+
+mock_sdf_path = Path(__file__).resolve().parent / "mock.sdf"
+
+
+class MockMetrics(CachedDataset):
+    def get_df(self) -> pl.DataFrame:
+        return pl.DataFrame({"id": [1, 2, 3]})
+
+
+def test_to_df_stages(tmp_path, monkeypatch):
+    """Test that building and reading a cache report their stages."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    with metrics.collect() as report:
+        MockMetrics().to_df()
+        MockMetrics().to_df()
+    result = report.as_dict()
+    assert set(result["spans"]) == {
+        "mockmetrics.build",
+        "mockmetrics.write_parquet",
+        "mockmetrics.read_cache",
+    }
+    assert result["counters"] == {"mockmetrics.rows": 3}
+    assert "mockmetrics.build" in report.format()
+
+
+def test_bindingdb_counters(tmp_path, monkeypatch):
+    """Test that BindingDB reports its parse and conversion time, records and failures."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    with metrics.collect() as report:
+        records = list(
+            BindingDB(BindingDB.from_uncompressed_file(mock_sdf_path)).to_generator(
+                progress_bar=False
+            )
+        )
+    result = report.as_dict()
+    assert result["counters"]["bindingdb.records"] == len(records)
+    assert result["counters"]["bindingdb.parse_failures"] >= 0
+    assert {"bindingdb.parse", "bindingdb.convert"} <= set(result["spans"])
+
+
+def test_json_lines_sink(tmp_path):
+    """Test that a custom sink receives every span and counter."""
+    sink = metrics.JsonLinesSink(tmp_path / "metrics.jsonl")
+    previous = metrics.set_sink(sink)
+    try:
+        with metrics.span("stage", dataset="mock"):
+            pass
+        metrics.count("records", 5)
+    finally:
+        metrics.set_sink(previous)
+    events = [json.loads(line) for line in open(tmp_path / "metrics.jsonl")]
+    assert [(e["type"], e["name"]) for e in events] == [
+        ("span", "stage"),
+        ("count", "records"),
+    ]
+    assert events[0]["dataset"] == "mock"
+
+
+def test_disabled_overhead():
+    """Test that nothing is recorded without a sink and instrumentation is cheap."""
+    assert not metrics.enabled()
+    start = time.perf_counter()
+    for _ in range(100_000):
+        with metrics.span("stage"):
+            pass
+        metrics.count("records")
+    assert (time.perf_counter() - start) / 100_000 < 5e-6
@@ -0,0 +1,68 @@
+import polars as pl
+from rdkit.Chem import Descriptors
+
+from aiondata.datasets import CachedDataset
+from aiondata.molecules import map_molecules
+
+calls = []
+
+
+def heavy_atoms(mol, offset=0):
+    calls.append(mol.GetNumHeavyAtoms())
+    return mol.GetNumHeavyAtoms() + offset
+
+
+def weights(mol):
+    return {"mw": Descriptors.MolWt(mol), "rings": mol.GetRingInfo().NumRings()}
+
+
+class MockSmiles(CachedDataset):
+    SMILES_COLUMN = "smiles"
+    SMILES = ["CCO", "c1ccccc1", "not a smiles", None, "CCO"]
+
+    def get_df(self) -> pl.DataFrame:
+        return pl.DataFrame({"smiles": self.SMILES})
+
+
+class MockMoreSmiles(MockSmiles):
+    SMILES = ["CCO", "CCCC"]
+
+
+def test_map_molecules_scalar_with_errors(tmp_path, monkeypatch):
+    """Test that results are aligned with the rows and failures are captured."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    result = map_molecules(MockSmiles(), heavy_atoms, processes=1)
+
+    assert result.columns == ["heavy_atoms", "heavy_atoms_error"]
+    assert result["heavy_atoms"].to_list() == [3, 6, None, None, 3]
+    errors = result["heavy_atoms_error"].to_list()
+    assert errors[2].startswith("ValueError")
+    assert errors[0] is None and errors[3] is None
+
+
+def test_map_molecules_dict_output(tmp_path, monkeypatch):
+    """Test that dict results become one column per key."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    result = map_molecules(MockSmiles(), weights, processes=1)
+    assert result.columns == ["mw", "rings", "weights_error"]
+    assert result["rings"].to_list() == [0, 1, None, None, 0]
+
+
+def test_map_molecules_reuses_results(tmp_path, monkeypatch):
+    """Test that only new molecules are computed and parameters key the cache."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    calls.clear()
+    map_molecules(MockSmiles(), heavy_atoms, processes=1)
+    assert sorted(calls) == [3, 6]
+
+    calls.clear()
+    result = map_molecules(MockMoreSmiles(), heavy_atoms, processes=1)
+    assert calls == [4]
+    assert result["heavy_atoms"].to_list() == [3, 4]
+
+    calls.clear()
+    result = map_molecules(
+        MockMoreSmiles(), heavy_atoms, params={"offset": 10}, processes=1
+    )
+    assert sorted(calls) == [3, 4]
+    assert result["heavy_atoms"].to_list() == [13, 14]
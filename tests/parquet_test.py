@@ -0,0 +1,27 @@
+import polars as pl
+import pytest
+
+from aiondata.parquet import row_group_sizes
+
+
+def test_row_group_sizes(tmp_path):
+    """Test that row group sizes are read from the footer of files with nested columns."""
+    df = pl.DataFrame(
+        {
+            "id": range(25),
+            "name": [f"m{i}" for i in range(25)],
+            "flag": [True, False, None, True, False] * 5,
+            "atoms": [[i, i + 1] for i in range(25)],
+        }
+    )
+    path = tmp_path / "data.parquet"
+    df.write_parquet(path, row_group_size=10, statistics=True, metadata={"a": "b"})
+    # Polars may split the rows more evenly than `row_group_size`
+    sizes = row_group_sizes(path)
+    assert len(sizes) in (2, 3) and max(sizes) <= 13 and sum(sizes) == 25
+    df.head(0).write_parquet(path)
+    assert sum(row_group_sizes(path)) == 0
+
+    (tmp_path / "data.csv").write_text("id\n1\n")
+    with pytest.raises(ValueError):
+        row_group_sizes(tmp_path / "data.csv")
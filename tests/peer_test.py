@@ -0,0 +1,64 @@
+import urllib.error
+import urllib.request
+
+import polars as pl
+import pytest
+
+from aiondata.datasets import CachedDataset
+from aiondata.peer import PeerCacheServer, fetch_from_peer
+
+
+class MockPeer(CachedDataset):
+    COLLECTION = "peer"
+    downloads = 0
+
+    def get_df(self) -> pl.DataFrame:
+        MockPeer.downloads += 1
+        return pl.DataFrame({"id": [1, 2, 3]})
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path / "server"))
+    MockPeer.downloads = 0
+    MockPeer().to_df()
+    (tmp_path / "server" / "raw.zip").write_bytes(b"blob")
+    (tmp_path / "server" / "partial.zip.123.tmp").write_bytes(b"partial")
+    with PeerCacheServer(tmp_path / "server", host="127.0.0.1", port=0) as server:
+        monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path / "client"))
+        monkeypatch.setenv("AIONDATA_PEER", server.url)
+        yield server
+
+
+def test_cache_is_fetched_from_peer(server):
+    """Test that a node uses the peer's Parquet cache instead of building the dataset."""
+    assert MockPeer.downloads == 1
+    assert MockPeer().to_df()["id"].to_list() == [1, 2, 3]
+    assert MockPeer.downloads == 1
+    assert MockPeer().get_cache_path().exists()
+
+
+def test_raw_files_are_fetched_from_peer(server, tmp_path):
+    """Test that raw downloads are served and files being written are not."""
+    client = tmp_path / "client"
+    assert fetch_from_peer(client / "raw.zip", client)
+    assert (client / "raw.zip").read_bytes() == b"blob"
+    assert not fetch_from_peer(client / "missing.zip", client)
+    assert not fetch_from_peer(client / "partial.zip.123.tmp", client)
+    assert not list(client.glob("*.tmp"))
+
+    with pytest.raises(urllib.error.HTTPError):
+        urllib.request.urlopen(f"{server.url}/")
+    with pytest.raises(urllib.error.HTTPError):
+        urllib.request.urlopen(f"{server.url}/../peer_test.py")
+
+
+def test_fallback_to_upstream(tmp_path, monkeypatch):
+    """Test that the dataset is built from upstream when the peer is unreachable."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    with PeerCacheServer(tmp_path / "gone", host="127.0.0.1", port=0) as server:
+        url = server.url
+    monkeypatch.setenv("AIONDATA_PEER", url)
+    MockPeer.downloads = 0
+    assert MockPeer().ensure_cache().exists()
+    assert MockPeer.downloads == 1
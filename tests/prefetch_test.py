@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import wait
+
+import polars as pl
+import pytest
+
+from aiondata.datasets import CachedDataset
+
+
+class SlowDataset(CachedDataset):
+    COLLECTION = "prefetch"
+    builds = 0
+    lock = threading.Lock()
+
+    def __init__(self, name: str = "slow"):
+        self.name = name
+
+    def get_cache_name(self) -> str:
+        return self.name
+
+    def get_df(self) -> pl.DataFrame:
+        with SlowDataset.lock:
+            SlowDataset.builds += 1
+        # Stands for a download, which releases the GIL
+        time.sleep(0.5)
+        return pl.DataFrame({"id": [1, 2, 3]})
+
+
+class BrokenDataset(CachedDataset):
+    COLLECTION = "prefetch"
+
+    def get_df(self) -> pl.DataFrame:
+        raise ValueError("upstream is down")
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    monkeypatch.delenv("AIONDATA_PEER", raising=False)
+    SlowDataset.builds = 0
+
+
+def test_prefetch_overlaps():
+    """Test that the builds of several datasets overlap and are awaited together."""
+    start = time.perf_counter()
+    futures = [SlowDataset(f"slow{i}").prefetch() for i in range(4)]
+    done, not_done = wait(futures)
+    assert not not_done
+    assert time.perf_counter() - start < 1.5
+    assert all(future.result().exists() for future in futures)
+
+
+def test_prefetch_builds_once():
+    """Test that prefetching a dataset being built returns the pending future."""
+    first = SlowDataset().prefetch()
+    assert SlowDataset().prefetch() is first
+    first.result()
+    assert SlowDataset.builds == 1
+    SlowDataset().prefetch().result()
+    assert SlowDataset.builds == 1
+
+
+def test_ato_df_and_ascan():
+    """Test the asyncio API."""
+
+    async def load():
+        return await asyncio.gather(SlowDataset("a").ato_df(), SlowDataset("b").ascan())
+
+    df, lazy = asyncio.run(load())
+    assert df["id"].to_list() == [1, 2, 3]
+    assert isinstance(lazy, pl.LazyFrame)
+    assert lazy.collect()["id"].to_list() == [1, 2, 3]
+    assert SlowDataset("a").scan().collect().equals(df)
+
+
+def test_prefetch_error():
+    """Test that a failed build is raised by the future and can be retried."""
+    with pytest.raises(ValueError, match="upstream is down"):
+        BrokenDataset().prefetch().result()
+    with pytest.raises(ValueError, match="upstream is down"):
+        asyncio.run(BrokenDataset().ato_df())
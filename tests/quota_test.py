@@ -0,0 +1,116 @@
+import multiprocessing
+import os
+
+import polars as pl
+import pytest
+
+from aiondata.cli import main
+from aiondata.datasets import CachedDataset
+from aiondata.quota import gc, hold, list_entries, mark_used, parse_size
+
+
+class MockQuota(CachedDataset):
+    COLLECTION = "quota"
+
+    def get_df(self) -> pl.DataFrame:
+        return pl.DataFrame({"id": list(range(10000))})
+
+
+def write(path, size, accessed):
+    path.write_bytes(b"x" * size)
+    os.utime(path, (accessed, accessed))
+    return path
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    monkeypatch.delenv("AIONDATA_CACHE_QUOTA", raising=False)
+    collection = tmp_path / "quota"
+    collection.mkdir()
+    write(collection / "old.zip", 1000, 100)
+    write(collection / "new.zip", 1000, 300)
+    write(collection / "data.parquet", 1000, 50)
+    write(collection / "data.scaffolds.parquet", 1000, 200)
+    write(collection / "new.zip.1234.tmp", 5000, 0)
+    return tmp_path
+
+
+def test_parse_size():
+    assert parse_size("500MB") == 500 * 2**20
+    assert parse_size("1.5 GiB") == int(1.5 * 2**30)
+    assert parse_size(42) == 42
+    with pytest.raises(ValueError):
+        parse_size("lots")
+
+
+def test_list_entries(cache):
+    """Test that entries are classified and files being written are ignored."""
+    entries = {entry.path.name: entry for entry in list_entries()}
+    assert set(entries) == {
+        "old.zip",
+        "new.zip",
+        "data.parquet",
+        "data.scaffolds.parquet",
+    }
+    assert entries["old.zip"].kind == "raw"
+    assert entries["data.parquet"].kind == "cache"
+    assert entries["data.scaffolds.parquet"].kind == "derived"
+    assert entries["data.scaffolds.parquet"].parent == cache / "quota" / "data.parquet"
+    assert entries["new.zip"].size == 1000
+
+
+def test_gc_order(cache):
+    """Test that raw entries are evicted before derived ones, least recently used first."""
+    assert [entry.path.name for entry in gc(3000)] == ["old.zip"]
+    mark_used(cache / "quota" / "data.parquet")
+    assert [entry.path.name for entry in gc(1500, dry_run=True)] == [
+        "new.zip",
+        "data.scaffolds.parquet",
+    ]
+    assert (cache / "quota" / "new.zip").exists()
+    # A cache is evicted together with its derived artifacts
+    assert [entry.path.name for entry in gc(500)] == [
+        "new.zip",
+        "data.scaffolds.parquet",
+        "data.parquet",
+    ]
+    assert (cache / "quota" / "new.zip.1234.tmp").exists()
+
+
+def _hold(path, ready, release):
+    with hold(path):
+        ready.set()
+        release.wait()
+
+
+def test_held_entries_are_kept(cache):
+    """Test that an entry held by another process is not evicted."""
+    old = cache / "quota" / "old.zip"
+    context = multiprocessing.get_context("spawn")
+    ready, release = context.Event(), context.Event()
+    process = context.Process(target=_hold, args=(old, ready, release))
+    process.start()
+    try:
+        assert ready.wait(30)
+        evicted = [entry.path.name for entry in gc(3000)]
+        assert evicted == ["new.zip"]
+        assert old.exists()
+    finally:
+        release.set()
+        process.join()
+    assert [entry.path.name for entry in gc(0)][0] == "old.zip"
+
+
+def test_quota_is_enforced(cache, monkeypatch, capsys):
+    """Test that the quota is enforced when a cache is built, and the gc command."""
+    monkeypatch.setenv("AIONDATA_CACHE_QUOTA", "3000")
+    df = MockQuota().to_df()
+    assert MockQuota().get_cache_path().exists()
+    assert not (cache / "quota" / "old.zip").exists()
+    assert MockQuota().to_df().equals(df)
+
+    assert main(["gc", "--quota", "0", "--dry-run"]) == 0
+    assert "Would evict" in capsys.readouterr().out
+    assert main(["gc", "--quota", "0"]) == 0
+    assert not MockQuota().get_cache_path().exists()
@@ -0,0 +1,147 @@
+import multiprocessing
+import pickle
+import subprocess
+import sys
+from datetime import date
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import polars as pl
+import pytest
+from polars.testing import assert_frame_equal
+
+from aiondata.datasets import CachedDataset
+from aiondata.shared import SharedFrame, cleanup_shared
+
+
+class MockShared(CachedDataset):
+    def get_df(self) -> pl.DataFrame:
+        return pl.DataFrame(
+            {"id": np.arange(1000), "name": [f"m{i}" for i in range(1000)]}
+        )
+
+
+class MockLargeShared(CachedDataset):
+    def get_df(self) -> pl.DataFrame:
+        return pl.DataFrame(
+            {
+                "id": np.arange(2_000_000),
+                "name": [f"molecule-{i}" for i in range(2_000_000)],
+            }
+        )
+
+
+class MockTyped(CachedDataset):
+    def get_df(self) -> pl.DataFrame:
+        return pl.DataFrame(
+            {
+                "id": pl.Series([1, None, 3], dtype=pl.Int32),
+                "smiles": ["CCO", None, "a much longer string than twelve bytes"],
+                "value": [0.5, float("nan"), None],
+                "active": [True, False, None],
+                "source": pl.Series(["a", "b", "a"], dtype=pl.Categorical),
+                "atoms": [[6, 6, 8], [], None],
+                "date": [date(2024, 1, 1), None, date(2024, 11, 1)],
+            }
+        )
+
+
+def total(handle: SharedFrame) -> int:
+    return handle.attach()["id"].sum()
+
+
+def private_memory_mb() -> int:
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith("RssAnon"):
+            return int(line.split()[1]) // 1024
+
+
+@pytest.fixture
+def shared_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path / "cache"))
+    monkeypatch.setenv("AIONDATA_SHM", str(tmp_path / "shm"))
+    return tmp_path / "shm"
+
+
+def test_share_and_attach(shared_cache):
+    """Test that spawned workers attach to the shared copy and the publisher removes it."""
+    with MockShared().share(columns=["id"]) as handle:
+        assert handle.path.parent == shared_cache
+        assert handle.attach().columns == ["id"]
+
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(2, mp_context=context) as executor:
+            assert list(executor.map(total, [handle, handle])) == [499500, 499500]
+
+        assert pickle.loads(pickle.dumps(handle)).path == handle.path
+        SharedFrame(handle.path).close()
+        assert handle.path.exists()
+
+    assert not handle.path.exists()
+    with pytest.raises(FileNotFoundError):
+        handle.attach()
+
+
+def test_attach_preserves_types(shared_cache):
+    """Test that every column type round-trips through shared memory."""
+    with MockTyped().share() as handle:
+        assert_frame_equal(
+            handle.attach(), MockTyped().to_df(), categorical_as_str=True
+        )
+
+
+def test_attach_without_pyarrow(shared_cache, monkeypatch):
+    """Test that attaching falls back to copying the dataset without pyarrow."""
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    with MockTyped().share() as handle:
+        assert_frame_equal(
+            handle.attach(), MockTyped().to_df(), categorical_as_str=True
+        )
+
+
+def test_publishers_hold_leases(shared_cache):
+    """Test that a file shared by two publishers outlives the first one to close."""
+    first = MockShared().share()
+    second = MockShared().share()
+    assert first.path == second.path
+    first.close()
+    assert second.attach().height == 1000
+    second.close()
+    assert not second.path.exists()
+
+
+def test_cleanup_of_crashed_publishers(shared_cache):
+    """Test that files whose publishers died without closing them are removed."""
+    code = (
+        "from aiondata.datasets import CachedDataset\n"
+        "import polars as pl, os\n"
+        "class MockShared(CachedDataset):\n"
+        "    def get_df(self):\n"
+        "        return pl.DataFrame({'id': [1, 2]})\n"
+        "print(MockShared().share().path)\n"
+        "os._exit(1)\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=False
+    ).stdout
+    path = Path(output.strip())
+    assert path.exists()
+    assert cleanup_shared() == [path]
+    assert not path.exists()
+
+
+@pytest.mark.skipif(
+    not Path("/proc/self/status").exists(), reason="Needs Linux memory accounting"
+)
+def test_attach_is_zero_copy(shared_cache):
+    """Test that attaching does not grow private memory by the size of the dataset."""
+    pytest.importorskip("pyarrow", exc_type=ImportError)
+    with MockLargeShared().share() as handle:
+        assert handle.path.stat().st_size > 30 * 2**20
+        frames = []
+        before = private_memory_mb()
+        for _ in range(3):
+            frames.append(handle.attach())
+            assert frames[-1]["id"].sum() == 1999999000000
+        assert private_memory_mb() - before < 10
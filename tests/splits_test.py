@@ -0,0 +1,101 @@
+import numpy as np
+import polars as pl
+import pytest
+
+from aiondata.raw.moleculenet import MoleculeNet
+from aiondata.splits import (
+    murcko_scaffold,
+    random_split,
+    scaffold_split,
+    stratified_split,
+)
+
+SMILES = [
+    "c1ccccc1O",
+    "c1ccccc1N",
+    "c1ccccc1C",
+    "C1CCCCC1O",
+    "C1CCCCC1N",
+    "c1ccncc1",
+    "c1ccncc1C",
+    "CCO",
+    "CCN",
+    "not a smiles",
+]
+
+
+class MockMoleculeNet(MoleculeNet):
+    def get_df(self) -> pl.DataFrame:
+        return pl.DataFrame(
+            {"smiles": SMILES, "active": [0, 1, 0, 1, 0, 1, 0, 1, 0, 1]}
+        )
+
+
+def _assert_partition(split, n):
+    combined = np.concatenate([split["train"], split["valid"], split["test"]])
+    assert sorted(combined.tolist()) == list(range(n))
+
+
+def test_murcko_scaffold():
+    """Test that scaffolds are computed and invalid SMILES are reported as None."""
+    assert murcko_scaffold("c1ccccc1O") == "c1ccccc1"
+    assert murcko_scaffold("CCO") == ""
+    assert murcko_scaffold("not a smiles") is None
+
+
+def test_random_split_is_deterministic():
+    """Test that random splits partition the rows and depend only on the seed."""
+    split = random_split(100, seed=3)
+    _assert_partition(split, 100)
+    assert len(split["train"]) == 80
+    assert np.array_equal(split["test"], random_split(100, seed=3)["test"])
+    assert not np.array_equal(split["test"], random_split(100, seed=4)["test"])
+
+
+def test_scaffold_split_keeps_scaffolds_together():
+    """Test that no scaffold is shared between splits."""
+    scaffolds = [murcko_scaffold(smiles) for smiles in SMILES]
+    split = scaffold_split(scaffolds, sizes=(0.6, 0.2, 0.2))
+    _assert_partition(split, len(SMILES))
+    seen = {}
+    for name, indices in split.items():
+        for index in indices:
+            if scaffolds[index] is not None:
+                assert seen.setdefault(scaffolds[index], name) == name
+
+
+def test_stratified_split_balances_labels():
+    """Test that each split has the same label distribution."""
+    labels = [0] * 50 + [1] * 50
+    split = stratified_split(labels, sizes=(0.8, 0.1, 0.1))
+    _assert_partition(split, 100)
+    for indices in split.values():
+        assert np.asarray(labels)[indices].mean() == pytest.approx(0.5)
+
+
+def test_invalid_sizes():
+    """Test that split fractions must sum to one."""
+    with pytest.raises(ValueError):
+        random_split(10, sizes=(0.5, 0.1, 0.1))
+
+
+def test_moleculenet_split_is_cached(tmp_path, monkeypatch):
+    """Test that scaffolds and splits are cached next to the dataset cache."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    dataset = MockMoleculeNet()
+
+    scaffolds = dataset.get_scaffolds()
+    assert scaffolds.len() == len(SMILES)
+    assert (tmp_path / "moleculenet" / "mockmoleculenet.scaffolds.parquet").exists()
+
+    split = dataset.get_split("scaffold", sizes=(0.6, 0.2, 0.2), seed=1)
+    _assert_partition(split, len(SMILES))
+    assert isinstance(split["train"], np.memmap)
+    again = dataset.get_split("scaffold", sizes=(0.6, 0.2, 0.2), seed=1)
+    assert np.array_equal(split["train"], again["train"])
+
+    stratified = dataset.get_split("stratified", task="active", seed=1)
+    _assert_partition(stratified, len(SMILES))
+
+    with pytest.raises(ValueError):
+        dataset.get_split("stratified")
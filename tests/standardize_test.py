@@ -0,0 +1,59 @@
+from unittest.mock import patch
+
+import polars as pl
+
+from aiondata.datasets import CachedDataset
+from aiondata.memo import ResultStore
+from aiondata.standardize import standardize, standardize_series, standardize_smiles
+
+
+class MockSalts(CachedDataset):
+    SMILES_COLUMN = "smiles"
+
+    def get_df(self) -> pl.DataFrame:
+        return pl.DataFrame(
+            {"smiles": ["CC(=O)[O-].[Na+]", "C[NH3+].[Cl-]", None, "CC(=O)[O-].[Na+]"]}
+        )
+
+
+def test_standardize_smiles():
+    """Test that salts are stripped and charges neutralized."""
+    assert standardize_smiles("CC(=O)[O-].[Na+]") == "CC(=O)O"
+    assert standardize_smiles("C[NH3+].[Cl-]") == "CN"
+    assert standardize_smiles("not a smiles") is None
+
+
+def test_result_store_roundtrip(tmp_path, monkeypatch):
+    """Test that stored results are found and duplicate keys keep their first value."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    store = ResultStore("test")
+    store.add(pl.DataFrame({"key": ["a", "b"], "value": [1, 2]}))
+    store.add(pl.DataFrame({"key": ["b", "c"], "value": [20, 3]}))
+    store.compact()
+
+    assert len(store.parts()) == 1
+    found = store.lookup(pl.Series(["b", "c", "d"])).sort("key")
+    assert found.to_dict(as_series=False) == {"key": ["b", "c"], "value": [2, 3]}
+
+
+def test_standardize_series_is_memoized(tmp_path, monkeypatch):
+    """Test that each distinct SMILES is standardized only once across calls."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    smiles = pl.Series(["CC(=O)[O-].[Na+]", None, "CC(=O)[O-].[Na+]"])
+
+    assert standardize_series(smiles).to_list() == ["CC(=O)O", None, "CC(=O)O"]
+    with patch("aiondata.standardize.parallel_map") as mock_parallel_map:
+        assert standardize_series(smiles).to_list() == ["CC(=O)O", None, "CC(=O)O"]
+        mock_parallel_map.assert_not_called()
+
+
+def test_standardize_dataset(tmp_path, monkeypatch):
+    """Test that a dataset's standardized SMILES are cached as an extra column."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    dataset = MockSalts()
+
+    standardized = standardize(dataset)
+    assert standardized.to_list() == ["CC(=O)O", "CN", None, "CC(=O)O"]
+    assert (tmp_path / "mocksalts.smiles.standardized.v1.parquet").exists()
+    df = dataset.to_df().with_columns(standardized)
+    assert df.columns == ["smiles", "standardized_smiles"]
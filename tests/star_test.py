@@ -0,0 +1,43 @@
+import polars as pl
+
+from aiondata.star import Dimension, hash_strings, join, normalize
+
+DIMENSIONS = (
+    Dimension("ligands", "ligand_id", "monomer", ("smiles", "name")),
+    Dimension("targets", "target_id", "sequence", ("organism",), hashed=True),
+)
+
+
+def test_normalize_and_join():
+    """Test that shared attributes move to dimension tables and the wide view is rebuilt."""
+    df = pl.DataFrame(
+        {
+            "monomer": [1.0, 2.0, 1.0, None, 2.0],
+            "smiles": ["C", "CC", "C", "CCC", "CC"],
+            # Varies for the same ligand, so it stays with the measurements
+            "name": ["a", "b", "c", "d", "b"],
+            "sequence": ["MKV", "MKV", "GGA", "GGA", None],
+            "organism": ["human", "human", "mouse", "mouse", None],
+            "ki": [1.0, 2.0, 3.0, 4.0, 5.0],
+        }
+    )
+    fact, tables = normalize(df, DIMENSIONS)
+    assert fact.columns == ["name", "ki", "ligand_id", "target_id"]
+    assert tables["ligands"].columns == ["ligand_id", "monomer", "smiles"]
+    assert tables["ligands"]["ligand_id"].to_list() == [1, 2, None]
+    assert tables["targets"].height == 3
+    assert fact["target_id"].null_count() == 1
+
+    lazy = {name: table.lazy() for name, table in tables.items()}
+    assert join(fact.lazy(), lazy, DIMENSIONS, df.columns).collect().equals(df)
+    # Only the dimensions holding selected columns are joined
+    plan = join(fact.lazy(), lazy, DIMENSIONS, ["ki", "smiles"]).explain()
+    assert "JOIN" in plan and plan.count("DF [") == 2
+
+
+def test_hash_strings():
+    hashes = hash_strings(pl.Series(["MKV", None, "GGA", "MKV"]))
+    assert hashes.dtype == pl.Int64
+    assert hashes[0] == hashes[3] != hashes[2]
+    assert hashes[1] is None
+    assert hash_strings(pl.Series(["MKV"]))[0] == hashes[0]
@@ -0,0 +1,93 @@
+import sys
+
+import numpy as np
+import polars as pl
+import pytest
+
+from aiondata.datasets import CachedDataset
+from aiondata.layout import Layout
+from aiondata.streaming import shard_info
+
+
+class MockLarge(CachedDataset):
+    LAYOUT = Layout(row_group_size=500)
+
+    def get_df(self) -> pl.DataFrame:
+        return pl.DataFrame({"id": np.arange(10_000), "value": np.arange(10_000) * 0.5})
+
+
+def read_ids(batches):
+    return np.concatenate([batch["id"].to_numpy() for batch in batches])
+
+
+def test_iter_batches_shuffles_every_row_once(tmp_path, monkeypatch):
+    """Test that a shuffled epoch yields every row exactly once, in a seeded order."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    options = dict(batch_size=256, buffer_size=3000)
+    batches = list(MockLarge().iter_batches(**options))
+    assert all(len(batch) == 256 for batch in batches[:-1])
+    ids = read_ids(batches)
+    assert np.array_equal(np.sort(ids), np.arange(10_000))
+    assert not np.array_equal(ids, np.arange(10_000))
+
+    assert np.array_equal(read_ids(MockLarge().iter_batches(**options)), ids)
+    other_epoch = read_ids(MockLarge().iter_batches(epoch=1, **options))
+    assert not np.array_equal(other_epoch, ids)
+
+
+def test_iter_batches_in_order(tmp_path, monkeypatch):
+    """Test that unshuffled batches keep the row order and can drop the last batch."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    batches = list(
+        MockLarge().iter_batches(batch_size=300, shuffle=False, drop_last=True)
+    )
+    assert np.array_equal(read_ids(batches), np.arange(9900))
+
+
+def test_iter_batches_shards(tmp_path, monkeypatch):
+    """Test that workers of all ranks read disjoint parts that cover the dataset."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    parts = [
+        read_ids(
+            MockLarge().iter_batches(
+                worker=worker, num_workers=2, rank=rank, world_size=2
+            )
+        )
+        for worker in range(2)
+        for rank in range(2)
+    ]
+    assert all(len(part) == 2500 for part in parts)
+    assert np.array_equal(np.sort(np.concatenate(parts)), np.arange(10_000))
+
+
+def test_iter_batches_numpy(tmp_path, monkeypatch):
+    """Test that batches can be yielded as dicts of NumPy arrays."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    batch = next(MockLarge().iter_batches(columns=["value"], format="numpy"))
+    assert list(batch) == ["value"]
+    assert isinstance(batch["value"], np.ndarray)
+
+
+def test_iter_batches_arrow(tmp_path, monkeypatch):
+    """Test that Arrow batches need pyarrow and fail early with a clear error without it."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    try:
+        import pyarrow
+    except ImportError:
+        pyarrow = None
+    if pyarrow is not None:
+        batch = next(MockLarge().iter_batches(format="arrow"))
+        assert isinstance(batch, pyarrow.Table)
+
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    with pytest.raises(ImportError, match="aiondata\\[arrow\\]"):
+        MockLarge().iter_batches(format="arrow")
+
+
+def test_shard_info(monkeypatch):
+    """Test that the rank is read from the environment of distributed launchers."""
+    monkeypatch.setenv("RANK", "1")
+    monkeypatch.setenv("WORLD_SIZE", "4")
+    assert shard_info(worker=2, num_workers=3) == (5, 12)
+    with pytest.raises(ValueError):
+        shard_info(worker=3, num_workers=3)
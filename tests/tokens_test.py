@@ -0,0 +1,125 @@
+import numpy as np
+import polars as pl
+import pytest
+
+from aiondata.datasets import CachedDataset
+from aiondata.tokens import (
+    PAD_ID,
+    PROTEIN_VOCAB,
+    SMILES_VOCAB,
+    UNK_ID,
+    bucket_batches,
+    build_smiles_vocab,
+    encode_proteins,
+    encode_smiles,
+    get_tokens,
+    vocab_hash,
+)
+
+
+class MockOther(CachedDataset):
+    SMILES_COLUMN = "SMILES"
+
+    def get_df(self) -> pl.DataFrame:
+        return pl.DataFrame({"SMILES": ["O=C(O)c1ccccc1", "[2H]C([2H])Br", "CCO"]})
+
+
+class MockBinding(CachedDataset):
+    SMILES_COLUMN = "SMILES"
+
+    def get_df(self) -> pl.DataFrame:
+        return pl.DataFrame(
+            {
+                "SMILES": ["CCO", "c1ccccc1Cl", "CCO", "[Na+].[Cl-]"],
+                "Sequence": ["MKV", "MKVLA", "MKV", None],
+            }
+        )
+
+
+def test_encode_smiles():
+    """Test that multi-character atoms are single tokens and offsets delimit each SMILES."""
+    ids, offsets, vocab = encode_smiles(pl.Series(["CBr", "", "[NH4+]Cl"]))
+    assert offsets.tolist() == [0, 2, 2, 4]
+    assert [vocab[i] for i in ids] == ["C", "Br", "[NH4+]", "Cl"]
+    assert ids.dtype == np.uint16
+
+
+def test_ids_are_stable_across_datasets(tmp_path, monkeypatch):
+    """Test that a token gets the same id in every dataset with the default vocabulary."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    binding, other = get_tokens(MockBinding()), get_tokens(MockOther())
+    assert binding.vocab == other.vocab == SMILES_VOCAB
+    assert np.array_equal(binding[0], other[2])
+    assert binding[0].tolist() == [SMILES_VOCAB.index(t) for t in ["C", "C", "O"]]
+    assert SMILES_VOCAB.index("[2H]") in other[1]
+
+    ids, _, _ = encode_smiles(pl.Series(["[Xe]C"]))
+    assert ids.tolist() == [UNK_ID, SMILES_VOCAB.index("C")]
+
+
+def test_smiles_vocab_is_frozen():
+    """Test that the ids of the released SMILES vocabulary do not change."""
+    released = SMILES_VOCAB[:9976]
+    assert vocab_hash(released) == "8636e89a37da"
+    assert released.index("Cl") == 9 and released.index("[C@@H]") == 2144
+
+
+def test_custom_vocab(tmp_path, monkeypatch):
+    """Test that a custom vocabulary gets its own cache."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    vocab = build_smiles_vocab(pl.Series(["CCO", None, "[Na+].[Cl-]"]))
+    assert vocab[2:] == [".", "C", "O", "[Cl-]", "[Na+]"]
+    tokens = get_tokens(MockBinding(), vocab=vocab)
+    assert tokens.vocab == vocab
+    assert [vocab[i] for i in tokens[0]] == ["C", "C", "O"]
+    assert [vocab[i] for i in tokens[1]][-1] == "<unk>"
+    assert get_tokens(MockBinding()).vocab == SMILES_VOCAB
+    assert len(list(tmp_path.glob("mockbinding.smiles.tokens.smiles-*"))) == 2
+
+    with pytest.raises(ValueError):
+        get_tokens(MockBinding(), "Sequence", kind="protein", vocab=vocab)
+
+
+def test_encode_proteins():
+    """Test that residues map to the protein vocabulary and unknown ones to UNK."""
+    ids, offsets = encode_proteins(pl.Series(["MK", "A1"]))
+    assert offsets.tolist() == [0, 2, 4]
+    assert [PROTEIN_VOCAB[i] for i in ids] == ["M", "K", "A", "<unk>"]
+
+
+def test_get_tokens(tmp_path, monkeypatch):
+    """Test that repeated values are tokenized once and the tokens are cached."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path))
+    tokens = get_tokens(MockBinding())
+    assert len(tokens) == 4
+    assert tokens.lengths.tolist() == [3, 9, 3, 3]
+    assert len(tokens.offsets) == 4
+    assert np.array_equal(tokens[0], tokens[2])
+    assert isinstance(tokens.tokens, np.memmap)
+
+    proteins = get_tokens(MockBinding(), "Sequence", kind="protein")
+    assert proteins.tokens.dtype == np.uint8
+    assert proteins.lengths.tolist() == [3, 5, 3, 0]
+    batch = proteins.pad([1, 3, 0])
+    assert batch.shape == (3, 5)
+    assert (batch[1] == PAD_ID).all()
+    assert np.array_equal(batch[2, :3], proteins[0])
+
+    cached = get_tokens(MockBinding(), "Sequence", kind="protein")
+    assert np.array_equal(cached.tokens, proteins.tokens)
+
+    with pytest.raises(ValueError):
+        get_tokens(MockBinding(), kind="dna")
+
+
+def test_bucket_batches():
+    """Test that every row is batched once and batches cut padding."""
+    lengths = np.random.default_rng(0).integers(1, 500, 1000)
+    batches = bucket_batches(lengths, batch_size=10, seed=1)
+    assert np.array_equal(np.sort(np.concatenate(batches)), np.arange(1000))
+
+    def padding(batches):
+        return sum(lengths[b].max() * len(b) - lengths[b].sum() for b in batches)
+
+    random_batches = np.array_split(np.random.default_rng(1).permutation(1000), 100)
+    assert padding(batches) < padding(random_batches) / 10
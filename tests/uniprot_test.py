@@ -3,6 +3,7 @@ from unittest.mock import MagicMock
 import gzip
 
 from aiondata import UniProt
+from aiondata.peer import PeerCacheServer
 
 # Example data for the tests
 example_gzip_data = """\
@@ -65,3 +66,81 @@ def test_to_generator_network_failure(mocker):
         list(uni_prot.to_generator())
 
     assert "Network failure" in str(exc_info.value)
+
+
+def _release(path, entries):
+    text = ""
+    for accession, description, sequence in entries:
+        text += (
+            f"ID   {accession}_HUMAN   Reviewed;   {len(sequence)} AA.\n"
+            f"AC   {accession};\n"
+            f"DE   RecName: Full={description};\n"
+            f"SQ   SEQUENCE   {len(sequence)} AA;  1000 MW;  {sequence[:4]}CRC CRC64;\n"
+            f"     {sequence}\n"
+            "//\n"
+        )
+    path.write_bytes(gzip.compress(text.encode()))
+    return path.as_uri()
+
+
+def test_refresh(tmp_path, monkeypatch):
+    """Test that a refresh only parses changed entries and reports the changes."""
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path / "cache"))
+    old = _release(
+        tmp_path / "old.dat.gz",
+        [("P1", "Kept", "MKVL"), ("P2", "Old name", "MAAA"), ("P3", "Gone", "MCCC")],
+    )
+    new = _release(
+        tmp_path / "new.dat.gz",
+        [("P1", "Kept", "MKVL"), ("P2", "New name", "MAAA"), ("P4", "New", "MDDD")],
+    )
+    assert UniProt(old).refresh()["change"].to_list() == ["added"] * 3
+
+    parsed = []
+    parse_entry = UniProt._parse_entry
+    monkeypatch.setattr(
+        UniProt,
+        "_parse_entry",
+        lambda self, lines: parsed.append(lines) or parse_entry(self, lines),
+    )
+    changes = UniProt(new).refresh()
+    assert dict(changes.iter_rows()) == {
+        "P2": "modified",
+        "P4": "added",
+        "P3": "removed",
+    }
+    assert len(parsed) == 2
+    assert UniProt(new).get_changes().equals(changes)
+
+    df = UniProt(new).to_df().sort("Accession Numbers")
+    assert df["Accession Numbers"].to_list() == ["P1;", "P2;", "P4;"]
+    assert df["Protein Description"].to_list() == [
+        "RecName: Full=Kept;",
+        "RecName: Full=New name;",
+        "RecName: Full=New;",
+    ]
+    assert UniProt(new).refresh().height == 0
+
+
+def test_refresh_after_fetching_from_peer(tmp_path, monkeypatch):
+    """Test that a cache fetched from a peer comes with the hashes refresh relies on."""
+    old = _release(
+        tmp_path / "old.dat.gz", [("P1", "Kept", "MKVL"), ("P2", "Old name", "MAAA")]
+    )
+    new = _release(
+        tmp_path / "new.dat.gz", [("P1", "Kept", "MKVL"), ("P2", "New name", "MAAA")]
+    )
+    monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path / "server"))
+    UniProt(old).to_df()
+    with PeerCacheServer(tmp_path / "server", host="127.0.0.1", port=0) as server:
+        monkeypatch.setenv("AIONDATA_CACHE", str(tmp_path / "client"))
+        monkeypatch.setenv("AIONDATA_PEER", server.url)
+        parsed = []
+        parse_entry = UniProt._parse_entry
+        monkeypatch.setattr(
+            UniProt,
+            "_parse_entry",
+            lambda self, lines: parsed.append(lines) or parse_entry(self, lines),
+        )
+        assert dict(UniProt(new).refresh().iter_rows()) == {"P2": "modified"}
+    assert len(parsed) == 1